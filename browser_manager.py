@@ -1,140 +1,528 @@
 import os
 import sys
 import re
+import json
 import time
+import base64
+import shutil
+import weakref
+import subprocess
+from collections import deque
 from selenium import webdriver
 from selenium.webdriver.edge.service import Service
 from selenium.webdriver.edge.options import Options
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (
     WebDriverException, NoAlertPresentException, 
     TimeoutException, InvalidSessionIdException,
-    SessionNotCreatedException
+    SessionNotCreatedException, UnexpectedAlertPresentException,
+    NoSuchWindowException
 )
 import utils  # 导入通用工具模块
+import wait_manager
+import playwright_backend
+import resource_manager
 
-def init_browser():
-    """初始化浏览器驱动并返回driver实例"""
+# 浏览器配置：standard=有窗口（可扫码登录），lean=精简（无界面，适合长时间运行多个课程）
+BROWSER_PROFILES = {
+    "standard": "标准（有窗口）",
+    "lean": "精简（无界面、屏蔽统计/字体/视频）"
+}
+
+# 精简配置下屏蔽的请求（统计分析、字体、视频），不影响课件图片与课程接口
+LEAN_BLOCKED_URLS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*hm.baidu.com*", "*cnzz.com*",
+    "*growingio.com*", "*sentry*", "*.woff*", "*.ttf*", "*.otf*", "*.eot*",
+    "*.mp4*", "*.m3u8*", "*.flv*", "*.webm*"
+]
+
+# 浏览器后端：selenium=通过msedgedriver同步调用（默认），playwright=Playwright异步驱动（原生事件订阅，需安装playwright）
+BROWSER_BACKENDS = {
+    "selenium": "Selenium（msedgedriver）",
+    "playwright": "Playwright（异步，原生事件订阅）"
+}
+_backend_settings = {"backend": "selenium"}
+
+def _resolve_backend(backend):
+    """校验浏览器后端名称；未安装playwright或未知后端时回退为Selenium"""
+    if backend == "playwright" and not playwright_backend.PLAYWRIGHT_AVAILABLE:
+        utils.log("[浏览器模块] 未安装playwright（pip install playwright），使用Selenium后端")
+        return "selenium"
+    return backend if backend in BROWSER_BACKENDS else "selenium"
+
+def set_browser_backend(backend):
+    """设置浏览器后端（对之后启动的所有浏览器生效）；未安装playwright时回退为Selenium"""
+    _backend_settings["backend"] = _resolve_backend(backend)
+    utils.log(f"[浏览器模块] 浏览器后端: {BROWSER_BACKENDS[_backend_settings['backend']]}")
+
+def get_browser_backend():
+    return _backend_settings["backend"]
+
+# Linux下按顺序查找的浏览器（Edge优先，Chromium/Chrome兜底）与对应驱动
+LINUX_BROWSERS = [
+    ("edge", ["microsoft-edge", "microsoft-edge-stable"], "msedgedriver"),
+    ("chrome", ["chromium", "chromium-browser", "google-chrome", "google-chrome-stable"], "chromedriver")
+]
+
+def has_display():
+    """当前是否有桌面会话（Windows/macOS视为有；Linux需DISPLAY或WAYLAND_DISPLAY）"""
+    if not sys.platform.startswith("linux"):
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+def _find_executable(name):
+    """优先查找程序目录下的可执行文件，其次查找PATH"""
+    local_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    if os.path.exists(local_path):
+        return local_path
+    return shutil.which(name)
+
+def find_browser():
+    """查找可用的浏览器与驱动，返回{"kind": edge/chrome, "browser_path", "driver_path"}，未找到驱动时driver_path为None
+
+    Windows使用程序目录下的msedgedriver.exe；Linux依次查找Edge+msedgedriver、Chromium/Chrome+chromedriver（程序目录或PATH）
+    """
+    if sys.platform.startswith("win"):
+        return {"kind": "edge", "browser_path": None, "driver_path": _find_executable("msedgedriver.exe")}
+    fallback = None
+    for kind, browser_names, driver_name in LINUX_BROWSERS:
+        browser_path = next((path for path in map(shutil.which, browser_names) if path), None)
+        driver_path = _find_executable(driver_name)
+        if browser_path and driver_path:
+            return {"kind": kind, "browser_path": browser_path, "driver_path": driver_path}
+        if (browser_path or driver_path) and not fallback:
+            fallback = {"kind": kind, "browser_path": browser_path, "driver_path": driver_path}
+    return fallback or {"kind": "edge", "browser_path": None, "driver_path": _find_executable("msedgedriver")}
+
+def _windows_edge_dirs():
+    """Windows下Edge的安装目录（可能的位置）"""
+    return [
+        r"C:\Program Files (x86)\Microsoft\Edge\Application",
+        r"C:\Program Files\Microsoft\Edge\Application",
+        fr"C:\Users\{os.getlogin()}\AppData\Local\Microsoft\Edge\Application"
+    ]
+
+def browser_installed(browser):
+    """浏览器本身是否已安装（Windows查找Edge安装目录下的msedge.exe，其他系统看是否找到浏览器程序）"""
+    if sys.platform.startswith("win"):
+        return any(os.path.exists(os.path.join(path, "msedge.exe")) for path in _windows_edge_dirs())
+    return bool(browser.get("browser_path"))
+
+def get_browser_version(browser):
+    """读取浏览器版本号（Windows扫描Edge安装目录，其他系统执行 --version）"""
+    if sys.platform.startswith("win"):
+        for path in _windows_edge_dirs():
+            if os.path.exists(path):
+                version_dirs = [
+                    d for d in os.listdir(path) 
+                    if os.path.isdir(os.path.join(path, d)) and 
+                    re.match(r'^\d+\.\d+\.\d+\.\d+$', d)
+                ]
+                if version_dirs:
+                    version_dirs.sort(key=lambda x: tuple(map(int, x.split('.'))), reverse=True)
+                    return version_dirs[0]
+        return None
+    if not browser.get("browser_path"):
+        return None
     try:
-        # 驱动路径（当前目录下的msedgedriver.exe）
-        driver_filename = "msedgedriver.exe"
-        driver_path = os.path.join(os.path.dirname(__file__), driver_filename)
-        
-        if not os.path.exists(driver_path):
-            utils.log(f"[错误] 未找到驱动文件: {driver_path}")
+        output = subprocess.run([browser["browser_path"], "--version"], capture_output=True, text=True, timeout=15).stdout
+        match = re.search(r"(\d+\.\d+\.\d+\.\d+)", output)
+        return match.group(1) if match else None
+    except Exception as e:
+        utils.log(f"[浏览器模块] 读取浏览器版本失败: {str(e)}")
+        return None
+
+def _browser_arguments(lean):
+    """两种后端共用的浏览器启动参数"""
+    if lean:
+        args = [
+            "--headless=new",           # 无界面
+            "--window-size=1280,720",   # 小视口
+            "--disable-extensions",
+            "--mute-audio",
+            "--disable-background-networking",
+            "--disable-sync",
+            "--no-first-run"
+        ]
+    else:
+        args = ["--start-maximized"]  # 最大化窗口
+    if sys.platform.startswith("linux"):
+        args.append("--disable-dev-shm-usage")  # 容器/小内存服务器的/dev/shm通常很小
+    return args + [
+        "--no-sandbox",             # 禁用沙箱模式
+        "--disable-gpu",            # 禁用GPU加速
+        "--disable-popup-blocking", # 禁用弹窗拦截
+        "--disable-blink-features=AutomationControlled"  # 隐藏自动化标识
+    ]
+
+_lean_drivers = weakref.WeakSet()  # 以精简无界面配置启动的driver
+
+def is_lean_browser(driver):
+    """driver是否已以精简无界面配置启动（无需再切换）"""
+    return driver in _lean_drivers
+
+def _init_playwright_browser(profile_dir, lean):
+    """使用Playwright后端启动Edge"""
+    try:
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+        args = [arg for arg in _browser_arguments(lean) if arg != "--headless=new"]  # 无界面由headless参数控制
+        browser = find_browser()
+        driver = playwright_backend.launch_browser(
+            os.path.abspath(profile_dir) if profile_dir else None, headless=lean, args=args,
+            viewport={"width": 1280, "height": 720} if lean else None,
+            channel="msedge" if browser["kind"] == "edge" and (browser["browser_path"] or sys.platform.startswith("win")) else None,
+            executable_path=browser["browser_path"] if browser["kind"] == "chrome" else None)
+        if lean:
+            apply_lean_tab(driver)
+            _lean_drivers.add(driver)
+        utils.log(f"Edge浏览器启动成功（Playwright后端{'，精简无界面配置' if lean else ''}）")
+        return driver
+    except Exception as e:
+        utils.log(f"[错误] 浏览器初始化失败（Playwright）: {str(e)}")
+        if profile_dir:
+            utils.log("课程浏览器数据目录不可用，改用临时目录启动")
+            return _init_playwright_browser(None, lean)
+        return None
+
+def init_browser(profile_dir=None, lean=False, backend=None):
+    """初始化浏览器驱动并返回driver实例（profile_dir为课程专属用户数据目录，用于保留登录状态；lean=True使用精简无界面配置）
+
+    没有桌面会话（如Linux服务器）时总是以无界面方式启动；backend指定本次使用的后端（默认使用set_browser_backend设置的后端）
+    """
+    if not lean and not has_display():
+        utils.log("[浏览器模块] 未检测到桌面会话，以无界面方式启动浏览器")
+        lean = True
+    backend = _resolve_backend(backend) if backend else _backend_settings["backend"]
+    if backend == "playwright":
+        return _init_playwright_browser(profile_dir, lean)
+    try:
+        # 查找浏览器与驱动（Windows: 程序目录下的msedgedriver.exe；Linux: msedgedriver/chromedriver）
+        browser = find_browser()
+        driver_path = browser["driver_path"]
+        if not driver_path:
+            utils.log(f"[错误] 未找到浏览器驱动（{'msedgedriver.exe' if sys.platform.startswith('win') else 'msedgedriver或chromedriver'}）")
             return None
+        is_edge = browser["kind"] == "edge"
         
         # 浏览器配置
-        edge_options = Options()
-        edge_options.add_argument("--start-maximized")  # 最大化窗口
-        edge_options.add_argument("--no-sandbox")       # 禁用沙箱模式
-        edge_options.add_argument("--disable-gpu")      # 禁用GPU加速
-        edge_options.add_argument("--disable-popup-blocking")  # 禁用弹窗拦截
-        edge_options.add_argument("--disable-blink-features=AutomationControlled")  # 隐藏自动化标识
+        edge_options = Options() if is_edge else ChromeOptions()
+        if browser["browser_path"]:
+            edge_options.binary_location = browser["browser_path"]
+        for argument in _browser_arguments(lean):
+            edge_options.add_argument(argument)
         edge_options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
-        edge_options.add_experimental_option("detach", True)  # 浏览器不随脚本退出
+        edge_options.add_experimental_option("detach", not lean)  # 有窗口时浏览器不随脚本退出（无界面浏览器随脚本退出，避免残留进程）
         edge_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 1})  # 启用图片加载
+        edge_options.set_capability("ms:loggingPrefs" if is_edge else "goog:loggingPrefs", {"performance": "ALL"})  # 开启性能日志（用于读取CDP网络事件）
+        edge_options.set_capability("unhandledPromptBehavior", "accept")  # 未处理的对话框由驱动自动确认
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+            edge_options.add_argument(f"--user-data-dir={os.path.abspath(profile_dir)}")  # 持久化登录状态
         
         # 启动浏览器
-        service = Service(executable_path=driver_path, log_path="logs/edge_driver.log", log_level=1)
-        driver = webdriver.Edge(service=service, options=edge_options)
-        utils.log("Edge浏览器启动成功（已隐藏自动化标识）")
+        if is_edge:
+            service = Service(executable_path=driver_path, log_path="logs/edge_driver.log", log_level=1)
+            driver = webdriver.Edge(service=service, options=edge_options)
+        else:
+            service = ChromeService(executable_path=driver_path, log_path="logs/chrome_driver.log")
+            driver = webdriver.Chrome(service=service, options=edge_options)
+        if lean:
+            apply_lean_tab(driver)
+            _lean_drivers.add(driver)
+        utils.log(f"{'Edge' if is_edge else 'Chromium'}浏览器启动成功（已隐藏自动化标识{'，精简无界面配置' if lean else ''}）")
         return driver
         
     except Exception as e:
         utils.log(f"[错误] 浏览器初始化失败: {str(e)}")
+        if profile_dir:
+            # 用户数据目录可能被残留的浏览器进程占用，改用临时目录启动（可通过Cookie快照恢复登录）
+            utils.log("课程浏览器数据目录不可用，改用临时目录启动")
+            return init_browser(lean=lean)
         return None
 
+def apply_lean_tab(driver):
+    """精简配置：屏蔽统计/字体/视频请求，并让课程标签页始终视为前台（仅该标签页不被后台节流）"""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+    except Exception as e:
+        utils.log(f"[浏览器模块] 应用精简配置失败: {str(e)}")
+        return False
+    return keep_tab_active(driver)
+
+def keep_tab_active(driver):
+    """让当前标签页始终视为前台（后台标签页的定时器/推送处理不被节流）"""
+    try:
+        driver.execute_cdp_cmd("Emulation.setFocusEmulationEnabled", {"enabled": True})
+        driver.execute_cdp_cmd("Page.setWebLifecycleState", {"state": "active"})
+        return True
+    except Exception as e:
+        utils.log(f"[浏览器模块] 设置标签页前台状态失败: {str(e)}")
+        return False
+
+def save_cookie_snapshot(driver, path):
+    """保存当前登录Cookie快照，返回保存的Cookie数"""
+    if not driver or not path:
+        return 0
+    try:
+        cookies = driver.get_cookies()
+        if not cookies:
+            return 0
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": int(time.time()), "cookies": cookies}, f, ensure_ascii=False)
+        return len(cookies)
+    except Exception as e:
+        utils.log(f"[浏览器模块] 保存Cookie快照失败: {str(e)}")
+        return 0
+
+def restore_cookie_snapshot(driver, path, url):
+    """将Cookie快照写回浏览器（需先打开同域页面），返回恢复的Cookie数"""
+    if not path or not os.path.exists(path):
+        return 0
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cookies = json.load(f).get("cookies", [])
+    except Exception as e:
+        utils.log(f"[浏览器模块] 读取Cookie快照失败: {str(e)}")
+        return 0
+    
+    match = re.match(r"(https?://[^/]+)", url or "")
+    if match:
+        wait_manager.navigate(driver, match.group(1) + "/web", require_app=False, label="恢复登录状态")
+    restored = 0
+    now = time.time()
+    for cookie in cookies:
+        if cookie.get("expiry") and cookie["expiry"] < now:
+            continue  # 已过期
+        cookie = {k: v for k, v in cookie.items()
+                  if k in ("name", "value", "path", "domain", "secure", "httpOnly", "expiry", "sameSite")}
+        try:
+            driver.add_cookie(cookie)
+            restored += 1
+        except Exception:
+            continue
+    utils.log(f"[浏览器模块] 已从快照恢复{restored}个Cookie")
+    return restored
+
+def _driver_download_hint(browser):
+    """与检测到的浏览器对应的驱动获取提示"""
+    if browser["kind"] == "edge":
+        return "请下载对应版本驱动: https://developer.microsoft.com/zh-cn/microsoft-edge/tools/webdriver/"
+    return "请安装与Chromium/Chrome同版本的chromedriver（如 apt install chromium-driver）"
+
 def check_edge_compatibility():
-    """检查Edge浏览器和驱动是否兼容"""
-    utils.log("开始检测Edge浏览器和驱动兼容性...")
+    """检查浏览器和驱动是否兼容（Windows: Edge；Linux: Edge或Chromium/Chrome）
+
+    未安装浏览器时返回False；其他系统或已安装但无法读取版本时无法确认，不阻止运行（返回True）
+    """
+    utils.log("开始检测浏览器和驱动兼容性...")
+    if not (sys.platform.startswith("win") or sys.platform.startswith("linux")):
+        utils.log(f"当前系统（{sys.platform}）不支持自动检测浏览器版本，跳过兼容性检查")
+        return True
     
     try:
-        # 获取Edge浏览器版本
-        edge_version = None
-        if sys.platform.startswith("win"):
-            possible_paths = [
-                r"C:\Program Files (x86)\Microsoft\Edge\Application",
-                r"C:\Program Files\Microsoft\Edge\Application",
-                fr"C:\Users\{os.getlogin()}\AppData\Local\Microsoft\Edge\Application"
-            ]
-            
-            for path in possible_paths:
-                if os.path.exists(path):
-                    version_dirs = [
-                        d for d in os.listdir(path) 
-                        if os.path.isdir(os.path.join(path, d)) and 
-                        re.match(r'^\d+\.\d+\.\d+\.\d+$', d)
-                    ]
-                    
-                    if version_dirs:
-                        version_dirs.sort(key=lambda x: tuple(map(int, x.split('.'))), reverse=True)
-                        edge_version = version_dirs[0]
-                        utils.log(f"检测到Edge浏览器版本: {edge_version}")
-                        break
-            
-            if not edge_version:
-                utils.log("未找到Edge浏览器安装目录或版本信息（请确认Edge已安装）")
-                return False
-        else:
-            utils.log("非Windows系统暂不支持自动版本检测（需手动确保版本匹配）")
+        browser = find_browser()
+        browser_name = "Edge" if browser["kind"] == "edge" else "Chromium"
+        
+        if not browser_installed(browser):
+            utils.log(f"未找到{browser_name}浏览器（请确认{browser_name}已安装）")
+            return False
+
+        # 获取浏览器版本
+        browser_version = get_browser_version(browser)
+        if not browser_version:
+            utils.log(f"无法读取{browser_name}浏览器版本信息，无法确认兼容性，跳过检查")
             return True
+        utils.log(f"检测到{browser_name}浏览器版本: {browser_version}")
             
         # 检查驱动是否存在
-        driver_path = os.path.join(os.path.dirname(__file__), "msedgedriver.exe")
-        if not os.path.exists(driver_path):
-            utils.log(f"未找到驱动文件: {driver_path}（请下载对应版本驱动）")
+        driver_path = browser["driver_path"]
+        if not driver_path:
+            utils.log("未找到驱动文件（Windows: 程序目录下的msedgedriver.exe；Linux: msedgedriver/chromedriver放在程序目录或PATH中）")
             return False
             
-        # 获取驱动版本
+        # 获取驱动版本（执行 --version，无需启动浏览器）
         try:
-            service = Service(executable_path=driver_path)
-            driver = webdriver.Edge(service=service)
-            driver_version = driver.capabilities['browserVersion']
-            driver.quit()
-            utils.log(f"检测到Edge驱动版本: {driver_version}")
+            output = subprocess.run([driver_path, "--version"], capture_output=True, text=True, timeout=15).stdout
+            match = re.search(r"(\d+\.\d+\.\d+\.\d+)", output)
+            if not match:
+                raise ValueError(f"无法识别驱动版本输出: {output.strip()[:80]}")
+            driver_version = match.group(1)
+            utils.log(f"检测到{browser_name}驱动版本: {driver_version}")
             
             # 比较主版本号
-            edge_main_version = edge_version.split('.')[0]
+            browser_main_version = browser_version.split('.')[0]
             driver_main_version = driver_version.split('.')[0]
             
-            if edge_main_version != driver_main_version:
-                utils.log(f"版本不兼容: Edge主版本 {edge_main_version}, 驱动主版本 {driver_main_version}")
-                utils.log("正在打开官网下载对应版本驱动...")
-                download_driver = webdriver.Edge(service=Service(executable_path=driver_path))
-                download_driver.get("https://developer.microsoft.com/zh-cn/microsoft-edge/tools/webdriver/")
+            if browser_main_version != driver_main_version:
+                utils.log(f"版本不兼容: {browser_name}主版本 {browser_main_version}, 驱动主版本 {driver_main_version}")
+                utils.log(_driver_download_hint(browser))
                 return False
             else:
-                utils.log("Edge浏览器与驱动版本兼容（主版本号一致）")
+                utils.log(f"{browser_name}浏览器与驱动版本兼容（主版本号一致）")
                 return True
                 
         except Exception as e:
             utils.log(f"驱动版本检测失败: {str(e)}（可能是驱动损坏或路径错误）")
-            utils.log("建议手动下载对应版本驱动: https://developer.microsoft.com/zh-cn/microsoft-edge/tools/webdriver/")
+            utils.log(_driver_download_hint(browser))
             return False
             
     except Exception as e:
         utils.log(f"兼容性检测异常: {str(e)}")
         return True
 
+def save_login_screenshot(driver, path):
+    """保存当前页面截图（无界面服务器上用于扫码登录），成功返回True"""
+    try:
+        data = driver.execute_cdp_cmd("Page.captureScreenshot", {"format": "png"}).get("data")
+        with open(path, "wb") as f:
+            f.write(base64.b64decode(data))
+        return True
+    except Exception as e:
+        utils.log(f"[浏览器模块] 保存页面截图失败: {str(e)}")
+        return False
+
+SELF_TEST_PAGE = "data:text/html,<html><body><div id='app'><section>self-test</section></div></body></html>"
+
+def run_self_test(lean=True, backend=None):
+    """启动自检：启动一次浏览器并检查脚本执行、CDP命令与性能日志，统计启动耗时与资源占用
+
+    返回(是否通过, 结果行列表)；按空闲内存估算本机可同时运行的监控数量。backend指定自检使用的后端
+    （不修改全局设置，可在监控运行时从其他线程调用），默认使用set_browser_backend设置的后端
+    """
+    lines = []
+    browser = find_browser()
+    backend = _resolve_backend(backend) if backend else _backend_settings["backend"]
+    lines.append(f"浏览器后端: {BROWSER_BACKENDS[backend]} | 桌面会话: {'有' if has_display() else '无（以无界面方式运行）'}")
+    lines.append(f"浏览器: {browser['browser_path'] or '默认安装位置'} | 驱动: {browser['driver_path'] or '未找到'}")
+    start = time.time()
+    driver = init_browser(lean=lean, backend=backend)
+    if not driver:
+        lines.append("[失败] 浏览器无法启动")
+        return False, lines
+    ok = True
+    try:
+        lines.append(f"[通过] 浏览器启动耗时{time.time() - start:.1f}秒")
+        driver.get(SELF_TEST_PAGE)
+        if driver.execute_script("return document.getElementById('app') ? 1 : 0") == 1:
+            lines.append("[通过] 页面脚本执行")
+        else:
+            ok = False
+            lines.append("[失败] 页面脚本执行结果异常")
+        if enable_cdp_network(driver):
+            lines.append("[通过] CDP命令")
+        else:
+            ok = False
+            lines.append("[失败] CDP命令不可用（WebSocket推送/接口拦截检测方式无法使用）")
+        try:
+            driver.get_log("performance")
+            lines.append("[通过] 性能日志读取")
+        except Exception as e:
+            ok = False
+            lines.append(f"[失败] 性能日志读取: {str(e)}")
+        sample = resource_manager.sample_browser(driver)
+        lines.append(f"[信息] 单个浏览器资源占用: {resource_manager.ResourceReport.describe(sample)}")
+        if resource_manager.PSUTIL_AVAILABLE and sample["rss_mb"]:
+            available_mb = resource_manager.psutil.virtual_memory().available / 1048576
+            lines.append(f"[信息] 当前空闲内存{available_mb:.0f}MB，按空载占用估算约可同时运行{int(available_mb // sample['rss_mb'])}个监控（上课时页面内存会增长，请留出余量）")
+    except Exception as e:
+        ok = False
+        lines.append(f"[失败] 自检过程中出错: {str(e)}")
+    finally:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+    return ok, lines
+
+# 对话框处理方式：cdp=订阅Page.javascriptDialogOpening并立即应答（不等待），wait=等待弹窗出现（最多3秒）
+_dialog_settings = {"mode": "wait", "neutralize_beforeunload": False}
+_dialog_ready = weakref.WeakKeyDictionary()  # 已完成对话框处理初始化的driver
+
+# 屏蔽页面的onbeforeunload，刷新/离开页面时不再弹出“离开此网站”提示
+BEFOREUNLOAD_NEUTRALIZER_JS = r"""
+(function () {
+    if (window.__yktNoUnload) { return; }
+    window.__yktNoUnload = true;
+    window.addEventListener('beforeunload', function (e) { e.stopImmediatePropagation(); }, true);
+    try {
+        Object.defineProperty(window, 'onbeforeunload', {
+            configurable: true, get: function () { return null; }, set: function () {}
+        });
+    } catch (e) {}
+})();
+"""
+
+def set_dialog_handling(mode, neutralize_beforeunload=True):
+    """设置对话框处理方式（对之后所有driver生效，重连后的新实例会自动初始化）"""
+    _dialog_settings["mode"] = mode if mode in ("cdp", "wait") else "wait"
+    _dialog_settings["neutralize_beforeunload"] = neutralize_beforeunload
+    utils.log(f"[浏览器模块] 对话框处理方式: {_dialog_settings['mode']}（屏蔽离开提示: {'是' if neutralize_beforeunload else '否'}）")
+
+def _log_dialog(text):
+    alert_text = (text or "").strip().lower()
+    if any(keyword in alert_text for keyword in ["离开此页", "放弃更改", "未保存"]):
+        utils.log("检测到'离开页面'对话框，自动确认...")
+    elif any(keyword in alert_text for keyword in ["刷新", "重新加载"]):
+        utils.log("检测到'刷新确认'对话框，自动确认...")
+    elif any(keyword in alert_text for keyword in ["确定", "确认"]):
+        utils.log("检测到通用确认对话框，自动确认...")
+    else:
+        utils.log(f"检测到未知对话框（内容：{text}），自动确认...")
+
+def _prepare_cdp_dialogs(driver):
+    """开启Page域事件，并按设置注入onbeforeunload屏蔽脚本（每个driver执行一次）"""
+    if driver in _dialog_ready:
+        return
+    try:
+        driver.execute_cdp_cmd("Page.enable", {})
+        if _dialog_settings["neutralize_beforeunload"]:
+            driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": BEFOREUNLOAD_NEUTRALIZER_JS})
+            driver.execute_script(BEFOREUNLOAD_NEUTRALIZER_JS)
+        utils.log("[浏览器模块] 已开启CDP对话框监听")
+    except Exception as e:
+        utils.log(f"[浏览器模块] 开启CDP对话框监听失败: {str(e)}")
+    _dialog_ready[driver] = True
+
+def _handle_dialogs_cdp(driver):
+    """应答已打开的对话框，无对话框时立即返回"""
+    _prepare_cdp_dialogs(driver)
+    handled = False
+    pump = get_cdp_pump(driver)
+    pump.poll()
+    for params in pump.pop("Page.javascriptDialogOpening"):
+        _log_dialog(params.get("message"))
+        try:
+            driver.execute_cdp_cmd("Page.handleJavaScriptDialog", {"accept": True})
+            handled = True
+        except Exception:
+            # 对话框可能已被驱动按unhandledPromptBehavior自动确认
+            pass
+    try:
+        alert = driver.switch_to.alert  # 不等待，仅检查当前是否仍有对话框
+        _log_dialog(alert.text)
+        alert.accept()
+        handled = True
+    except NoAlertPresentException:
+        pass
+    return handled
+
 def handle_all_alerts(driver):
     """处理刷新确认和离开网站提示对话框"""
     try:
         if not driver:
             return False
+        if _dialog_settings["mode"] == "cdp" or getattr(driver, "native_dialogs", False):
+            # Playwright后端的对话框在出现时已确认，只需读取记录，无需等待
+            return _handle_dialogs_cdp(driver)
             
         alert = WebDriverWait(driver, 3).until(EC.alert_is_present())
-        alert_text = alert.text.strip().lower()
-        if any(keyword in alert_text for keyword in ["离开此页", "放弃更改", "未保存"]):
-            utils.log("检测到'离开页面'对话框，自动确认...")
-        elif any(keyword in alert_text for keyword in ["刷新", "重新加载"]):
-            utils.log("检测到'刷新确认'对话框，自动确认...")
-        elif any(keyword in alert_text for keyword in ["确定", "确认"]):
-            utils.log("检测到通用确认对话框，自动确认...")
-        else:
-            utils.log(f"检测到未知对话框（内容：{alert.text}），自动确认...")
+        _log_dialog(alert.text)
         alert.accept()
         return True
     except TimeoutException:
@@ -168,29 +556,96 @@ def extract_course_id(url):
     utils.log(f"无法从URL中提取课程号（URL：{url[:50]}...）")
     return None
 
+YUKETANG_DOMAINS = ["changjiang.yuketang.cn", "yuketang.cn", "www.yuketang.cn", "pro.yuketang.cn", "huanghe.yuketang.cn"]
+
+# 已固定的课程标签页（driver -> 窗口句柄），之后每个周期直接读取该标签页
+_pinned_tabs = weakref.WeakKeyDictionary()
+
+def is_lesson_url(url):
+    """判断URL是否为雨课堂课程页面"""
+    if not url or "about:blank" in url:
+        return False
+    if "login" in url and "lesson" not in url:
+        return False
+    return any(domain in url for domain in YUKETANG_DOMAINS) and "lesson" in url
+
+def pin_lesson_tab(driver, handle):
+    """固定课程标签页"""
+    _pinned_tabs[driver] = handle
+    utils.log(f"[浏览器模块] 已固定课程标签页: {handle}")
+
+def get_pinned_tab(driver):
+    """返回已固定的课程标签页句柄（未固定时为None）"""
+    return _pinned_tabs.get(driver)
+
+def _read_pinned_tab(driver):
+    """读取已固定标签页的URL；标签页已关闭或离开课程页时取消固定并返回None"""
+    handle = _pinned_tabs.get(driver)
+    if not handle:
+        return None
+    try:
+        # 监控期间只会切换到固定的标签页，无需每次确认当前窗口
+        current_url = driver.current_url
+        if is_lesson_url(current_url):
+            return current_url
+        utils.log(f"[浏览器模块] 固定的标签页已离开课程页面（{current_url[:50]}），重新查找")
+    except NoSuchWindowException:
+        utils.log("[浏览器模块] 固定的课程标签页已关闭，重新查找")
+    _pinned_tabs.pop(driver, None)
+    return None
+
+def _find_lesson_target(driver):
+    """通过CDP Target.getTargets一次读取所有标签页URL（无需逐个切换窗口），返回(句柄, URL)"""
+    try:
+        targets = driver.execute_cdp_cmd("Target.getTargets", {}).get("targetInfos", [])
+    except Exception as e:
+        utils.log(f"[浏览器模块] 读取CDP标签页列表失败: {str(e)}（改为逐个窗口查找）")
+        return None, None
+    
+    handles = driver.window_handles
+    for target in targets:
+        if target.get("type") != "page" or not is_lesson_url(target.get("url")):
+            continue
+        target_id = target.get("targetId", "")
+        # 驱动的窗口句柄即CDP targetId（部分版本带有前缀）
+        handle = next((h for h in handles if h == target_id or h.endswith(target_id)), None)
+        if handle:
+            return handle, target["url"]
+    return None, None
+
 def get_active_tab_url(driver):
-    """获取当前活动标签页的URL"""
+    """获取当前活动标签页的URL（优先读取已固定的课程标签页）"""
     try:
         if not driver:
             utils.log("driver实例无效，无法获取URL")
             return None
+        
+        pinned_url = _read_pinned_tab(driver)
+        if pinned_url:
+            return pinned_url
+        
+        # 固定的标签页不存在：通过CDP查找课程标签页并固定
+        handle, target_url = _find_lesson_target(driver)
+        if handle:
+            driver.switch_to.window(handle)
+            pin_lesson_tab(driver, handle)
+            utils.log(f"在窗口 {handle} 找到雨课堂课程页面: {target_url}")
+            return driver.current_url
             
         window_handles = driver.window_handles
         if not window_handles:
             utils.log("没有找到浏览器窗口（可能已关闭）")
             return None
             
-        yuketang_domains = ["changjiang.yuketang.cn", "yuketang.cn", "www.yuketang.cn", "pro.yuketang.cn", "huanghe.yuketang.cn"]
         target_url = None
         
         for handle in window_handles:
             try:
                 driver.switch_to.window(handle)
                 current_url = driver.current_url
-                if "about:blank" in current_url or "login" in current_url and "lesson" not in current_url:
-                    continue
-                if any(domain in current_url for domain in yuketang_domains) and "lesson" in current_url:
+                if is_lesson_url(current_url):
                     target_url = current_url
+                    pin_lesson_tab(driver, handle)
                     utils.log(f"在窗口 {handle} 找到雨课堂课程页面: {target_url}")
                     break
             except Exception as e:
@@ -216,15 +671,19 @@ def get_active_tab_url(driver):
         utils.log(f"获取活动窗口URL失败: {str(e)}")
         return None
 
-def reconnect_browser(course_url):
-    """重新连接浏览器并导航到课程页面"""
+def reconnect_browser(course_url, profile_dir=None, cookie_path=None, interactive=True, lean=False):
+    """重新连接浏览器并导航到课程页面
+
+    优先使用课程专属用户数据目录中保留的登录状态，其次恢复Cookie快照；
+    仍需登录时，interactive=True在控制台等待扫码，否则（图形界面/无界面浏览器）放弃本次重连
+    """
     utils.log("开始尝试重新连接浏览器...")
     reconnect_delay = 3
     
     for attempt in range(3):
         utils.log(f"重连尝试 {attempt+1}/3（失败后等待{reconnect_delay}秒）")
         
-        driver = init_browser()
+        driver = init_browser(profile_dir, lean)
         if not driver:
             utils.log(f"第{attempt+1}次重连失败：无法初始化浏览器")
             time.sleep(reconnect_delay)
@@ -233,18 +692,25 @@ def reconnect_browser(course_url):
         
         try:
             utils.log(f"导航到课程页面: {course_url[:50]}...")
-            driver.get(course_url)
-            time.sleep(4)
+            wait_manager.navigate(driver, course_url, require_app=False, label="重连导航")
             
             current_url = driver.current_url
             if "lesson" in current_url or "fullscreen" in current_url:
                 utils.log("浏览器重连成功，已导航到课程页面")
                 return driver
             elif "login" in current_url:
+                if restore_cookie_snapshot(driver, cookie_path, course_url):
+                    wait_manager.navigate(driver, course_url, label="恢复登录后导航")
+                    if "lesson" in driver.current_url:
+                        utils.log("已通过Cookie快照恢复登录状态，浏览器重连成功")
+                        return driver
+                if not interactive or lean:
+                    utils.log(f"重连后需要重新扫码登录，当前为{'无界面浏览器' if lean else '非交互模式'}，放弃重连")
+                    driver.quit()
+                    return None
                 utils.log("重连后需要登录，等待用户扫码...")
                 input("[重新登录] 请在浏览器中完成扫码登录，登录后按回车键继续...")
-                driver.get(course_url)
-                time.sleep(3)
+                wait_manager.navigate(driver, course_url, label="重连登录后导航")
                 if "lesson" in driver.current_url:
                     utils.log("用户登录完成，浏览器重连成功")
                     return driver
@@ -277,11 +743,422 @@ def locate_page_element(driver, page_type, xpath_config):
             return None
         
         utils.log(f"[浏览器模块] 定位{page_type}元素 (XPath: {target_xpath[:50]}...)")
-        base_element = WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.XPATH, target_xpath))
-        )
+        if hasattr(driver, "wait_for_xpath"):
+            # Playwright后端：在浏览器内等待元素出现，不再每0.5秒往返查询
+            base_element = driver.wait_for_xpath(target_xpath, 15)
+            if not base_element:
+                utils.log(f"[浏览器模块] {page_type}元素定位超时")
+                return None
+        else:
+            base_element = WebDriverWait(driver, 15).until(
+                EC.presence_of_element_located((By.XPATH, target_xpath))
+            )
         utils.log(f"[浏览器模块] {page_type}元素定位成功")
         return base_element
     except Exception as e:
         utils.log(f"[浏览器模块] {page_type}元素定位异常: {str(e)}")
         return None
+
+# -------------------------- 页面内监听脚本（事件驱动检测） --------------------------
+# 注入后劫持 history.pushState/replaceState 与 popstate，并用 MutationObserver 监听
+# #app 下的幻灯片区域；路由或幻灯片图片变化时写入事件队列，供 execute_async_script 长轮询
+PAGE_WATCHER_JS = r"""
+(function () {
+    if (window.__yktWatcher) { return true; }
+    var w = window.__yktWatcher = {
+        events: [], waiters: [], lastUrl: location.href,
+        lastSlide: '', lastMutation: Date.now(), timer: null
+    };
+    function slideSignature() {
+        var root = document.getElementById('app');
+        if (!root) { return ''; }
+        var imgs = root.querySelectorAll('img');
+        var srcs = [];
+        for (var i = 0; i < imgs.length; i++) {
+            srcs.push(imgs[i].getAttribute('src') || imgs[i].getAttribute('data-src') || '');
+        }
+        return srcs.join('|');
+    }
+    function emit(reason) {
+        w.events.push({reason: reason, url: location.href, ts: Date.now()});
+        if (w.events.length > 50) { w.events.splice(0, w.events.length - 50); }
+        var waiters = w.waiters.splice(0);
+        for (var i = 0; i < waiters.length; i++) { waiters[i](); }
+    }
+    function checkRoute(reason) {
+        if (location.href !== w.lastUrl) {
+            w.lastUrl = location.href;
+            emit(reason);
+        }
+    }
+    ['pushState', 'replaceState'].forEach(function (name) {
+        var original = history[name];
+        history[name] = function () {
+            var result = original.apply(this, arguments);
+            checkRoute(name);
+            return result;
+        };
+    });
+    window.addEventListener('popstate', function () { checkRoute('popstate'); });
+    window.addEventListener('hashchange', function () { checkRoute('hashchange'); });
+    w.lastSlide = slideSignature();
+    var observer = new MutationObserver(function () {
+        w.lastMutation = Date.now();
+        if (w.timer) { return; }
+        // 合并短时间内的大量DOM变更，避免频繁计算图片签名
+        w.timer = setTimeout(function () {
+            w.timer = null;
+            checkRoute('mutation');
+            var signature = slideSignature();
+            if (signature !== w.lastSlide) {
+                w.lastSlide = signature;
+                emit('slide');
+            }
+        }, 150);
+    });
+    observer.observe(document.getElementById('app') || document.body,
+                     {childList: true, subtree: true, attributes: true, attributeFilter: ['src']});
+    return true;
+})();
+"""
+
+PAGE_WATCHER_WAIT_JS = r"""
+var timeoutMs = arguments[0];
+var done = arguments[arguments.length - 1];
+var w = window.__yktWatcher;
+if (!w) { done(null); return; }
+if (w.events.length) { done(w.events.splice(0)); return; }
+if (timeoutMs <= 0) { done([]); return; }
+var finish = null;
+var timer = setTimeout(function () {
+    w.waiters = w.waiters.filter(function (f) { return f !== finish; });
+    done([]);
+}, timeoutMs);
+finish = function () { clearTimeout(timer); done(w.events.splice(0)); };
+w.waiters.push(finish);
+"""
+
+def inject_page_watcher(driver):
+    """向当前课程页面注入路由/幻灯片监听脚本（重复注入无副作用）"""
+    try:
+        if not driver:
+            return False
+        driver.execute_script(PAGE_WATCHER_JS)
+        utils.log("[浏览器模块] 页面监听脚本注入成功")
+        return True
+    except Exception as e:
+        utils.log(f"[浏览器模块] 页面监听脚本注入失败: {str(e)}")
+        return False
+
+def wait_page_watcher_events(driver, timeout):
+    """长轮询页面监听脚本，最多等待timeout秒；返回事件列表，脚本丢失（如页面重载）时返回None"""
+    try:
+        timeout_ms = max(0, int(timeout * 1000))
+        driver.set_script_timeout(timeout + 5)
+        return driver.execute_async_script(PAGE_WATCHER_WAIT_JS, timeout_ms)
+    except InvalidSessionIdException:
+        raise
+    except Exception as e:
+        utils.log(f"[浏览器模块] 页面监听长轮询失败: {str(e)}")
+        return None
+
+# -------------------------- CDP事件读取（基于性能日志） --------------------------
+class CdpEventPump:
+    """读取驱动性能日志中的CDP事件，按方法名缓存，供多个检测器共享消费"""
+
+    def __init__(self, driver, max_events=500):
+        self.driver = driver
+        self.max_events = max_events
+        self.events = {}  # key: CDP方法名, value: 事件参数队列
+
+    def poll(self):
+        """拉取性能日志中的新事件，返回本次读取的条数"""
+        try:
+            entries = self.driver.get_log("performance")
+        except InvalidSessionIdException:
+            raise
+        except Exception as e:
+            utils.log(f"[浏览器模块] 读取性能日志失败: {str(e)}")
+            return 0
+        
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError, TypeError):
+                continue
+            method = message.get("method")
+            if not method:
+                continue
+            queue = self.events.setdefault(method, deque(maxlen=self.max_events))
+            params = message.get("params", {})
+            params["_ts"] = entry.get("timestamp", time.time() * 1000) / 1000.0  # 浏览器记录事件的时间（秒）
+            queue.append(params)
+        return len(entries)
+
+    def pop(self, method):
+        """取出并清空指定方法的已缓存事件"""
+        queue = self.events.get(method)
+        if not queue:
+            return []
+        items = list(queue)
+        queue.clear()
+        return items
+
+_cdp_pumps = weakref.WeakKeyDictionary()
+
+def get_cdp_pump(driver):
+    """获取driver对应的CDP事件读取器（每个driver一个实例）"""
+    pump = _cdp_pumps.get(driver)
+    if pump is None:
+        pump = CdpEventPump(driver)
+        _cdp_pumps[driver] = pump
+    return pump
+
+def enable_cdp_network(driver):
+    """开启CDP Network域（WebSocket帧、响应事件会写入性能日志）"""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        return True
+    except Exception as e:
+        utils.log(f"[浏览器模块] 开启CDP网络监听失败: {str(e)}")
+        return False
+
+# -------------------------- 页面存活探测（按需刷新） --------------------------
+# 在文档创建时注入：记录WebSocket连接状态、最近一次收到消息与DOM变更的时间
+PAGE_INSTRUMENT_JS = r"""
+(function () {
+    if (window.__yktHealth) { return; }
+    var h = window.__yktHealth = {sockets: [], lastMessage: 0, lastMutation: Date.now(), installedAt: Date.now()};
+    var NativeWebSocket = window.WebSocket;
+    if (NativeWebSocket) {
+        var Hooked = function (url, protocols) {
+            var ws = protocols === undefined ? new NativeWebSocket(url) : new NativeWebSocket(url, protocols);
+            h.sockets.push(ws);
+            ws.addEventListener('message', function () { h.lastMessage = Date.now(); });
+            return ws;
+        };
+        Hooked.prototype = NativeWebSocket.prototype;
+        ['CONNECTING', 'OPEN', 'CLOSING', 'CLOSED'].forEach(function (k) { Hooked[k] = NativeWebSocket[k]; });
+        window.WebSocket = Hooked;
+    }
+    function observe() {
+        new MutationObserver(function () { h.lastMutation = Date.now(); })
+            .observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+    }
+    if (document.documentElement) { observe(); } else { document.addEventListener('DOMContentLoaded', observe); }
+})();
+"""
+
+PAGE_HEALTH_JS = r"""
+var h = window.__yktHealth;
+var app = document.getElementById('app');
+var now = Date.now();
+var result = {
+    ready_state: document.readyState,
+    app_mounted: !!(app && app.children.length),
+    instrumented: !!h,
+    online: navigator.onLine,
+    socket_count: 0, socket_open: null, message_age: null, dom_idle: null
+};
+if (h) {
+    var open = h.sockets.filter(function (ws) { return ws.readyState === 1; }).length;
+    result.socket_count = h.sockets.length;
+    result.socket_open = h.sockets.length ? open > 0 : null;
+    result.message_age = h.lastMessage ? (now - h.lastMessage) / 1000 : null;
+    result.dom_idle = (now - h.lastMutation) / 1000;
+}
+return result;
+"""
+
+def install_page_instrumentation(driver):
+    """注册文档创建时执行的存活探测脚本，并立即在当前页面执行一次"""
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": PAGE_INSTRUMENT_JS})
+        driver.execute_script(PAGE_INSTRUMENT_JS)
+        return True
+    except Exception as e:
+        utils.log(f"[浏览器模块] 注入页面存活探测脚本失败: {str(e)}")
+        return False
+
+def probe_page_health(driver):
+    """一次脚本调用读取页面存活状态，失败时返回None"""
+    try:
+        return driver.execute_script(PAGE_HEALTH_JS)
+    except InvalidSessionIdException:
+        raise
+    except Exception as e:
+        utils.log(f"[浏览器模块] 页面存活探测失败: {str(e)}")
+        return None
+
+def check_page_stale(health, max_idle):
+    """根据存活探测结果判断页面是否需要刷新，返回(是否过期, 原因)"""
+    if not health:
+        return True, "探测失败"
+    if health.get("ready_state") != "complete":
+        return True, f"页面未加载完成({health.get('ready_state')})"
+    if not health.get("app_mounted"):
+        return True, "课程应用未挂载"
+    if not health.get("instrumented"):
+        return True, "缺少存活探测脚本"
+    if health.get("socket_open") is False:
+        return True, "WebSocket连接已断开"
+    
+    dom_idle = health.get("dom_idle") or 0
+    message_age = health.get("message_age")
+    if health.get("socket_open") is None and dom_idle > max_idle:
+        return True, f"无WebSocket连接且页面{dom_idle:.0f}秒无更新"
+    if message_age is not None and message_age > max_idle and dom_idle > max_idle:
+        return True, f"已{message_age:.0f}秒未收到推送且页面无更新"
+    return False, "页面存活"
+
+
+class RefreshPolicy:
+    """刷新策略：always=每个周期刷新（原有行为），stale=仅在页面失活时刷新"""
+
+    def __init__(self, policy="stale", max_idle=120):
+        self.policy = policy
+        self.max_idle = max_idle
+        self._instrumented = weakref.WeakKeyDictionary()  # 已注册探测脚本的driver
+
+    def should_reload(self, driver):
+        """判断本周期是否需要刷新页面"""
+        if self.policy == "always":
+            return True
+        if driver not in self._instrumented:
+            # 新的浏览器实例：注册探测脚本后刷新一次，使脚本在文档创建时生效
+            self._instrumented[driver] = install_page_instrumentation(driver)
+            utils.log("[浏览器模块] 已注册页面存活探测脚本，本周期刷新页面")
+            return True
+        stale, reason = check_page_stale(probe_page_health(driver), self.max_idle)
+        utils.log(f"[浏览器模块] 页面存活探测: {reason}（{'需要刷新' if stale else '跳过刷新'}）")
+        return stale
+
+# -------------------------- 单次往返的周期探测脚本 --------------------------
+# 一次execute_script返回本周期所需的全部信息：URL、页面类型与编号、幻灯片区域内所有图片、页面内弹窗状态
+CYCLE_PROBE_JS = r"""
+var xpaths = arguments[0] || {};
+var patterns = arguments[1] || {};
+var url = location.href;
+var pageType = null, pageNumber = null;
+for (var t in patterns) {
+    var m = url.match(new RegExp(patterns[t]));
+    if (m) { pageType = t; pageNumber = m[1]; break; }
+}
+var container = null;
+if (pageType && xpaths[pageType]) {
+    try {
+        container = document.evaluate(xpaths[pageType], document, null,
+                                      XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    } catch (e) { container = null; }
+}
+var root = container || document.getElementById('app') || document.body;
+var images = [];
+if (root) {
+    var imgs = root.querySelectorAll('img');
+    for (var i = 0; i < imgs.length; i++) {
+        var raw = imgs[i].getAttribute('src') || imgs[i].getAttribute('data-src');
+        if (!raw) { continue; }
+        // 统一解析为绝对地址后再去重（同一图片的相对/绝对写法只上报一次）
+        var src = imgs[i].getAttribute('src') ? imgs[i].src : raw;
+        try { src = new URL(src, document.baseURI).href; } catch (e) {}
+        if (images.indexOf(src) < 0) { images.push(src); }
+    }
+}
+var fingerprint = null;
+if (container) {
+    // 幻灯片区域指纹：去掉易变属性、倒计时与作答状态后的outerHTML + 图片地址（不含查询参数），在页面内哈希后只回传摘要
+    // 题目页作答过程中原地变化的内容（提交按钮、已提交/已截止提示、公布的答案、提交人数）不计入指纹
+    var clone = container.cloneNode(true);
+    var volatileNodes = clone.querySelectorAll('script, style, button, [class*="timer"], [class*="countdown"], [class*="time-left"], [class*="remain"], ' +
+        '[class*="submit"], [class*="answer"], [class*="result"], [class*="status"], [class*="analysis"], [class*="count"], [class*="tip"]');
+    for (var v = 0; v < volatileNodes.length; v++) {
+        if (volatileNodes[v].parentNode) { volatileNodes[v].parentNode.removeChild(volatileNodes[v]); }
+    }
+    var walker = document.createTreeWalker(clone, NodeFilter.SHOW_TEXT, null, false);
+    var statusText = /提交|已作答|已截止|作答已结束|已结束作答|已收卷|答题结束|正确答案|答案解析|参考答案|\d+\s*人/;
+    while (walker.nextNode()) {
+        if (statusText.test(walker.currentNode.nodeValue)) { walker.currentNode.nodeValue = ''; }
+    }
+    var nodes = [clone].concat(Array.prototype.slice.call(clone.querySelectorAll('*')));
+    for (var n = 0; n < nodes.length; n++) {
+        for (var a = nodes[n].attributes.length - 1; a >= 0; a--) {
+            var attr = nodes[n].attributes[a].name;
+            if (/^(style|class|id|tabindex|src|data-src|srcset|data-v-.*|aria-.*|data-time.*|data-ts)$/.test(attr)) {
+                nodes[n].removeAttribute(attr);
+            }
+        }
+    }
+    var normalized = clone.outerHTML.replace(/\s+/g, ' ') + '|' + images.map(function (s) { return s.split('?')[0]; }).join('|');
+    var h1 = 0x811c9dc5, h2 = 0x01000193 ^ normalized.length;
+    for (var c = 0; c < normalized.length; c++) {
+        var code = normalized.charCodeAt(c);
+        h1 = Math.imul(h1 ^ code, 0x01000193);
+        h2 = Math.imul(h2 ^ code, 0x5bd1e995);
+    }
+    fingerprint = ('0000000' + (h1 >>> 0).toString(16)).slice(-8) + ('0000000' + (h2 >>> 0).toString(16)).slice(-8);
+}
+var dialog = {open: false, text: ''};
+var candidates = document.querySelectorAll('.el-message-box__wrapper, .el-dialog__wrapper, [role="dialog"]');
+for (var j = 0; j < candidates.length; j++) {
+    var el = candidates[j];
+    var style = window.getComputedStyle(el);
+    if (style.display !== 'none' && style.visibility !== 'hidden' && el.offsetParent !== null) {
+        dialog = {open: true, text: (el.innerText || '').trim().slice(0, 200)};
+        break;
+    }
+}
+var problem = null;
+if (pageType && pageType !== 'ppt') {
+    // 题目页状态：倒计时剩余秒数、可提交按钮、已提交/已截止/公布答案提示
+    var scope = document.getElementById('app') || document.body;
+    var text = scope ? (scope.innerText || '') : '';
+    var countdown = null;
+    var timers = scope ? scope.querySelectorAll('[class*="timer"], [class*="countdown"], [class*="time-left"], [class*="remain"]') : [];
+    for (var k = 0; k < timers.length; k++) {
+        var tm = (timers[k].innerText || '').match(/(\d{1,2}):(\d{2})/);
+        if (tm) { countdown = parseInt(tm[1], 10) * 60 + parseInt(tm[2], 10); break; }
+    }
+    var canSubmit = false;
+    var buttons = scope ? scope.querySelectorAll('button, [class*="submit"]') : [];
+    for (var b = 0; b < buttons.length; b++) {
+        if (/提交/.test(buttons[b].innerText || '') && !buttons[b].disabled) { canSubmit = true; break; }
+    }
+    problem = {
+        countdown: countdown,
+        can_submit: canSubmit,
+        submitted: /已提交|提交成功|已作答/.test(text),
+        closed: /已截止|作答已结束|已结束作答|已收卷|答题结束/.test(text),
+        revealed: /正确答案|答案解析|参考答案/.test(text)
+    };
+}
+return {
+    url: url,
+    title: document.title,
+    ready_state: document.readyState,
+    page_type: pageType,
+    page_number: pageNumber,
+    container_found: !!container,
+    region: container ? (function (r) {
+        return {x: r.left + window.scrollX, y: r.top + window.scrollY, width: r.width, height: r.height};
+    })(container.getBoundingClientRect()) : null,
+    images: images,
+    fingerprint: fingerprint,
+    dialog: dialog,
+    problem: problem
+};
+"""
+
+def probe_cycle(driver, xpath_config, page_patterns):
+    """执行周期探测脚本；遇到原生弹窗时先处理再重试一次，失败返回None"""
+    for attempt in range(2):
+        try:
+            return driver.execute_script(CYCLE_PROBE_JS, xpath_config or {}, page_patterns or {})
+        except UnexpectedAlertPresentException:
+            utils.log("[浏览器模块] 周期探测时遇到原生弹窗，处理后重试")
+            handle_all_alerts(driver)
+        except InvalidSessionIdException:
+            raise
+        except Exception as e:
+            utils.log(f"[浏览器模块] 周期探测失败: {str(e)}")
+            return None
+    return None
@@ -0,0 +1,157 @@
+import re
+import json
+import browser_manager
+import utils  # 导入通用工具模块
+from selenium.webdriver.common.by import By
+
+# 可选的题目图片获取方式（配置项 [Capture] mode）
+CAPTURE_MODES = {
+    "xpath": "XPath定位页面元素",
+    "network": "拦截课件/题目接口数据"
+}
+
+# 课程页加载课件、题目数据的接口（匹配请求URL）
+LESSON_API_PATTERNS = [
+    r"/api/v3/lesson/basic-info",
+    r"/api/v3/lesson/presentation/fetch",
+    r"/api/v3/lesson/problem/",
+    r"/api/v3/lesson/slide",
+    r"/v/lesson/get_presentation"
+]
+
+# 雨课堂题目类型（problemType）-> 页面类型
+PROBLEM_TYPE_MAP = {
+    1: "exercise",    # 单选题
+    2: "exercise",    # 多选题
+    3: "exercise",    # 投票题
+    4: "blank",       # 填空题
+    5: "subjective"   # 主观题
+}
+
+
+class LessonPayloadCache:
+    """缓存课程页已加载的课件/题目JSON，按页码和页面ID索引幻灯片信息"""
+
+    def __init__(self):
+        self.slides_by_index = {}  # key: 页码(str), value: 幻灯片信息
+        self.slides_by_id = {}     # key: 幻灯片ID(str), value: 幻灯片信息
+        self.pending = {}          # key: requestId, value: 请求URL（等待加载完成后读取响应体）
+        self.lesson_start = None   # 上课时间（课程基本信息接口的startTime）
+
+    def prepare(self, driver):
+        """开启CDP网络监听（接口响应会写入性能日志）"""
+        return browser_manager.enable_cdp_network(driver)
+
+    def ingest(self, driver):
+        """读取新到达的课件/题目接口响应并更新缓存，返回新解析的幻灯片数"""
+        pump = browser_manager.get_cdp_pump(driver)
+        pump.poll()
+        for params in pump.pop("Network.responseReceived"):
+            url = params.get("response", {}).get("url", "")
+            if any(re.search(pattern, url) for pattern in LESSON_API_PATTERNS):
+                self.pending[params.get("requestId")] = url
+
+        added = 0
+        for params in pump.pop("Network.loadingFinished"):
+            request_id = params.get("requestId")
+            url = self.pending.pop(request_id, None)
+            if not url:
+                continue
+            try:
+                result = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+                added += self.ingest_payload(json.loads(result.get("body") or "{}"))
+            except Exception as e:
+                utils.log(f"[采集模块] 读取接口响应失败（{url[:80]}）: {str(e)}")
+        if added:
+            utils.log(f"[采集模块] 从课件数据中解析到{added}个页面")
+        return added
+
+    def ingest_payload(self, payload):
+        """解析课件/题目JSON（兼容 data.slides 列表与单个题目对象）"""
+        data = payload.get("data", payload) if isinstance(payload, dict) else {}
+        if not isinstance(data, dict):
+            return 0
+        if data.get("startTime") and "slides" not in data:
+            self.lesson_start = data["startTime"]  # 课程基本信息（不含幻灯片）
+        slides = data.get("slides")
+        if not isinstance(slides, list):
+            slides = [data] if ("problem" in data or "problemId" in data) else []
+
+        added = 0
+        for position, slide in enumerate(slides, 1):
+            if not isinstance(slide, dict):
+                continue
+            info = self._parse_slide(slide, position)
+            if info["page_id"]:
+                self.slides_by_id[info["page_id"]] = info
+            if info["index"]:
+                self.slides_by_index[info["index"]] = info
+            added += 1
+        return added
+
+    def _parse_slide(self, slide, position):
+        problem = slide.get("problem") or {}
+        if "problemId" in slide and not problem:
+            problem = slide
+        problem_type = problem.get("problemType") or problem.get("type")
+        try:
+            problem_type = int(problem_type) if problem_type is not None else None
+        except (TypeError, ValueError):
+            problem_type = None
+
+        return {
+            "index": str(slide.get("index") or position),
+            "page_id": str(slide.get("id") or slide.get("sid") or problem.get("problemId") or ""),
+            "page_type": PROBLEM_TYPE_MAP.get(problem_type, "ppt") if problem else "ppt",
+            "problem_type": problem_type,
+            "problem_id": problem.get("problemId"),
+            "image_url": slide.get("cover") or slide.get("thumbnail") or problem.get("cover") or ""
+        }
+
+    def lookup(self, page_type, page_number):
+        """按页码/页面ID查询幻灯片信息，未缓存时返回None"""
+        page_number = str(page_number)
+        info = self.slides_by_index.get(page_number) or self.slides_by_id.get(page_number)
+        if info and info["page_type"] != page_type:
+            utils.log(f"[采集模块] 接口数据中的页面类型({info['page_type']})与URL({page_type})不一致，以URL为准")
+        return info
+
+
+def locate_image_src(driver, page_type, xpath_config):
+    """按XPath定位页面元素并读取第一张图片地址（原有方式）"""
+    base_element = browser_manager.locate_page_element(driver, page_type, xpath_config)
+    if not base_element:
+        return None
+    img_elements = base_element.find_elements(By.TAG_NAME, "img")
+    if not img_elements:
+        return None
+    return img_elements[0].get_attribute("src") or img_elements[0].get_attribute("data-src")
+
+
+def get_page_image_src(driver, page_type, page_number, xpath_config, payload_cache=None, snapshot=None):
+    """获取页面题目图片地址：依次使用已拦截的接口数据、周期探测中的图片，均未命中时回退到XPath定位"""
+    if payload_cache is not None:
+        try:
+            payload_cache.ingest(driver)
+            info = payload_cache.lookup(page_type, page_number)
+            if info and info["image_url"]:
+                utils.log(f"[采集模块] 接口数据命中: {page_type} {page_number}（题型={info['problem_type']}, 页面ID={info['page_id']}）")
+                return info["image_url"]
+            utils.log(f"[采集模块] 接口数据未命中{page_type} {page_number}")
+        except Exception as e:
+            utils.log(f"[采集模块] 接口数据解析异常: {str(e)}")
+    if (snapshot and snapshot.get("page_number") == str(page_number)
+            and snapshot.get("container_found") and snapshot.get("images")):
+        # 周期探测已在同一次脚本调用中读取了幻灯片区域的图片，无需再定位元素
+        return snapshot["images"][0]
+    utils.log(f"[采集模块] 回退到XPath定位{page_type}页面图片")
+    return locate_image_src(driver, page_type, xpath_config)
+
+
+def create_payload_cache(mode):
+    """根据配置创建接口数据缓存（xpath方式返回None）"""
+    if mode == "network":
+        return LessonPayloadCache()
+    if mode != "xpath":
+        utils.log(f"[采集模块] 未知的图片获取方式: {mode}，使用XPath定位")
+    return None
@@ -12,9 +12,38 @@ def get_default_config():
         "timing": {
             "normal_interval": 20,          # 常规检测间隔（秒）
             "threshold": 60,                # 快速模式阈值（秒）
-            "rapid_interval": 5             # 快速检测间隔（秒）
+            "rapid_interval": 5,            # 快速检测间隔（秒）
+            "scheduler": "fixed"            # 调度方式：fixed=固定间隔, adaptive=按历史出题时间自适应, slides=按课件结构
         },
         "refresh": True,                   # 每次检测前是否刷新页面
+        "refresh_policy": {
+            "policy": "stale",              # 刷新策略：always=每次刷新, stale=仅在页面失活时刷新
+            "max_idle": 120                 # 无推送且无DOM更新超过该秒数视为失活
+        },
+        "detection": {
+            "mode": "url",                  # 检测方式：url=刷新轮询, watcher=页面内监听, cdp_ws=WebSocket推送, http=HTTP轮询, ws=WebSocket直连
+            "fingerprint": False,           # 比对幻灯片区域指纹，识别URL不变的内容更新/重新发布的题目
+            "visual": False,                # 画面变化检测（截图比对，需安装numpy和Pillow）
+            "shadow": ""                    # 影子模式候选检测方式（留空不启用），仅记录检测时间用于对比
+        },
+        "capture": {
+            "mode": "xpath"                 # 题目图片获取方式：xpath=XPath定位, network=拦截接口数据
+        },
+        "dialogs": {
+            "mode": "cdp",                  # 对话框处理方式：cdp=事件监听即时应答, wait=等待弹窗出现（最多3秒）
+            "neutralize_beforeunload": True # 屏蔽页面“离开此网站”提示
+        },
+        "browser": {
+            "backend": "selenium",          # 浏览器后端：selenium=msedgedriver, playwright=Playwright异步驱动（需安装playwright）
+            "profile": "standard",          # 浏览器配置：standard=有窗口, lean=精简无界面（登录后切换，屏蔽统计/字体/视频请求）
+            "standby": False,               # 热备浏览器：预先启动第二个已登录的浏览器，主浏览器失效时立即切换
+            "max_browsers": 2,              # 多账号监控时同时运行的浏览器数上限（超出的申请排队）
+            "contexts_per_browser": 4       # 每个浏览器容纳的账号数（隔离上下文，仅Playwright后端可多于1）
+        },
+        "supervisor": {
+            "heartbeat_timeout": 180,       # 监护进程模式：子进程超过该秒数无心跳视为卡死并重启
+            "memory_limit_mb": 1500         # 监护进程模式：子进程（含浏览器）内存上限MB，超过则重启（0=不限）
+        },
         "wechat": {
             "webhook_url": ""               # 企业微信机器人WebHook地址
         },
@@ -62,10 +91,44 @@ def load_config():
         timing_config = {
             "normal_interval": config_parser.getint("Timing", "normal_interval"),
             "threshold": config_parser.getint("Timing", "threshold"),
-            "rapid_interval": config_parser.getint("Timing", "rapid_interval")
+            "rapid_interval": config_parser.getint("Timing", "rapid_interval"),
+            "scheduler": config_parser.get("Timing", "scheduler", fallback="fixed")
         }
         # 解析刷新配置（布尔转换）
         refresh_config = config_parser.getboolean("Refresh", "enable")
+        refresh_policy_config = {
+            "policy": config_parser.get("Refresh", "policy", fallback="stale"),
+            "max_idle": config_parser.getint("Refresh", "max_idle", fallback=120)
+        }
+        # 解析检测方式配置
+        detection_config = {
+            "mode": config_parser.get("Detection", "mode", fallback="url"),
+            "fingerprint": config_parser.getboolean("Detection", "fingerprint", fallback=False),
+            "visual": config_parser.getboolean("Detection", "visual", fallback=False),
+            "shadow": config_parser.get("Detection", "shadow", fallback="")
+        }
+        # 解析题目图片获取方式配置
+        capture_config = {
+            "mode": config_parser.get("Capture", "mode", fallback="xpath")
+        }
+        # 解析对话框处理配置
+        dialogs_config = {
+            "mode": config_parser.get("Dialogs", "mode", fallback="cdp"),
+            "neutralize_beforeunload": config_parser.getboolean("Dialogs", "neutralize_beforeunload", fallback=True)
+        }
+        # 解析浏览器配置
+        browser_config = {
+            "backend": config_parser.get("Browser", "backend", fallback="selenium"),
+            "profile": config_parser.get("Browser", "profile", fallback="standard"),
+            "standby": config_parser.getboolean("Browser", "standby", fallback=False),
+            "max_browsers": config_parser.getint("Browser", "max_browsers", fallback=2),
+            "contexts_per_browser": config_parser.getint("Browser", "contexts_per_browser", fallback=4)
+        }
+        # 解析监护进程配置
+        supervisor_config = {
+            "heartbeat_timeout": config_parser.getint("Supervisor", "heartbeat_timeout", fallback=180),
+            "memory_limit_mb": config_parser.getint("Supervisor", "memory_limit_mb", fallback=1500)
+        }
         # 解析微信配置
         wechat_config = {
             "webhook_url": config_parser.get("WeChat", "webhook_url", fallback="")
@@ -116,6 +179,12 @@ def load_config():
             "server": server_config,
             "timing": timing_config,
             "refresh": refresh_config,
+            "refresh_policy": refresh_policy_config,
+            "detection": detection_config,
+            "capture": capture_config,
+            "dialogs": dialogs_config,
+            "browser": browser_config,
+            "supervisor": supervisor_config,
             "wechat": wechat_config,
             "page_settings": page_settings_config,
             "xpaths": xpaths_config,
@@ -143,12 +212,49 @@ def save_config(config):
     config_parser["Timing"] = {
         "normal_interval": str(config["timing"]["normal_interval"]),
         "threshold": str(config["timing"]["threshold"]),
-        "rapid_interval": str(config["timing"]["rapid_interval"])
+        "rapid_interval": str(config["timing"]["rapid_interval"]),
+        "scheduler": config["timing"]["scheduler"]
     }
 
     # 写入刷新配置
     config_parser["Refresh"] = {
-        "enable": str(config["refresh"]).lower()
+        "enable": str(config["refresh"]).lower(),
+        "policy": config["refresh_policy"]["policy"],
+        "max_idle": str(config["refresh_policy"]["max_idle"])
+    }
+
+    # 写入检测方式配置
+    config_parser["Detection"] = {
+        "mode": config["detection"]["mode"],
+        "fingerprint": str(config["detection"]["fingerprint"]).lower(),
+        "visual": str(config["detection"]["visual"]).lower(),
+        "shadow": config["detection"]["shadow"]
+    }
+
+    # 写入题目图片获取方式配置
+    config_parser["Capture"] = {
+        "mode": config["capture"]["mode"]
+    }
+
+    # 写入对话框处理配置
+    config_parser["Dialogs"] = {
+        "mode": config["dialogs"]["mode"],
+        "neutralize_beforeunload": str(config["dialogs"]["neutralize_beforeunload"]).lower()
+    }
+
+    # 写入浏览器配置
+    config_parser["Browser"] = {
+        "backend": config["browser"]["backend"],
+        "profile": config["browser"]["profile"],
+        "standby": str(config["browser"]["standby"]).lower(),
+        "max_browsers": str(config["browser"]["max_browsers"]),
+        "contexts_per_browser": str(config["browser"]["contexts_per_browser"])
+    }
+
+    # 写入监护进程配置
+    config_parser["Supervisor"] = {
+        "heartbeat_timeout": str(config["supervisor"]["heartbeat_timeout"]),
+        "memory_limit_mb": str(config["supervisor"]["memory_limit_mb"])
     }
 
     # 写入微信配置
@@ -210,9 +316,22 @@ def confirm_or_modify_config(loaded_config):
     print(f"   - 常规检测间隔: {loaded_config['timing']['normal_interval']} 秒")
     print(f"   - 快速模式阈值: {loaded_config['timing']['threshold']} 秒")
     print(f"   - 快速检测间隔: {loaded_config['timing']['rapid_interval']} 秒")
+    print(f"   - 调度方式: {loaded_config['timing']['scheduler']}")
     
     print(f"\n3. 刷新配置:")
     print(f"   - 每次检测前刷新页面: {'是' if loaded_config['refresh'] else '否'}")
+    print(f"   - 刷新策略: {'仅在页面失活时刷新' if loaded_config['refresh_policy']['policy'] == 'stale' else '每次刷新'}（失活判定: {loaded_config['refresh_policy']['max_idle']}秒无更新）")
+    print(f"   - 检测方式: {loaded_config['detection']['mode']}（watcher/cdp_ws/http/ws模式下不刷新页面）")
+    print(f"   - 幻灯片内容指纹比对: {'启用' if loaded_config['detection']['fingerprint'] else '禁用'}")
+    print(f"   - 画面变化检测: {'启用' if loaded_config['detection']['visual'] else '禁用'}")
+    print(f"   - 影子模式候选检测方式: {loaded_config['detection']['shadow'] or '不启用'}")
+    print(f"   - 题目图片获取方式: {loaded_config['capture']['mode']}")
+    print(f"   - 对话框处理方式: {loaded_config['dialogs']['mode']}（屏蔽离开提示: {'是' if loaded_config['dialogs']['neutralize_beforeunload'] else '否'}）")
+    print(f"   - 浏览器后端: {loaded_config['browser']['backend']}")
+    print(f"   - 浏览器配置: {loaded_config['browser']['profile']}")
+    print(f"   - 热备浏览器: {'启用' if loaded_config['browser']['standby'] else '禁用'}")
+    print(f"   - 多账号浏览器池: 最多{loaded_config['browser']['max_browsers']}个浏览器，每个浏览器{loaded_config['browser']['contexts_per_browser']}个账号")
+    print(f"   - 监护进程: 心跳超时{loaded_config['supervisor']['heartbeat_timeout']}秒，内存上限{loaded_config['supervisor']['memory_limit_mb'] or '不限'}MB")
     
     # 展示微信配置
     print(f"\n4. 微信消息配置:")
@@ -338,6 +457,15 @@ def get_user_config():
     except ValueError:
         utils.log("时间输入格式错误（需输入整数），使用默认值")
     
+    # 调度方式
+    print("可选调度方式: fixed=固定间隔（默认）, adaptive=按本课程历史出题时间自适应（出题高峰密集检测，其余时段放慢）, slides=按课件结构（老师翻到题目页前1~2页时加速）")
+    while True:
+        scheduler_input = input("请选择调度方式(fixed/adaptive/slides, 默认fixed): ").strip().lower()
+        if scheduler_input in ["", "fixed", "adaptive", "slides"]:
+            config['timing']['scheduler'] = scheduler_input or "fixed"
+            break
+        print("输入无效！请输入fixed、adaptive或slides")
+    
     # 3. 刷新配置
     print("\n【刷新配置】")
     while True:
@@ -346,6 +474,112 @@ def get_user_config():
             config['refresh'] = refresh_input != 'n'
             break
         print("输入无效！请输入y或n")
+    if config['refresh']:
+        while True:
+            stale_input = input("是否仅在页面失活（推送断开/长时间无更新）时刷新？(y=是, n=每次都刷新, 默认y): ").strip().lower()
+            if stale_input in ["", "y", "n"]:
+                config['refresh_policy']['policy'] = "always" if stale_input == 'n' else "stale"
+                break
+            print("输入无效！请输入y或n")
+    
+    # 检测方式
+    print("可选检测方式: url=刷新轮询（默认）, watcher=页面内监听（无需刷新，变化后立即检测）, cdp_ws=WebSocket推送（老师发题即检测）, http=HTTP轮询（登录后关闭浏览器，直接请求课程接口）, ws=WebSocket直连（登录后关闭浏览器，直接接收课程推送，需安装websockets）")
+    while True:
+        mode_input = input("请选择检测方式(url/watcher/cdp_ws/http/ws, 默认url): ").strip().lower()
+        if mode_input in ["", "url", "watcher", "cdp_ws", "http", "ws"]:
+            config['detection']['mode'] = mode_input or "url"
+            break
+        print("输入无效！请输入url、watcher、cdp_ws、http或ws")
+    while True:
+        fingerprint_input = input("是否比对幻灯片内容指纹（识别页码不变的内容更新/重新发布的题目）？(y=是, n=否, 默认n): ").strip().lower()
+        if fingerprint_input in ["", "y", "n"]:
+            config['detection']['fingerprint'] = fingerprint_input == 'y'
+            break
+        print("输入无效！请输入y或n")
+    while True:
+        visual_input = input("是否启用画面变化检测（截取幻灯片区域小图比对，需安装numpy和Pillow）？(y=是, n=否, 默认n): ").strip().lower()
+        if visual_input in ["", "y", "n"]:
+            config['detection']['visual'] = visual_input == 'y'
+            break
+        print("输入无效！请输入y或n")
+    print("影子模式：在同一浏览器中并行运行候选检测方式，只记录检测时间不发送通知，结束时输出延迟差/漏检/误报对比报告")
+    while True:
+        shadow_input = input("请选择影子模式候选检测方式(url/watcher/cdp_ws, 留空不启用): ").strip().lower()
+        if shadow_input in ["", "url", "watcher", "cdp_ws"]:
+            config['detection']['shadow'] = shadow_input
+            break
+        print("输入无效！请输入url、watcher、cdp_ws或留空")
+    
+    # 题目图片获取方式
+    print("可选图片获取方式: xpath=XPath定位页面元素（默认）, network=拦截课件/题目接口数据（更快，未命中时回退XPath）")
+    while True:
+        capture_input = input("请选择题目图片获取方式(xpath/network, 默认xpath): ").strip().lower()
+        if capture_input in ["", "xpath", "network"]:
+            config['capture']['mode'] = capture_input or "xpath"
+            break
+        print("输入无效！请输入xpath或network")
+    
+    # 浏览器后端
+    print("可选浏览器后端: selenium=通过msedgedriver控制Edge（默认）, playwright=Playwright异步驱动（原生事件订阅、调用开销更低，无需msedgedriver，需安装playwright）")
+    while True:
+        backend_input = input("请选择浏览器后端(selenium/playwright, 默认selenium): ").strip().lower()
+        if backend_input in ["", "selenium", "playwright"]:
+            config['browser']['backend'] = backend_input or "selenium"
+            break
+        print("输入无效！请输入selenium或playwright")
+    
+    # 浏览器配置
+    print("可选浏览器配置: standard=有窗口（默认）, lean=精简（扫码登录后切换为无界面浏览器，小视口、屏蔽统计/字体/视频请求，适合长时间运行；登录失效时需改回standard重新扫码）")
+    while True:
+        profile_input = input("请选择浏览器配置(standard/lean, 默认standard): ").strip().lower()
+        if profile_input in ["", "standard", "lean"]:
+            config['browser']['profile'] = profile_input or "standard"
+            break
+        print("输入无效！请输入standard或lean")
+    
+    # 热备浏览器
+    while True:
+        standby_input = input("是否启用热备浏览器（额外启动一个已登录的无界面浏览器，主浏览器失效时立即切换，占用更多内存）？(y=是, n=否, 默认n): ").strip().lower()
+        if standby_input in ["", "y", "n"]:
+            config['browser']['standby'] = standby_input == 'y'
+            break
+        print("输入无效！请输入y或n")
+    
+    # 多账号浏览器池
+    while True:
+        pool_input = input(f"多账号监控时最多同时运行的浏览器数(1-8, 默认{config['browser']['max_browsers']}): ").strip()
+        if not pool_input:
+            break
+        if pool_input.isdigit() and 1 <= int(pool_input) <= 8:
+            config['browser']['max_browsers'] = int(pool_input)
+            break
+        print("输入无效！请输入1-8之间的整数")
+    while True:
+        contexts_input = input(f"每个浏览器容纳的账号数(1-10, 默认{config['browser']['contexts_per_browser']}，仅Playwright后端可共用浏览器): ").strip()
+        if not contexts_input:
+            break
+        if contexts_input.isdigit() and 1 <= int(contexts_input) <= 10:
+            config['browser']['contexts_per_browser'] = int(contexts_input)
+            break
+        print("输入无效！请输入1-10之间的整数")
+    
+    # 监护进程模式
+    while True:
+        heartbeat_input = input(f"监护进程模式：子进程无心跳多少秒视为卡死并重启(60-1800, 默认{config['supervisor']['heartbeat_timeout']}): ").strip()
+        if not heartbeat_input:
+            break
+        if heartbeat_input.isdigit() and 60 <= int(heartbeat_input) <= 1800:
+            config['supervisor']['heartbeat_timeout'] = int(heartbeat_input)
+            break
+        print("输入无效！请输入60-1800之间的整数")
+    while True:
+        memory_input = input(f"监护进程模式：子进程（含浏览器）内存上限MB(0=不限, 默认{config['supervisor']['memory_limit_mb']}): ").strip()
+        if not memory_input:
+            break
+        if memory_input.isdigit() and (int(memory_input) == 0 or 200 <= int(memory_input) <= 16000):
+            config['supervisor']['memory_limit_mb'] = int(memory_input)
+            break
+        print("输入无效！请输入0或200-16000之间的整数")
     
     # 4. 微信消息配置
     print("\n【微信消息配置】")
@@ -477,7 +711,9 @@ def get_user_config():
     print(f"   - 常规检测间隔: {config['timing']['normal_interval']}秒")
     print(f"   - 连续页面更新检测阈值: {config['timing']['threshold']}秒")
     print(f"   - 连续出题检测时间: {config['timing']['rapid_interval']}秒")
-    print(f"3. 刷新设置: {'启用（每次检测前刷新页面）' if config['refresh'] else '禁用（不主动刷新）'}")
+    print(f"   - 调度方式: {config['timing']['scheduler']}")
+    print(f"3. 刷新设置: {'启用（每次检测前刷新页面）' if config['refresh'] else '禁用（不主动刷新）'} | 策略: {config['refresh_policy']['policy']}")
+    print(f"   检测方式: {config['detection']['mode']} | 内容指纹: {'启用' if config['detection']['fingerprint'] else '禁用'} | 画面检测: {'启用' if config['detection']['visual'] else '禁用'} | 图片获取方式: {config['capture']['mode']} | 浏览器后端: {config['browser']['backend']} | 浏览器配置: {config['browser']['profile']} | 热备浏览器: {'启用' if config['browser']['standby'] else '禁用'} | 浏览器池: {config['browser']['max_browsers']}×{config['browser']['contexts_per_browser']} | 监护进程: 心跳超时{config['supervisor']['heartbeat_timeout']}秒/内存上限{config['supervisor']['memory_limit_mb'] or '不限'}MB")
     print(f"4. 微信配置: {'已配置WebHook' if config['wechat']['webhook_url'] else '未配置WebHook'}")
     print(f"5. 页面检测设置:")
     print(f"   - PPT页面: 下载={'启用' if config['page_settings']['ppt']['download'] else '禁用'}, 通知={'启用' if config['page_settings']['ppt']['notify'] else '禁用'}")
@@ -84,7 +84,8 @@ def create_new_course(course_name):
         "stats": {
             "total_cycles": 0,
             "new_pages_detected": 0,
-            "errors_occurred": 0
+            "errors_occurred": 0,
+            "reloads_avoided": 0
         }
     }
     
@@ -111,8 +112,8 @@ def delete_course(course_safe_dir):
         utils.log(f"删除课程失败: {str(e)}")
         return False
 
-def save_course_data(course_dir, course_url, server_name, history, stats):
-    """保存课程数据到课程目录"""
+def save_course_data(course_dir, course_url, server_name, history, stats, detections=None):
+    """保存课程数据到课程目录（detections为出题时间记录，供自适应调度使用）"""
     if not course_dir or not os.path.exists(course_dir):
         utils.log("无效的课程目录，无法保存课程数据")
         return False
@@ -138,6 +139,8 @@ def save_course_data(course_dir, course_url, server_name, history, stats):
             "subjective": list(history["subjective"])
         }
         course_info["stats"] = stats
+        if detections is not None:
+            course_info["detections"] = detections
         
         # 保存更新后的信息
         with open(info_path, "w", encoding="utf-8") as f:
@@ -182,6 +185,93 @@ def load_course_data(course_safe_dir):
         utils.log(f"加载课程数据失败: {str(e)}")
         return None, None, None, None, None
 
+def get_profile_dir(course_dir):
+    """课程专属的浏览器用户数据目录（保留登录状态，重连时无需重新扫码）"""
+    return os.path.abspath(os.path.join(course_dir, "browser_profile"))
+
+def get_standby_profile_dir(course_dir):
+    """热备浏览器的用户数据目录（与主浏览器同时运行，不能共用同一目录）"""
+    return os.path.abspath(os.path.join(course_dir, "browser_profile_standby"))
+
+def get_cookie_snapshot_path(course_dir):
+    """课程的登录Cookie快照文件"""
+    return os.path.join(course_dir, "cookies.json")
+
+def load_course_account(course_dir):
+    """读取课程绑定的账号名称（未设置时返回空字符串）"""
+    info_path = os.path.join(course_dir or "", "course_info.json")
+    if not os.path.exists(info_path):
+        return ""
+    try:
+        with open(info_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("account", "")
+    except Exception as e:
+        utils.log(f"读取课程账号失败: {str(e)}")
+        return ""
+
+def save_course_account(course_dir, account):
+    """保存课程绑定的账号名称（多账号监控时同一账号的课程共用浏览器上下文）"""
+    info_path = os.path.join(course_dir or "", "course_info.json")
+    if not os.path.exists(info_path):
+        return False
+    try:
+        with open(info_path, "r", encoding="utf-8") as f:
+            course_info = json.load(f)
+        course_info["account"] = account
+        with open(info_path, "w", encoding="utf-8") as f:
+            json.dump(course_info, f, ensure_ascii=False, indent=2)
+        return True
+    except Exception as e:
+        utils.log(f"保存课程账号失败: {str(e)}")
+        return False
+
+def load_course_detections(course_dir):
+    """读取课程的出题时间记录（旧版课程数据无该字段时返回空列表）"""
+    info_path = os.path.join(course_dir or "", "course_info.json")
+    if not os.path.exists(info_path):
+        return []
+    try:
+        with open(info_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("detections", [])
+    except Exception as e:
+        utils.log(f"读取出题记录失败: {str(e)}")
+        return []
+
+def select_multiple_courses(minimum=2):
+    """选择多门已保存课程同时监控（只列出已保存课程URL的课程），返回[(课程名称, 课程数据)]，取消时返回空列表"""
+    saved_courses = list_saved_courses()
+    candidates = []
+    for course_name in sorted(saved_courses.keys()):
+        course_data = load_course_data(saved_courses[course_name])
+        if course_data[0] and course_data[1]:
+            candidates.append((course_name, course_data))
+    if len(candidates) < minimum:
+        print(f"已保存课程URL的课程不足{minimum}门，请先通过课程管理分别打开各课程并确认课程URL")
+        return []
+    
+    print("\n可同时监控的课程:")
+    for i, (course_name, course_data) in enumerate(candidates, 1):
+        print(f"  {i}. {course_name} ({course_data[1]})")
+    
+    while True:
+        course_input = input("请输入要同时监控的课程序号，用逗号分隔（如1,3；直接回车返回主菜单）: ").strip()
+        if not course_input:
+            return []
+        try:
+            indexes = [int(part) - 1 for part in re.split(r"[,，\s]+", course_input) if part]
+        except ValueError:
+            print("输入无效！请输入序号，如1,3")
+            continue
+        if not indexes or any(not 0 <= idx < len(candidates) for idx in indexes):
+            print(f"请输入1-{len(candidates)}之间的序号")
+            continue
+        selected = [candidates[idx] for idx in dict.fromkeys(indexes)]  # 去重并保持顺序
+        if len(selected) < minimum:
+            print(f"请至少选择{minimum}门不同的课程")
+            continue
+        utils.log(f"选择同时监控的课程: {', '.join(name for name, _ in selected)}")
+        return selected
+
 def course_management_menu():
     """课程管理菜单（支持新建/打开/删除课程）"""
     print("\n" + "="*60)
@@ -0,0 +1,234 @@
+import re
+import json
+import time
+import browser_manager
+import http_manager
+import ws_manager
+import utils  # 导入通用工具模块
+
+# 页面类型识别规则（URL路由 -> 页面类型）
+PAGE_PATTERNS = {
+    "ppt": r"/ppt/(\d+)",
+    "exercise": r"/exercise/(\d+)",
+    "blank": r"/blank/(\d+)",
+    "subjective": r"/subjective/(\d+)"
+}
+
+# 可选的检测方式（配置项 [Detection] mode）
+DETECTION_MODES = {
+    "url": "刷新轮询（URL正则）",
+    "watcher": "页面内监听（事件驱动）",
+    "cdp_ws": "WebSocket推送（CDP网络监听）",
+    "http": "HTTP轮询（登录后关闭浏览器）",
+    "ws": "WebSocket直连（登录后关闭浏览器）"
+}
+
+# 课程WebSocket推送中代表“发布题目/翻页”的消息类型（op字段）
+WS_EVENT_OPS = {
+    "unlockproblem": "problem",        # 老师发布题目
+    "probleminfo": "problem",          # 题目信息推送
+    "slidenav": "slide",               # 老师翻页
+    "showpresentation": "slide",       # 开始放映课件
+    "presentationupdated": "slide"     # 课件更新
+}
+
+MAX_FINGERPRINTS = 300  # 每节课最多保留的幻灯片指纹数
+
+def parse_page_url(url):
+    """从URL中识别页面类型与编号，未识别时返回(None, None)"""
+    if not url:
+        return None, None
+    for page_type, pattern in PAGE_PATTERNS.items():
+        match = re.search(pattern, url)
+        if match:
+            return page_type, match.group(1)
+    return None, None
+
+
+def read_cycle_snapshot(driver, xpath_config):
+    """读取本周期的页面快照（一次脚本往返）；当前窗口不是课程页时查找课程窗口后重试
+
+    返回字典：url、page_type、page_number、images（幻灯片区域图片）、dialog（页面内弹窗）、problem（题目页状态）等；失败返回None
+    """
+    if not driver:
+        return None
+    snapshot = None
+    if browser_manager.get_pinned_tab(driver):
+        snapshot = browser_manager.probe_cycle(driver, xpath_config, PAGE_PATTERNS)
+    if not snapshot or not browser_manager.is_lesson_url(snapshot.get("url")):
+        # 尚未固定课程标签页或固定的标签页已失效：查找并固定课程标签页后再探测
+        if not browser_manager.get_active_tab_url(driver):
+            return None
+        snapshot = browser_manager.probe_cycle(driver, xpath_config, PAGE_PATTERNS)
+    if not snapshot:
+        return None
+    
+    # 页面类型以Python侧规则为准（与URL正则保持一致）
+    snapshot["page_type"], snapshot["page_number"] = parse_page_url(snapshot.get("url"))
+    if snapshot.get("dialog", {}).get("open"):
+        utils.log(f"[检测模块] 页面内存在弹窗: {snapshot['dialog'].get('text', '')[:50]}")
+    return snapshot
+
+
+class SlideFingerprintIndex:
+    """幻灯片区域指纹索引（按课程分别保存）：识别URL不变时的页面内容变化
+
+    classify 返回：
+    - None: 与上一周期相同（或未定位到幻灯片区域）
+    - "new": 从未出现过的内容
+    - "revisited": 回到了之前出现过的内容（如老师翻回前一页）
+    - "updated": 同一页面编号下出现了新内容（原地更新、重新发布题目）
+    """
+
+    def __init__(self):
+        self.lessons = {}  # key: 课程号, value: {"last": 上一周期指纹, "pages": {指纹: 页面key}, "seen": {页面key: 指纹集合}}
+
+    def classify(self, url, page_type, page_number, fingerprint):
+        if not (fingerprint and page_type and page_number):
+            return None
+        lesson = self.lessons.setdefault(browser_manager.extract_course_id(url) or "", {"last": None, "pages": {}, "seen": {}})
+        if fingerprint == lesson["last"]:
+            return None
+        lesson["last"] = fingerprint
+        page_key = f"{page_type}:{page_number}"
+        if fingerprint in lesson["pages"]:
+            return "revisited"
+        
+        change = "updated" if page_key in lesson["seen"] else "new"
+        lesson["pages"][fingerprint] = page_key
+        lesson["seen"].setdefault(page_key, set()).add(fingerprint)
+        if len(lesson["pages"]) > MAX_FINGERPRINTS:
+            # 丢弃最早记录的指纹（dict保持插入顺序）
+            oldest = next(iter(lesson["pages"]))
+            lesson["seen"].get(lesson["pages"].pop(oldest), set()).discard(oldest)
+        return change
+
+
+class UrlDetector:
+    """原有检测方式：按间隔刷新/读取URL，周期之间固定等待"""
+    name = "url"
+    reload_free = False  # 是否无需刷新页面即可感知变化
+
+    def prepare(self, driver):
+        return True
+
+    def poll(self, driver):
+        return []
+
+    def wait(self, driver, timeout):
+        time.sleep(timeout)
+        return []
+
+
+class WatcherDetector:
+    """页面内监听：注入脚本捕获路由与幻灯片变化，长轮询等待事件（有变化立即返回）"""
+    name = "watcher"
+    reload_free = True
+
+    def prepare(self, driver):
+        return browser_manager.inject_page_watcher(driver)
+
+    def poll(self, driver):
+        return self._read(driver, 0) or []
+
+    def wait(self, driver, timeout):
+        deadline = time.time() + timeout
+        events = self._read(driver, timeout)
+        if events is None:
+            # 监听脚本丢失（页面重载/浏览器重连），剩余时间按原方式等待
+            remaining = deadline - time.time()
+            if remaining > 0:
+                time.sleep(remaining)
+            return []
+        if events:
+            utils.log(f"[检测模块] 页面监听捕获到变化: {events[-1].get('reason')} -> {events[-1].get('url')}")
+        return events
+
+    def _read(self, driver, timeout):
+        if not driver:
+            return None
+        events = browser_manager.wait_page_watcher_events(driver, timeout)
+        if events is None:
+            # 尝试重新注入，下个周期即可恢复事件驱动
+            self.prepare(driver)
+        return events
+
+
+def parse_ws_frame(payload, ts=None):
+    """解析课程WebSocket帧，识别为检测事件；与题目/翻页无关的帧返回None（ts为帧到达时间）"""
+    if not payload or "{" not in payload:
+        return None
+    try:
+        data = json.loads(payload[payload.index("{"):])
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    op = data.get("op")
+    if op not in WS_EVENT_OPS:
+        return None
+    
+    problem = data.get("problem") or {}
+    slide = data.get("slide") or {}
+    return {
+        "reason": f"ws:{op}",
+        "kind": WS_EVENT_OPS[op],
+        "ts": ts or time.time(),
+        "problem_id": problem.get("prob") or problem.get("problemId"),
+        "slide_id": problem.get("sid") or slide.get("sid") or data.get("sid"),
+        "slide_index": slide.get("si") or data.get("si")
+    }
+
+
+class WebSocketDetector:
+    """WebSocket推送检测：通过CDP读取课程页收到的WebSocket帧，老师发题即触发检测"""
+    name = "cdp_ws"
+    reload_free = True
+    poll_step = 0.2  # 读取性能日志的间隔（秒）
+
+    def prepare(self, driver):
+        if not driver:
+            return False
+        ok = browser_manager.enable_cdp_network(driver)
+        if ok:
+            utils.log("[检测模块] 已开启WebSocket帧监听")
+        return ok
+
+    def poll(self, driver):
+        if not driver:
+            return []
+        pump = browser_manager.get_cdp_pump(driver)
+        pump.poll()
+        events = []
+        for frame in pump.pop("Network.webSocketFrameReceived"):
+            event = parse_ws_frame(frame.get("response", {}).get("payloadData"), frame.get("_ts"))
+            if event:
+                events.append(event)
+        return events
+
+    def wait(self, driver, timeout):
+        deadline = time.time() + timeout
+        while True:
+            events = self.poll(driver)
+            if events:
+                utils.log(f"[检测模块] 收到课程推送: {', '.join(e['reason'] for e in events)}")
+                return events
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return []
+            time.sleep(min(self.poll_step, remaining))
+
+
+def create_detector(mode, course_url=None):
+    """根据配置创建检测器（未知方式回退为URL轮询）"""
+    if mode == "watcher":
+        return WatcherDetector()
+    if mode == "cdp_ws":
+        return WebSocketDetector()
+    if mode == "http":
+        return http_manager.HttpDetector(course_url)
+    if mode == "ws":
+        return ws_manager.SocketDetector(course_url, parse_ws_frame)
+    if mode != "url":
+        utils.log(f"[检测模块] 未知的检测方式: {mode}，使用URL轮询")
+    return UrlDetector()
@@ -0,0 +1,240 @@
+import re
+import time
+import requests
+import browser_manager
+import capture_manager
+import utils  # 导入通用工具模块
+
+# 雨课堂接口的返回格式均为 {"code": 0, "data": {...}}，code非0表示请求失败
+
+# 课堂签到接口（POST {"source": 5, "lessonId": 课程号}），返回课堂令牌，之后的课程接口均需携带
+# 返回的data字段: lessonToken（课堂令牌，请求头 Authorization: Bearer <lessonToken>）、identityId（用户ID）
+LESSON_CHECKIN_API = "/api/v3/lesson/checkin"
+
+# 课程状态接口（课程号替换占位符），返回当前放映页与题目状态，数据量很小。
+# 注意：以下字段是根据网页端使用的字段名整理的预期格式，尚未用抓取的真实响应核对（tests中的模拟接口按同一格式返回）；
+# 真实响应缺少slideIndex时会在日志中提示一次实际收到的字段。预期的data字段:
+#   startTime     上课时间（毫秒时间戳）
+#   presentation  当前放映的课件ID
+#   slideIndex    当前放映页码
+#   problem       当前解锁的题目，没有题目时为null:
+#       problemId、problemType（1单选 2多选 3投票 4填空 5主观）、cover（题目图片URL）、
+#       dt（截止时间，毫秒时间戳，不限时为null）、answered（已作答）、isEnd（已截止）、answer（已公布的答案，未公布为null）
+LESSON_STATE_API = "/api/v3/lesson/basic-info?lesson_id={lesson_id}"
+PRESENTATION_API = "/api/v3/lesson/presentation/fetch?presentation_id={presentation_id}"
+
+# 雨课堂接口需要的请求头
+API_HEADERS = {
+    "xtbz": "ykt",
+    "X-Requested-With": "XMLHttpRequest",
+    "Accept": "application/json, text/plain, */*"
+}
+
+
+class AuthExpiredError(Exception):
+    """登录状态失效（需要重新扫码登录）"""
+
+
+def export_session(driver, referer=None):
+    """将浏览器中的登录Cookie与User-Agent导出为requests.Session"""
+    session = requests.Session()
+    session.headers.update(API_HEADERS)
+    try:
+        session.headers["User-Agent"] = driver.execute_script("return navigator.userAgent")
+    except Exception:
+        pass
+    if referer:
+        session.headers["Referer"] = referer
+    for cookie in driver.get_cookies():
+        session.cookies.set(cookie["name"], cookie["value"],
+                            domain=cookie.get("domain"), path=cookie.get("path", "/"))
+    utils.log(f"[HTTP模块] 已导出{len(session.cookies)}个登录Cookie")
+    return session
+
+
+def parse_lesson_state(payload, now=None):
+    """解析课程状态接口（字段见LESSON_STATE_API）：当前放映页码、课件ID、上课时间、题目信息
+
+    接口返回错误码或缺少data字段时返回None
+    """
+    if not isinstance(payload, dict) or payload.get("code", 0) != 0 or not isinstance(payload.get("data"), dict):
+        return None
+    data = payload["data"]
+    problem = data.get("problem") or None
+    slide_index = data.get("slideIndex")
+
+    result = {
+        "lesson_start": data.get("startTime"),
+        "presentation_id": data.get("presentation"),
+        "slide_index": str(slide_index) if slide_index is not None else None,
+        "problem_id": None,
+        "page_type": "ppt",
+        "image_url": "",
+        "problem": None
+    }
+    if problem:
+        deadline = problem.get("dt")
+        remaining = max(0, int(deadline / 1000 - (now or time.time()))) if deadline else None
+        result.update({
+            "problem_id": problem.get("problemId"),
+            "page_type": capture_manager.PROBLEM_TYPE_MAP.get(problem.get("problemType"), "exercise"),
+            "image_url": problem.get("cover") or "",
+            "problem": {
+                "countdown": remaining,
+                "can_submit": not problem.get("answered") and not problem.get("isEnd"),
+                "submitted": bool(problem.get("answered")),
+                "closed": bool(problem.get("isEnd")),
+                "revealed": problem.get("answer") is not None
+            }
+        })
+    return result
+
+
+class LessonHttpClient:
+    """直接请求课程接口读取当前页与题目状态（无需保持浏览器）"""
+
+    def __init__(self, session, course_url, timeout=5):
+        self.session = session
+        self.course_url = course_url
+        self.timeout = timeout
+        match = re.match(r"(https?://[^/]+)", course_url or "")
+        self.base_url = match.group(1) if match else ""
+        self.lesson_id = browser_manager.extract_course_id(course_url or "") or ""
+        self.presentation = capture_manager.LessonPayloadCache()  # 课件结构（页码 -> 页面类型/图片）
+        self.presentation_id = None
+        self.schema_warned = False  # 已提示过课程状态缺少slideIndex
+        self.lesson_token = None  # 课堂令牌（签到后获得）
+        self.identity_id = None   # 用户ID（签到后获得）
+        self.requests = 0
+        self.bytes = 0
+
+    def _request(self, method, path, **kwargs):
+        response = self.session.request(method, self.base_url + path, timeout=self.timeout, allow_redirects=False, **kwargs)
+        self.requests += 1
+        self.bytes += len(response.content)
+        if response.status_code in (401, 403) or (300 <= response.status_code < 400 and "login" in response.headers.get("Location", "")):
+            raise AuthExpiredError(f"HTTP {response.status_code}")
+        response.raise_for_status()
+        return response.json()
+
+    def checkin(self):
+        """课堂签到，获取课堂令牌并设置到之后请求的Authorization请求头"""
+        payload = self._request("POST", LESSON_CHECKIN_API, json={"source": 5, "lessonId": self.lesson_id})
+        data = payload.get("data") if isinstance(payload, dict) else None
+        if not isinstance(data, dict) or not data.get("lessonToken"):
+            raise AuthExpiredError(f"签到未返回课堂令牌（code={payload.get('code') if isinstance(payload, dict) else None}）")
+        self.lesson_token = data["lessonToken"]
+        self.identity_id = data.get("identityId")
+        self.session.headers["Authorization"] = f"Bearer {self.lesson_token}"
+        utils.log(f"[HTTP模块] 课堂签到成功（课次{self.lesson_id}）")
+        return self.lesson_token
+
+    def get_json(self, path):
+        if not self.lesson_token:
+            self.checkin()
+        return self._request("GET", path)
+
+    def fetch_state(self):
+        """读取课程状态，首次遇到新课件时同时读取课件结构"""
+        payload = self.get_json(LESSON_STATE_API.format(lesson_id=self.lesson_id))
+        state = parse_lesson_state(payload)
+        if state and state["slide_index"] is None and not self.schema_warned:
+            self.schema_warned = True
+            utils.log(f"[HTTP模块] 警告：课程状态接口返回的数据中没有slideIndex字段（收到的字段: {', '.join(sorted(payload['data'])) or '无'}），"
+                      f"无法识别当前页，HTTP轮询/WebSocket直连将检测不到翻页与出题，请改用其他检测方式")
+        if state and state["presentation_id"] and state["presentation_id"] != self.presentation_id:
+            self.presentation_id = state["presentation_id"]
+            try:
+                added = self.presentation.ingest_payload(
+                    self.get_json(PRESENTATION_API.format(presentation_id=self.presentation_id)))
+                utils.log(f"[HTTP模块] 已读取课件结构（{added}页）")
+            except AuthExpiredError:
+                raise
+            except Exception as e:
+                utils.log(f"[HTTP模块] 读取课件结构失败: {str(e)}")
+        return state
+
+    def read_snapshot(self):
+        """将课程状态转换为与页面探测一致的周期快照"""
+        state = self.fetch_state()
+        if not state or not state["slide_index"]:
+            return None
+        page_type, page_number = state["page_type"], state["slide_index"]
+        info = self.presentation.slides_by_index.get(page_number)
+        if info and page_type == "ppt":
+            page_type = info["page_type"]
+        image_url = state["image_url"] or (info["image_url"] if info else "")
+        return {
+            "url": f"{self.base_url}/lesson/fullscreen/v3/{self.lesson_id}/{page_type}/{page_number}",
+            "title": "",
+            "ready_state": "complete",
+            "page_type": page_type,
+            "page_number": page_number,
+            "container_found": bool(image_url),
+            "images": [image_url] if image_url else [],
+            "region": None,
+            "fingerprint": None,
+            "dialog": {"open": False, "text": ""},
+            "problem": state["problem"],
+            "lesson_start": state["lesson_start"]
+        }
+
+
+class HttpDetector:
+    """HTTP轮询检测：登录后导出Cookie并关闭浏览器，直接请求课程接口（亚秒级间隔），仅在登录失效时重新启动浏览器"""
+    name = "http"
+    reload_free = True
+    browser_free = True  # 检测过程中不需要浏览器
+    poll_step = 0.5      # 等待期间请求课程状态的间隔（秒）
+
+    def __init__(self, course_url):
+        self.course_url = course_url
+        self.client = None
+        self.last_key = None    # 最近一次读取到的页面
+        self.polled_key = None  # poll()上次返回事件时的页面
+        self.auth_expired = False
+
+    def prepare(self, driver):
+        """从已登录的浏览器导出Cookie"""
+        if not driver:
+            return self.client is not None
+        self.client = LessonHttpClient(export_session(driver, self.course_url), self.course_url)
+        self.auth_expired = False
+        return True
+
+    def read_snapshot(self):
+        if not self.client:
+            return None
+        try:
+            snapshot = self.client.read_snapshot()
+        except AuthExpiredError as e:
+            utils.log(f"[HTTP模块] 登录状态已失效（{str(e)}），需要重新登录")
+            self.auth_expired = True
+            return None
+        except Exception as e:
+            utils.log(f"[HTTP模块] 请求课程状态失败: {str(e)}")
+            return None
+        if snapshot:
+            self.last_key = (snapshot["page_type"], snapshot["page_number"])
+        return snapshot
+
+    def poll(self, driver):
+        snapshot = self.read_snapshot()
+        if not snapshot or self.last_key == self.polled_key:
+            return []
+        self.polled_key = self.last_key
+        return [{"reason": "http:state", "url": snapshot["url"], "ts": time.time()}]
+
+    def wait(self, driver, timeout):
+        deadline = time.time() + timeout
+        start_key = self.last_key
+        while not self.auth_expired:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return []
+            time.sleep(min(self.poll_step, remaining))
+            snapshot = self.read_snapshot()
+            if snapshot and (snapshot["page_type"], snapshot["page_number"]) != start_key:
+                utils.log(f"[检测模块] 课程状态变化: {snapshot['page_type']} {snapshot['page_number']}")
+                return [{"reason": "http:state", "url": snapshot["url"], "ts": time.time()}]
+        return []
@@ -1,10 +1,8 @@
 import sys
 import time
-import threading
 import datetime
 import os
 import json
-import re
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QTabWidget, QWidget, QVBoxLayout, 
                             QHBoxLayout, QPushButton, QLabel, QTextEdit, QMessageBox, 
                             QInputDialog, QFileDialog, QGroupBox, QFormLayout, QLineEdit,
@@ -18,8 +16,12 @@ import utils
 import config_manager
 import course_manager
 import browser_manager
-import notification_manager
-import ai_manager
+import detection_manager
+import capture_manager
+import scheduler_manager
+import visual_manager
+import monitor_engine
+import wait_manager
 
 class LoginThread(QThread):
     """登录线程，严格遵循命令行登录流程"""
@@ -29,10 +31,11 @@ class LoginThread(QThread):
     login_failed = pyqtSignal(str)
     need_user_confirm = pyqtSignal(int)  # 1: 扫码完成确认, 2: 课程页面确认
 
-    def __init__(self, server_url, course_url=None):
+    def __init__(self, server_url, course_url=None, profile_dir=None):
         super().__init__()
         self.server_url = server_url
         self.course_url = course_url  # 已保存的课程URL
+        self.profile_dir = profile_dir  # 课程专属浏览器数据目录（保留登录状态）
         self.running = True
         self.driver = None
         self.confirm_step1 = False  # 扫码完成确认
@@ -43,10 +46,10 @@ class LoginThread(QThread):
             # 初始化浏览器（与命令行一致）
             self.status_signal.emit("初始化浏览器")
             self.log_signal.emit("【初始化浏览器】")
-            self.driver = browser_manager.init_browser()
+            self.driver = browser_manager.init_browser(self.profile_dir)
             if not self.driver:
                 self.log_signal.emit("浏览器初始化失败，尝试重新初始化...")
-                self.driver = browser_manager.init_browser()  # 重试1次
+                self.driver = browser_manager.init_browser(self.profile_dir)  # 重试1次
                 if not self.driver:
                     self.login_failed.emit("浏览器初始化失败（共2次尝试）")
                     return
@@ -55,13 +58,12 @@ class LoginThread(QThread):
             login_url = f"{self.server_url}/web"
             self.status_signal.emit("访问登录页面")
             self.log_signal.emit(f"步骤1/3：访问登录页面: {login_url}")
-            self.driver.get(login_url)
-            time.sleep(4)
+            wait_manager.navigate(self.driver, login_url, require_app=False, label="登录页加载")
 
             # 等待用户扫码登录（触发UI确认）
             self.need_user_confirm.emit(1)
             while self.running and not self.confirm_step1:
-                time.sleep(1)
+                time.sleep(0.2)
 
             if not self.running:
                 return
@@ -70,7 +72,7 @@ class LoginThread(QThread):
             self.status_signal.emit("等待导航到课程页面")
             self.need_user_confirm.emit(2)
             while self.running and not self.confirm_step2:
-                time.sleep(1)
+                time.sleep(0.2)
 
             if not self.running:
                 return
@@ -138,6 +140,22 @@ class LoginThread(QThread):
         self.wait()
 
 
+class SelfTestThread(QThread):
+    """启动自检线程（启动无界面浏览器需数秒，不能在界面线程中执行）"""
+    result_signal = pyqtSignal(bool, list)  # 是否通过, 自检结果行
+
+    def __init__(self, backend):
+        super().__init__()
+        self.backend = backend
+
+    def run(self):
+        try:
+            ok, lines = browser_manager.run_self_test(backend=self.backend)  # 不修改全局后端（监控线程可能正在运行）
+        except Exception as e:
+            ok, lines = False, [f"[异常] 自检失败: {str(e)}"]
+        self.result_signal.emit(ok, lines)
+
+
 class MonitorThread(QThread):
     """监控线程，完全对齐命令行监控逻辑"""
     log_signal = pyqtSignal(str)
@@ -151,316 +169,54 @@ class MonitorThread(QThread):
         self.course_dir = course_dir
         self.course_url = course_url
         self.user_config = user_config
-        self.driver = driver  # 继承登录线程的浏览器实例
-        self.running = True
-        self.history = {
-            "ppt": set(),
-            "exercise": set(),
-            "blank": set(),
-            "subjective": set()
-        }
-        self.stats = {
-            "total_cycles": 0,
-            "new_pages_detected": 0,
-            "errors_occurred": 0
-        }
-        self.interval_time = user_config['timing']['normal_interval']
-        self.rapid_mode_start = 0
-        self.last_succ_detect = time.time()
-        self.max_consec_errors = 3
-        self.consec_errors = 0
-        self.wechat_hook = user_config['wechat']['webhook_url']
-        self.page_name_map = {
-            "ppt": "PPT",
-            "exercise": "选择题",
-            "blank": "填空题",
-            "subjective": "主观题"
-        }
         
         # 初始化课程专属目录（与命令行一致）
         utils.init_directories(course_dir)
-        # 加载历史记录
-        self._load_history()
+        
+        # 检测逻辑由MonitorEngine执行，界面通过信号订阅引擎事件
+        self.engine = monitor_engine.MonitorEngine(
+            course_dir, course_url, user_config, driver, history=self._load_history(),
+            interactive=False)  # 界面线程没有控制台，重连时不能等待input()
+        self.engine.subscribe("log", lambda message: self.log_signal.emit(message))
+        self.engine.subscribe("status", lambda status: self.status_signal.emit(status))
+        self.engine.subscribe("stats", lambda stats: self.stats_signal.emit(stats))
+        self.engine.subscribe("page_detected", self._on_page_detected)
+        self.engine.subscribe("error", lambda message, fatal: self.error_occurred.emit(message))
 
     def _load_history(self):
         """加载课程历史记录，与命令行版本一致"""
+        history = monitor_engine.new_history()
         course_info_path = os.path.join(self.course_dir, "course_info.json")
         if os.path.exists(course_info_path):
             try:
                 with open(course_info_path, "r", encoding="utf-8") as f:
                     course_info = json.load(f)
-                    for page_type in self.history:
+                    for page_type in history:
                         if page_type in course_info.get("history", {}):
-                            self.history[page_type] = set(course_info["history"][page_type])
+                            history[page_type] = set(course_info["history"][page_type])
                 self.log_signal.emit("已加载课程历史记录")
             except Exception as e:
                 self.log_signal.emit(f"加载历史记录失败: {str(e)}")
+        return history
+
+    def _on_page_detected(self, page_type, page_number, is_new, monitored, **kwargs):
+        if is_new and monitored:
+            self.new_page_signal.emit(page_type, page_number)
 
     def run(self):
         try:
-            # 导航到课程页面（与命令行一致）
-            self.log_signal.emit(f"导航到课程页面: {self.course_url}")
-            self.driver.get(self.course_url)
-            time.sleep(3)
-            browser_manager.handle_all_alerts(self.driver)
-
-            # 输出监控开始信息（格式与命令行一致）
-            self.log_signal.emit("\n" + "="*60)
-            self.log_signal.emit("          开始进入监控循环（按停止按钮停止）")
-            self.log_signal.emit("="*60)
-            self.log_signal.emit(f"监控配置: 常规间隔={self.user_config['timing']['normal_interval']}s | 快速间隔={self.user_config['timing']['rapid_interval']}s")
-            self.log_signal.emit(f"          快速阈值={self.user_config['timing']['threshold']}s | 刷新设置={'启用' if self.user_config['refresh'] else '禁用'}")
-            self.log_signal.emit(f"          AI分析: {'启用' if self.user_config['ai']['enable'] else '禁用'} | OCR: {'已配置' if (self.user_config['ocr']['apikey'] and self.user_config['ocr']['secretkey']) else '未配置'}")
-            self.log_signal.emit(f"          课程目录: {self.course_dir}")
-            self.log_signal.emit("="*60 + "\n")
-            
-            self.status_signal.emit("监控中")
-
-            while self.running:
-                # 更新统计信息
-                self.stats["total_cycles"] += 1
-                current_cycle = self.stats["total_cycles"]
-                cycle_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                
-                # 日志记录周期信息（完全对齐命令行格式）
-                self.log_signal.emit(f"\n[检测周期 {current_cycle}] 开始时间: {cycle_time}")
-                self.log_signal.emit(f"当前状态: 间隔={self.interval_time}s | 快速模式={'已启用' if self.rapid_mode_start else '未启用'}")
-                self.log_signal.emit(f"性能统计: 新页面={self.stats['new_pages_detected']} | 错误数={self.stats['errors_occurred']} | 连续错误={self.consec_errors}")
-                
-                # 发送统计信息到UI
-                self.stats_signal.emit(self.stats.copy())
-                
-                # 定期保存课程数据（每10个周期，与命令行一致）
-                if current_cycle % 10 == 0:
-                    course_manager.save_course_data(
-                        self.course_dir, 
-                        self.course_url, 
-                        self.user_config['server']['name'], 
-                        self.history, 
-                        self.stats
-                    )
-                    self.log_signal.emit("课程数据已保存")
-
-                # 3分钟未成功检测，强制重连浏览器（与命令行一致）
-                if time.time() - self.last_succ_detect > 3 * 60:
-                    self.log_signal.emit("【警告】已超过3分钟未成功检测，尝试重连浏览器...")
-                    if self.driver:
-                        self.driver.quit()
-                    self.driver = browser_manager.reconnect_browser(self.course_url)
-                    self.consec_errors = 0
-                
-                # 浏览器未连接，尝试重连
-                if not self.driver:
-                    self.driver = browser_manager.reconnect_browser(self.course_url)
-                    if not self.driver:
-                        self.log_signal.emit(f"无法重新连接浏览器，{self.interval_time}秒后重试...")
-                        time.sleep(self.interval_time)
-                        continue
-
-                try:
-                    # 按配置刷新页面（与命令行一致）
-                    if self.user_config['refresh']:
-                        self.log_signal.emit("执行页面刷新操作...")
-                        browser_manager.handle_all_alerts(self.driver)  # 处理刷新前弹窗
-                        self.driver.get(self.course_url)
-                        time.sleep(3)  # 等待页面加载
-                        browser_manager.handle_all_alerts(self.driver)  # 处理刷新后弹窗
-                        self.log_signal.emit("页面刷新完成")
-                    
-                    # 获取当前页面URL
-                    current_page_url = browser_manager.get_active_tab_url(self.driver)
-                    if not current_page_url:
-                        self.log_signal.emit("无法获取当前页面URL")
-                        self.consec_errors += 1
-                        self.stats["errors_occurred"] += 1
-                        
-                        # 连续错误达到阈值，重连浏览器（与命令行一致）
-                        if self.consec_errors >= self.max_consec_errors:
-                            self.log_signal.emit(f"连续错误次数达到{self.max_consec_errors}次，触发浏览器重连...")
-                            self.driver = browser_manager.reconnect_browser(self.course_url)
-                            self.consec_errors = 0
-                        
-                        time.sleep(self.interval_time)
-                        continue
-                    
-                    self.log_signal.emit(f"当前页面URL: {current_page_url}")
-                    
-                    # 识别页面类型和编号（与命令行正则一致）
-                    page_type, page_number = None, None
-                    page_patterns = {
-                        "ppt": r"/ppt/(\d+)",
-                        "exercise": r"/exercise/(\d+)",
-                        "blank": r"/blank/(\d+)",
-                        "subjective": r"/subjective/(\d+)"
-                    }
-                    for ptype, pattern in page_patterns.items():
-                        match = re.search(pattern, current_page_url)
-                        if match:
-                            page_type = ptype
-                            page_number = match.group(1)
-                            break
-                    
-                    # 未识别到监控页面类型（如课程目录页）
-                    if not (page_type and page_number):
-                        self.log_signal.emit("未识别到已知页面类型（可能在课程目录页）")
-                        self.consec_errors = 0
-                        self.last_succ_detect = time.time()
-                        time.sleep(self.interval_time)
-                        continue
-                    
-                    self.log_signal.emit(f"识别到页面类型: {page_type}，编号: {page_number}")
-                    
-                    # 判断是否为新页面+是否需要监控（下载/通知）
-                    is_new_page = page_number not in self.history[page_type]
-                    is_monitored_page = (self.user_config['page_settings'][page_type]['notify'] or 
-                                       self.user_config['page_settings'][page_type]['download'])
-                    
-                    if is_monitored_page and is_new_page:
-                        # 1. 进入快速模式（与命令行一致）
-                        self.rapid_mode_start = time.time()
-                        self.interval_time = self.user_config['timing']['rapid_interval']
-                        self.log_signal.emit(f"检测到新{page_type}页面，进入快速模式（间隔{self.interval_time}秒）")
-                        
-                        # 2. 更新历史记录与统计
-                        self.history[page_type].add(page_number)
-                        self.stats["new_pages_detected"] += 1
-                        
-                        # 3. 发送新页面信号到UI
-                        self.new_page_signal.emit(page_type, page_number)
-                        
-                        # 4. 定位页面元素并下载图片（按配置）
-                        image_path = None
-                        try:
-                            # 定位页面核心元素
-                            base_element = browser_manager.locate_page_element(
-                                self.driver, page_type, self.user_config['xpaths'])
-                            if base_element:
-                                # 查找图片元素
-                                img_elements = base_element.find_elements("tag name", "img")
-                                if img_elements:
-                                    img_src = img_elements[0].get_attribute("src") or img_elements[0].get_attribute("data-src")
-                                    if img_src:
-                                        self.log_signal.emit(f"获取到{page_type}页面图片资源: {img_src[:100]}...")
-                                        # 按配置下载图片
-                                        if self.user_config['page_settings'][page_type]['download']:
-                                            image_path = utils.download_image(
-                                                img_src, self.course_dir, page_type, page_number)
-                        
-                        except Exception as e:
-                            self.log_signal.emit(f"{page_type}页面元素处理异常: {str(e)}")
-                            self.stats["errors_occurred"] += 1
-                        
-                        # 5. 发送通知（系统通知+微信通知）
-                        if self.user_config['page_settings'][page_type]['notify']:
-                            # 发送系统通知
-                            
-                            notification_manager.send_system_notification(
-                                title=f"新{page_type}页面",
-                                message=f"编号: {page_number}\n时间: {cycle_time}\n课程URL: {self.course_url}"
-                            )
-                            
-                            # 发送企业微信通知（按配置）
-                            if self.wechat_hook:
-                                notification_manager.send_wechat_notification(
-                                    webhook_url=self.wechat_hook,
-                                    title=f"新{self.page_name_map[page_type]}页面提醒",
-                                    content=f"页面编号：{page_number}\n课程URL：{self.course_url}",
-                                    image_path=image_path
-                                )
-                        # 6. 用 ai 解答
-                        if self.user_config['ai']['enable'] and image_path:
-                            def ai_process_and_notify():
-                                ai_answer = ai_manager.get_ai_answer(
-                                    ocr_config=self.user_config['ocr'],
-                                    ai_config=self.user_config['ai'],
-                                    image_path=image_path
-                                )
-                                
-                                if self.wechat_hook and ai_answer:
-                                    notification_manager.send_ai_notification(
-                                        webhook_url=self.wechat_hook,
-                                        title=f"新{self.page_name_map[page_type]}页面分析",
-                                        content=ai_answer,
-                                        )
-                                self.log_signal.emit(f"AI分析完成: {ai_answer[:100]}..." if ai_answer else "AI分析未获取到结果")
-                            
-                            ai_thread = threading.Thread(target=ai_process_and_notify)
-                            ai_thread.daemon = True  # 设为守护线程，主程序退出时自动关闭
-                            ai_thread.start()  # 启动线程（异步执行，不阻塞主循环）
-                    
-                    elif is_monitored_page and not is_new_page:
-                        # 快速模式超时判断（恢复常规间隔）
-                        if self.rapid_mode_start and (time.time() - self.rapid_mode_start) > self.user_config['timing']['threshold']:
-                            self.interval_time = self.user_config['timing']['normal_interval']
-                            self.log_signal.emit(f"快速模式已持续{(time.time() - self.rapid_mode_start):.1f}秒（超过阈值{self.user_config['timing']['threshold']}秒），恢复常规间隔{self.interval_time}秒")
-                            self.rapid_mode_start = 0
-                        elif self.rapid_mode_start:
-                            self.log_signal.emit(f"快速模式持续中（{(time.time() - self.rapid_mode_start):.1f}秒），保持间隔{self.interval_time}秒")
-                    
-                    else:
-                        self.log_signal.emit(f"当前页面类型({page_type})未配置监控，保持间隔{self.interval_time}秒")
-                    
-                    # 重置错误计数与检测时间
-                    self.consec_errors = 0
-                    self.last_succ_detect = time.time()
-                    browser_manager.handle_all_alerts(self.driver)
-                    
-                    # 等待下一个检测周期
-                    self.log_signal.emit(f"检测周期{current_cycle}完成，{self.interval_time}秒后进行下一次检测...")
-                    time.sleep(self.interval_time)
-                
-                except Exception as e:
-                    self.log_signal.emit(f"【错误】检测周期中发生异常: {str(e)}")
-                    self.error_occurred.emit(str(e))
-                    self.consec_errors += 1
-                    self.stats["errors_occurred"] += 1
-                    if self.consec_errors >= self.max_consec_errors:
-                        self.log_signal.emit(f"连续错误次数达到{self.max_consec_errors}次，触发重新连接...")
-                        self.driver = browser_manager.reconnect_browser(self.course_url)
-                        self.consec_errors = 0
-                    time.sleep(self.interval_time)
-        
+            self.engine.start(navigate=True, stop_hint="按停止按钮停止")
+            self.engine.run()
         except Exception as e:
             self.log_signal.emit(f"【严重错误】监控主循环异常终止: {str(e)}")
             self.status_signal.emit(f"监控异常: {str(e)}")
             self.error_occurred.emit(str(e))
         finally:
-            # 退出前保存课程数据（与命令行一致）
-            course_manager.save_course_data(
-                self.course_dir, 
-                self.course_url, 
-                self.user_config['server']['name'], 
-                self.history, 
-                self.stats
-            )
-            
-            # 输出统计信息（格式与命令行一致）
-            self.log_signal.emit("\n" + "="*60)
-            self.log_signal.emit("          监控程序结束 - 统计信息")
-            self.log_signal.emit("="*60)
-            self.log_signal.emit(f"总检测周期: {self.stats['total_cycles']}次")
-            self.log_signal.emit(f"检测到新页面: {self.stats['new_pages_detected']}个")
-            self.log_signal.emit(f"发生错误次数: {self.stats['errors_occurred']}次")
-            self.log_signal.emit(f"PPT页面历史: {len(self.history['ppt'])}个")
-            self.log_signal.emit(f"选择题页面历史: {len(self.history['exercise'])}个")
-            self.log_signal.emit(f"填空题页面历史: {len(self.history['blank'])}个")
-            self.log_signal.emit(f"主观题页面历史: {len(self.history['subjective'])}个")
-            self.log_signal.emit(f"课程数据已保存至: {self.course_dir}")
-            self.log_signal.emit("="*60)
-            
-            # 关闭浏览器
-            if self.driver:
-                try:
-                    browser_manager.handle_all_alerts(self.driver)
-                    self.driver.quit()
-                    self.log_signal.emit("浏览器已成功关闭")
-                except Exception as e:
-                    self.log_signal.emit(f"关闭浏览器时发生错误: {str(e)}")
-            
-            self.status_signal.emit("监控已停止")
+            # 退出前保存课程数据、输出统计信息并关闭浏览器（与命令行一致）
+            self.engine.close()
 
     def stop(self):
-        self.running = False
+        self.engine.stop()
         self.wait()
 
 
@@ -690,7 +446,14 @@ class ConfigWidget(QWidget):
         
         timing_layout.addRow("常规检测间隔(秒):", self.normal_interval)
         timing_layout.addRow("快速模式阈值(秒):", self.threshold)
+        self.scheduler_combo = QComboBox()
+        for mode, mode_name in scheduler_manager.SCHEDULER_MODES.items():
+            self.scheduler_combo.addItem(mode_name, mode)
+        scheduler_index = self.scheduler_combo.findData(self.config['timing']['scheduler'])
+        self.scheduler_combo.setCurrentIndex(max(scheduler_index, 0))
+        
         timing_layout.addRow("快速检测间隔(秒):", self.rapid_interval)
+        timing_layout.addRow("调度方式:", self.scheduler_combo)
         timing_group.setLayout(timing_layout)
         layout.addWidget(timing_group)
         
@@ -740,10 +503,106 @@ class ConfigWidget(QWidget):
         self.refresh_check = QCheckBox("每次检测前刷新页面")
         self.refresh_check.setChecked(self.config['refresh'])
         
+        self.refresh_stale_only = QCheckBox("仅在页面失活时刷新")
+        self.refresh_stale_only.setChecked(self.config['refresh_policy']['policy'] == "stale")
+        
+        self.refresh_max_idle = QSpinBox()
+        self.refresh_max_idle.setRange(30, 1800)
+        self.refresh_max_idle.setSuffix(" 秒无更新视为失活")
+        self.refresh_max_idle.setValue(self.config['refresh_policy']['max_idle'])
+        
         refresh_layout.addWidget(self.refresh_check)
+        refresh_layout.addWidget(self.refresh_stale_only)
+        refresh_layout.addWidget(self.refresh_max_idle)
         refresh_group.setLayout(refresh_layout)
         layout.addWidget(refresh_group)
         
+        # 检测方式配置
+        detection_group = QGroupBox("检测方式配置")
+        detection_layout = QFormLayout()
+        
+        self.detection_mode_combo = QComboBox()
+        for mode, mode_name in detection_manager.DETECTION_MODES.items():
+            self.detection_mode_combo.addItem(mode_name, mode)
+        mode_index = self.detection_mode_combo.findData(self.config['detection']['mode'])
+        self.detection_mode_combo.setCurrentIndex(max(mode_index, 0))
+        
+        self.capture_mode_combo = QComboBox()
+        for mode, mode_name in capture_manager.CAPTURE_MODES.items():
+            self.capture_mode_combo.addItem(mode_name, mode)
+        capture_index = self.capture_mode_combo.findData(self.config['capture']['mode'])
+        self.capture_mode_combo.setCurrentIndex(max(capture_index, 0))
+        
+        self.shadow_mode_combo = QComboBox()
+        self.shadow_mode_combo.addItem("不启用", "")
+        for mode, mode_name in detection_manager.DETECTION_MODES.items():
+            self.shadow_mode_combo.addItem(mode_name, mode)
+        shadow_index = self.shadow_mode_combo.findData(self.config['detection']['shadow'])
+        self.shadow_mode_combo.setCurrentIndex(max(shadow_index, 0))
+        
+        detection_layout.addRow("检测方式:", self.detection_mode_combo)
+        detection_layout.addRow("影子模式候选检测方式:", self.shadow_mode_combo)
+        detection_layout.addRow("题目图片获取方式:", self.capture_mode_combo)
+        
+        self.fingerprint_check = QCheckBox("比对幻灯片内容指纹（识别页码不变的内容更新/重新发布的题目）")
+        self.fingerprint_check.setChecked(self.config['detection']['fingerprint'])
+        detection_layout.addRow(self.fingerprint_check)
+        self.visual_check = QCheckBox("画面变化检测（截取幻灯片区域小图比对，需安装numpy和Pillow）")
+        self.visual_check.setChecked(self.config['detection']['visual'])
+        self.visual_check.setEnabled(visual_manager.VISUAL_AVAILABLE or self.config['detection']['visual'])
+        detection_layout.addRow(self.visual_check)
+        
+        self.dialog_cdp_check = QCheckBox("即时处理页面对话框（不再每次等待3秒）")
+        self.dialog_cdp_check.setChecked(self.config['dialogs']['mode'] == "cdp")
+        self.dialog_unload_check = QCheckBox("屏蔽“离开此网站”提示")
+        self.dialog_unload_check.setChecked(self.config['dialogs']['neutralize_beforeunload'])
+        detection_layout.addRow(self.dialog_cdp_check)
+        detection_layout.addRow(self.dialog_unload_check)
+        self.browser_profile_combo = QComboBox()
+        for profile, profile_name in browser_manager.BROWSER_PROFILES.items():
+            self.browser_profile_combo.addItem(profile_name, profile)
+        profile_index = self.browser_profile_combo.findData(self.config['browser']['profile'])
+        self.browser_profile_combo.setCurrentIndex(max(profile_index, 0))
+        detection_layout.addRow("浏览器配置:", self.browser_profile_combo)
+        self.browser_backend_combo = QComboBox()
+        for backend, backend_name in browser_manager.BROWSER_BACKENDS.items():
+            self.browser_backend_combo.addItem(backend_name, backend)
+        backend_index = self.browser_backend_combo.findData(self.config['browser']['backend'])
+        self.browser_backend_combo.setCurrentIndex(max(backend_index, 0))
+        detection_layout.addRow("浏览器后端:", self.browser_backend_combo)
+        self.standby_check = QCheckBox("热备浏览器（额外启动一个已登录的无界面浏览器，主浏览器失效时立即切换，占用更多内存）")
+        self.standby_check.setChecked(self.config['browser']['standby'])
+        detection_layout.addRow(self.standby_check)
+        self.max_browsers_spin = QSpinBox()
+        self.max_browsers_spin.setRange(1, 8)
+        self.max_browsers_spin.setSuffix(" 个浏览器")
+        self.max_browsers_spin.setValue(self.config['browser']['max_browsers'])
+        self.contexts_per_browser_spin = QSpinBox()
+        self.contexts_per_browser_spin.setRange(1, 10)
+        self.contexts_per_browser_spin.setSuffix(" 个账号/浏览器")
+        self.contexts_per_browser_spin.setValue(self.config['browser']['contexts_per_browser'])
+        pool_layout = QHBoxLayout()
+        pool_layout.addWidget(self.max_browsers_spin)
+        pool_layout.addWidget(self.contexts_per_browser_spin)
+        detection_layout.addRow("多账号浏览器池:", pool_layout)
+        self.heartbeat_timeout_spin = QSpinBox()
+        self.heartbeat_timeout_spin.setRange(60, 1800)
+        self.heartbeat_timeout_spin.setSuffix(" 秒无心跳重启")
+        self.heartbeat_timeout_spin.setValue(self.config['supervisor']['heartbeat_timeout'])
+        self.memory_limit_spin = QSpinBox()
+        self.memory_limit_spin.setRange(0, 16000)
+        self.memory_limit_spin.setSingleStep(100)
+        self.memory_limit_spin.setSpecialValueText("内存不限")
+        self.memory_limit_spin.setSuffix(" MB内存上限")
+        self.memory_limit_spin.setValue(self.config['supervisor']['memory_limit_mb'])
+        supervisor_layout = QHBoxLayout()
+        supervisor_layout.addWidget(self.heartbeat_timeout_spin)
+        supervisor_layout.addWidget(self.memory_limit_spin)
+        detection_layout.addRow("监护进程模式:", supervisor_layout)
+        detection_layout.addRow(QLabel("页面内监听/WebSocket推送模式无需刷新页面，页面变化后立即进入检测"))
+        detection_group.setLayout(detection_layout)
+        layout.addWidget(detection_group)
+        
         # 微信配置
         wechat_group = QGroupBox("微信消息配置")
         wechat_layout = QFormLayout()
@@ -866,14 +725,14 @@ class ConfigWidget(QWidget):
             check_result.append(f"   [建议] 执行命令安装缺失库: pip install {' '.join(missing_libs)}")
         check_result.append("")
         
-        # 3. Edge驱动检查
-        check_result.append("3. Edge驱动检查:")
-        driver_path = os.path.join(os.path.dirname(__file__), "msedgedriver.exe")
-        if not os.path.exists(driver_path):
-            check_result.append(f"   [警告] 未在当前目录找到驱动: {os.path.basename(driver_path)}")
+        # 3. 浏览器驱动检查
+        check_result.append("3. 浏览器驱动检查:")
+        driver_path = browser_manager.find_browser()["driver_path"]
+        if not driver_path:
+            check_result.append("   [警告] 未找到浏览器驱动（Windows: 程序目录下的msedgedriver.exe；Linux: msedgedriver或chromedriver）")
             check_result.append("   [建议] 下载地址: https://developer.microsoft.com/zh-cn/microsoft-edge/tools/webdriver/")
         else:
-            check_result.append(f"   [通过] 驱动文件存在: {os.path.basename(driver_path)}")
+            check_result.append(f"   [通过] 驱动文件存在: {driver_path}")
         check_result.append("")
         
         # 4. 浏览器与驱动兼容性检查
@@ -890,6 +749,23 @@ class ConfigWidget(QWidget):
             check_result.append("   [建议] 手动确认浏览器和驱动版本是否一致")
         check_result.append("")
         
+        # 5. 启动自检（无界面启动一次浏览器，在后台线程中执行，完成后再显示报告）
+        self.env_check_status.setText("正在执行浏览器启动自检...")
+        self.env_check_lines = check_result
+        self.self_test_thread = SelfTestThread(self.config['browser']['backend'])
+        self.self_test_thread.result_signal.connect(self.finish_environment_check)
+        self.self_test_thread.start()
+    
+    def finish_environment_check(self, self_test_ok, self_test_lines):
+        """启动自检完成：补全检测报告并显示"""
+        check_result = self.env_check_lines
+        check_result.append("5. 浏览器启动自检:")
+        for line in self_test_lines:
+            check_result.append(f"   {line}")
+        if not self_test_ok:
+            check_result.append("   [错误] 启动自检未通过")
+        check_result.append("")
+        
         # 检测总结
         check_result.append("="*60)
         check_result.append("检测总结:")
@@ -921,7 +797,8 @@ class ConfigWidget(QWidget):
         self.config['timing'] = {
             "normal_interval": self.normal_interval.value(),
             "threshold": self.threshold.value(),
-            "rapid_interval": self.rapid_interval.value()
+            "rapid_interval": self.rapid_interval.value(),
+            "scheduler": self.scheduler_combo.currentData()
         }
         
         # 保存页面设置
@@ -930,6 +807,26 @@ class ConfigWidget(QWidget):
             self.config['page_settings'][page_key]['notify'] = self.page_notify_checks[page_key].isChecked()
         
         self.config['refresh'] = self.refresh_check.isChecked()
+        self.config['refresh_policy'] = {
+            "policy": "stale" if self.refresh_stale_only.isChecked() else "always",
+            "max_idle": self.refresh_max_idle.value()
+        }
+        self.config['detection']['mode'] = self.detection_mode_combo.currentData()
+        self.config['detection']['fingerprint'] = self.fingerprint_check.isChecked()
+        self.config['detection']['shadow'] = self.shadow_mode_combo.currentData()
+        self.config['detection']['visual'] = self.visual_check.isChecked()
+        self.config['capture']['mode'] = self.capture_mode_combo.currentData()
+        self.config['dialogs'] = {
+            "mode": "cdp" if self.dialog_cdp_check.isChecked() else "wait",
+            "neutralize_beforeunload": self.dialog_unload_check.isChecked()
+        }
+        self.config['browser']['profile'] = self.browser_profile_combo.currentData()
+        self.config['browser']['backend'] = self.browser_backend_combo.currentData()
+        self.config['browser']['standby'] = self.standby_check.isChecked()
+        self.config['browser']['max_browsers'] = self.max_browsers_spin.value()
+        self.config['browser']['contexts_per_browser'] = self.contexts_per_browser_spin.value()
+        self.config['supervisor']['heartbeat_timeout'] = self.heartbeat_timeout_spin.value()
+        self.config['supervisor']['memory_limit_mb'] = self.memory_limit_spin.value()
         self.config['wechat']['webhook_url'] = self.wechat_hook.text()
         
         # 保存OCR配置
@@ -1247,10 +1144,12 @@ class MainWindow(QMainWindow):
         self.cycle_count = QLabel("总检测周期: 0")
         self.new_page_count = QLabel("新页面检测: 0")
         self.error_count = QLabel("错误次数: 0")
+        self.reloads_avoided_count = QLabel("避免刷新: 0")
         
         stats_layout.addWidget(self.cycle_count)
         stats_layout.addWidget(self.new_page_count)
         stats_layout.addWidget(self.error_count)
+        stats_layout.addWidget(self.reloads_avoided_count)
         stats_group.setLayout(stats_layout)
         layout.addWidget(stats_group)
         
@@ -1339,8 +1238,10 @@ class MainWindow(QMainWindow):
         # 创建登录线程
         server_url = self.user_config['server']['base_url']
         course_url = self.current_course_url if use_saved_url else None
+        browser_manager.set_browser_backend(self.user_config['browser']['backend'])
         
-        self.login_thread = LoginThread(server_url, course_url)
+        self.login_thread = LoginThread(
+            server_url, course_url, course_manager.get_profile_dir(self.current_course_dir))
         
         # 连接信号
         self.login_thread.log_signal.connect(self.login_dialog.append_log)
@@ -1464,6 +1365,7 @@ class MainWindow(QMainWindow):
         self.cycle_count.setText(f"总检测周期: {stats['total_cycles']}")
         self.new_page_count.setText(f"新页面检测: {stats['new_pages_detected']}")
         self.error_count.setText(f"错误次数: {stats['errors_occurred']}")
+        self.reloads_avoided_count.setText(f"避免刷新: {stats.get('reloads_avoided', 0)}")
     
     def on_new_page_detected(self, page_type, page_number):
         page_name_map = {
@@ -0,0 +1,48 @@
+import os
+import multiprocessing
+
+# 导入自定义模块
+import course_manager
+import config_manager
+import browser_manager
+import supervisor_manager
+import utils
+
+def main():
+    # 初始化默认目录（logs、courses）
+    utils.init_directories()
+    utils.log("="*60)
+    utils.log("         雨课堂页面更新检测工具（监护进程模式）")
+    utils.log("="*60)
+    print("每门课程在独立的子进程中运行，卡死、崩溃或内存超限时自动重启，互不影响")
+    print("子进程无法等待扫码：请先用命令行版或界面版分别打开各课程完成登录（保存课程URL与登录状态）")
+
+    # 加载配置
+    utils.log("\n【配置文件处理】")
+    user_config = config_manager.load_config()
+    browser_manager.set_browser_backend(user_config['browser']['backend'])
+    if browser_manager.get_browser_backend() == "selenium" and not browser_manager.find_browser()["driver_path"]:
+        utils.log("[错误] 未找到浏览器驱动（Windows: 程序目录下的msedgedriver.exe；Linux: msedgedriver或chromedriver）")
+        return
+
+    # 选择要监护的课程
+    courses = course_manager.select_multiple_courses(minimum=1)
+    if not courses:
+        print("未选择课程，程序已退出")
+        return
+
+    supervisor = supervisor_manager.Supervisor(
+        [(course_name, os.path.basename(course_data[0])) for course_name, course_data in courses], user_config)
+    try:
+        supervisor.run()
+
+    except KeyboardInterrupt:
+        utils.log("\n【用户操作】检测到Ctrl+C，停止全部监控子进程")
+
+    finally:
+        supervisor.stop()
+        print("\n程序已退出，汇总统计见 logs/supervisor_status.json，各课程日志见课程目录下的 logs/monitor.log")
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 打包为exe时子进程入口
+    main()
@@ -0,0 +1,597 @@
+import time
+import threading
+from datetime import datetime
+from selenium.common.exceptions import InvalidSessionIdException
+
+# 导入自定义模块
+import course_manager
+import browser_manager
+import detection_manager
+import capture_manager
+import scheduler_manager
+import problem_manager
+import visual_manager
+import shadow_manager
+import standby_manager
+import resource_manager
+import notification_manager
+import ai_manager
+import wait_manager
+import utils  # 导入通用工具模块
+
+# 引擎发布的事件类型（订阅 "*" 可接收全部事件）
+EVENT_TYPES = {
+    "log": "日志信息",              # message
+    "status": "运行状态",           # status
+    "cycle_start": "检测周期开始",  # cycle, time, interval, rapid
+    "page_detected": "识别到页面",  # url, page_type, page_number, is_new, monitored, change
+    "image_captured": "获取到题目图片",  # page_type, page_number, src, image_path
+    "notification_sent": "已发送通知",   # channel(system/wechat/ai), page_type, page_number
+    "error": "异常",                # message, fatal
+    "stats": "统计信息"             # stats
+}
+
+PAGE_NAME_MAP = {
+    "ppt": "PPT",
+    "exercise": "选择题",
+    "blank": "填空题",
+    "subjective": "主观题"
+}
+
+
+def new_history():
+    return {"ppt": set(), "exercise": set(), "blank": set(), "subjective": set()}
+
+
+def new_stats():
+    return {"total_cycles": 0, "new_pages_detected": 0, "errors_occurred": 0, "reloads_avoided": 0}
+
+
+class MonitorEngine:
+    """监控核心（不依赖界面）：执行检测周期并通过事件发布结果，命令行与图形界面作为订阅者
+
+    用法：engine.subscribe("log", callback)；engine.start()；engine.run()（或逐次调用run_cycle()）；engine.close()
+    """
+
+    max_consec_errors = 3   # 最大连续错误次数
+    reconnect_after = 3 * 60  # 超过该秒数未成功检测则重连浏览器
+
+    def __init__(self, course_dir, course_url, user_config, driver, history=None, stats=None, server_name=None,
+                 interactive=True, shared_browser=False):
+        self.course_dir = course_dir
+        self.course_url = course_url
+        self.user_config = user_config
+        self.driver = driver
+        self.server_name = server_name or user_config['server']['name']
+        self.history = history if history is not None else new_history()
+        self.stats = stats if stats is not None else new_stats()
+        self.stats.setdefault("reloads_avoided", 0)  # 兼容旧版课程数据
+        self.interactive = interactive  # 重连需要扫码时是否可在控制台等待（图形界面为False）
+        self.shared_browser = shared_browser  # driver为共享浏览器中的课程标签页（tab_manager.LessonTab），重连时只重新打开标签页
+        self.profile_dir = course_manager.get_profile_dir(course_dir)  # 课程专属浏览器用户数据目录
+        self.cookie_path = course_manager.get_cookie_snapshot_path(course_dir)  # 登录Cookie快照
+        self.lean = user_config['browser']['profile'] == "lean"  # 监控使用精简无界面浏览器（登录仍在有窗口的浏览器中完成）
+        self.resources = resource_manager.ResourceReport()  # 浏览器资源占用统计
+        self.running = False
+        self.subscribers = {}  # key: 事件类型, value: 回调列表
+
+        self.scheduler = scheduler_manager.create_scheduler(
+            user_config['timing']['scheduler'], user_config['timing'], course_manager.load_course_detections(course_dir),
+            browser_manager.extract_course_id(course_url or ""))
+        self.interval_time = self.scheduler.next_interval()  # 当前检测间隔
+        self.problem_tracker = problem_manager.ProblemTracker(user_config['timing']['threshold'])  # 题目生命周期跟踪
+        self.fingerprints = detection_manager.SlideFingerprintIndex() if user_config['detection']['fingerprint'] else None  # 幻灯片内容指纹
+        self.page_images = {}  # key: (页面类型, 页面编号), value: 最近一次读取到的图片地址（不含查询参数）
+        self.visual_detector = visual_manager.VisualChangeDetector() if user_config['detection']['visual'] else None  # 画面变化检测
+        self.detector = detection_manager.create_detector(user_config['detection']['mode'], course_url)  # 页面变化检测器
+        self.browser_free = getattr(self.detector, "browser_free", False)  # 检测过程中是否无需浏览器
+        self.payload_cache = capture_manager.create_payload_cache(user_config['capture']['mode'])  # 课件/题目接口数据缓存
+        self.refresh_policy = browser_manager.RefreshPolicy(
+            user_config['refresh_policy']['policy'], user_config['refresh_policy']['max_idle'])  # 刷新策略
+        self.shadow = shadow_manager.create_shadow(
+            user_config['detection']['mode'], user_config['detection']['shadow'])  # 影子模式候选检测器（仅记录，不触发通知）
+        if self.shadow:
+            self.subscribe("page_detected", self.shadow.on_page_detected)
+        # 热备浏览器总是以精简无界面配置启动（不在用户窗口旁再打开一个窗口），切换后继续无界面监控
+        self.standby = standby_manager.WarmStandby(
+            course_url, course_manager.get_standby_profile_dir(course_dir), self.cookie_path, lean=True
+        ) if user_config['browser']['standby'] and not self.browser_free and not shared_browser else None  # 热备浏览器（主浏览器失效时立即切换）
+        self.wechat_hook = user_config['wechat']['webhook_url']  # 企业微信WebHook
+        self.last_succ_detect = time.time()  # 上次成功检测时间
+        self.consec_errors = 0  # 当前连续错误次数
+
+    # ---------- 事件 ----------
+
+    def subscribe(self, event, callback):
+        """订阅事件，callback以关键字参数接收事件数据"""
+        self.subscribers.setdefault(event, []).append(callback)
+
+    def emit(self, event, **data):
+        """发布事件：按类型订阅的回调接收关键字参数，订阅 "*" 的回调接收 (事件类型, 数据字典)"""
+        for callback in self.subscribers.get(event, []):
+            self._call(callback, **data)
+        for callback in self.subscribers.get("*", []):
+            self._call(callback, event, data)
+
+    def _call(self, callback, *args, **kwargs):
+        try:
+            callback(*args, **kwargs)
+        except Exception as e:
+            utils.log(f"[监控引擎] 事件订阅者处理异常: {str(e)}")  # 订阅者异常不影响检测
+
+    def log(self, message):
+        self.emit("log", message=message)
+
+    def error(self, message, fatal=False):
+        self.emit("error", message=message, fatal=fatal)
+
+    # ---------- 生命周期 ----------
+
+    def start(self, navigate=False, stop_hint="按Ctrl+C停止"):
+        """监控开始前的准备：对话框处理、检测器/接口缓存/调度器初始化，并输出监控配置"""
+        browser_manager.set_dialog_handling(
+            self.user_config['dialogs']['mode'], self.user_config['dialogs']['neutralize_beforeunload'])  # 对话框处理方式
+        if navigate:
+            self.log(f"导航到课程页面: {self.course_url}")
+            wait_manager.navigate(self.driver, self.course_url, label="课程页加载")
+            browser_manager.handle_all_alerts(self.driver)
+        if self.lean and self.driver and not self.browser_free and not self.shared_browser \
+                and not browser_manager.is_lean_browser(self.driver):
+            self._switch_to_lean()
+        self.detector.prepare(self.driver)
+        if self.payload_cache:
+            self.payload_cache.prepare(self.driver)
+        self.scheduler.prepare(self.driver, self.course_url, self.payload_cache)
+        if self.shadow:
+            self.shadow.prepare(self.driver)
+        self._snapshot_cookies()
+        if self.driver:
+            self.log(f"浏览器资源占用 - {self.resources.record(self._profile_label(), self.driver)}")
+        if self.browser_free and self.driver:
+            # 登录Cookie已导出，关闭浏览器节省资源（登录失效时再启动浏览器）
+            self.log("已导出登录状态，关闭浏览器，改为直接请求课程接口")
+            self._quit_browser()
+        if self.standby:
+            self.standby.start()  # 登录Cookie快照已保存，后台启动热备浏览器
+
+        user_config = self.user_config
+        self.log("\n" + "="*60)
+        self.log(f"          开始进入监控循环（{stop_hint}）")
+        self.log("="*60)
+        self.log(f"监控配置: 常规间隔={user_config['timing']['normal_interval']}s | 快速间隔={user_config['timing']['rapid_interval']}s")
+        self.log(f"          快速阈值={user_config['timing']['threshold']}s | 刷新设置={'启用' if user_config['refresh'] else '禁用'}（策略: {user_config['refresh_policy']['policy']}）")
+        self.log(f"          调度方式: {scheduler_manager.SCHEDULER_MODES.get(self.scheduler.name, self.scheduler.name)}")
+        self.log(f"          检测方式: {detection_manager.DETECTION_MODES.get(user_config['detection']['mode'], user_config['detection']['mode'])}")
+        if self.shadow:
+            self.log(f"          影子模式: {detection_manager.DETECTION_MODES.get(self.shadow.shadow_mode, self.shadow.shadow_mode)}（仅记录，不触发通知）")
+        self.log(f"          浏览器配置: {browser_manager.BROWSER_PROFILES.get(user_config['browser']['profile'], user_config['browser']['profile'])}")
+        if self.standby:
+            self.log("          热备浏览器: 启用（主浏览器失效时立即切换）")
+        self.log(f"          AI分析: {'启用' if user_config['ai']['enable'] else '禁用'} | OCR: {'已配置' if (user_config['ocr']['apikey'] and user_config['ocr']['secretkey']) else '未配置'}")
+        self.log(f"          课程目录: {self.course_dir}")
+        self.log("="*60 + "\n")
+
+    def run(self):
+        """持续执行检测周期，直到stop()被调用"""
+        self.running = True
+        self.emit("status", status="监控中")
+        try:
+            while self.running:
+                self.run_cycle()
+        except Exception as e:
+            self.log(f"【严重错误】监控主循环异常终止: {str(e)}")
+            import traceback
+            self.log(f"异常堆栈: {traceback.format_exc()}")
+            self.emit("status", status=f"监控异常: {str(e)}")
+            self.error(str(e), fatal=True)
+
+    def stop(self):
+        """请求停止（当前周期结束后退出run）"""
+        self.running = False
+
+    def save(self):
+        """保存课程数据"""
+        course_manager.save_course_data(
+            self.course_dir, self.course_url, self.server_name, self.history, self.stats, self.scheduler.detections)
+
+    def close(self, quit_browser=True):
+        """保存课程数据、输出统计信息并关闭浏览器"""
+        self.save()
+        self.log("\n" + "="*60)
+        self.log("          监控程序结束 - 统计信息")
+        self.log("="*60)
+        self.log(f"总检测周期: {self.stats['total_cycles']}次")
+        self.log(f"检测到新页面: {self.stats['new_pages_detected']}个")
+        self.log(f"发生错误次数: {self.stats['errors_occurred']}次")
+        for line in wait_manager.format_wait_stats():
+            self.log(f"等待耗时 - {line}")
+        self.log(f"避免刷新次数: {self.stats['reloads_avoided']}次")
+        if self.browser_free and self.detector.client:
+            self.log(f"HTTP轮询请求: {self.detector.client.requests}次, 共{self.detector.client.bytes / 1024:.1f}KB")
+        if self.shadow:
+            for line in self.shadow.save_report(self.course_dir):
+                self.log(f"影子模式 - {line}")
+        if self.standby:
+            self.log(f"热备浏览器切换次数: {self.standby.swaps}次")
+        if self.driver:
+            self.resources.record(self._profile_label(), self.driver)
+        for line in self.resources.lines():
+            self.log(f"浏览器资源占用 - {line}")
+        self.log(f"PPT页面历史: {len(self.history['ppt'])}个")
+        self.log(f"选择题页面历史: {len(self.history['exercise'])}个")
+        self.log(f"填空题页面历史: {len(self.history['blank'])}个")
+        self.log(f"主观题页面历史: {len(self.history['subjective'])}个")
+        self.log(f"课程数据已保存至: {self.course_dir}")
+        self.log("="*60)
+        self.emit("stats", stats=self.stats.copy())
+
+        if hasattr(self.detector, "close"):
+            self.detector.close()  # 断开推送连接
+        if self.standby:
+            self.standby.close()
+        if quit_browser:
+            self._quit_browser()
+        self.emit("status", status="监控已停止")
+
+    def _quit_browser(self):
+        if not self.driver:
+            return
+        try:
+            browser_manager.handle_all_alerts(self.driver)
+            self.driver.quit()
+            self.log("浏览器已成功关闭")
+        except Exception as e:
+            self.log(f"关闭浏览器时发生错误: {str(e)}")
+        self.driver = None
+
+    def _launch_browser(self):
+        """启动浏览器并恢复登录状态（用户数据目录/Cookie快照），返回driver或None"""
+        self.emit("relaunching")  # 重新启动浏览器需数十秒至数分钟（多次尝试与退避），期间不会开始新的检测周期
+        return browser_manager.reconnect_browser(
+            self.course_url, self.profile_dir, self.cookie_path, self.interactive, self.lean)
+
+    def _profile_label(self):
+        return "精简浏览器" if self.lean else "标准浏览器"
+
+    def _switch_to_lean(self):
+        """登录完成后改用精简无界面浏览器：保存登录状态，关闭登录用的浏览器，再以精简配置启动"""
+        self.log(f"浏览器资源占用 - {self.resources.record('登录浏览器（切换前）', self.driver)}")
+        self._snapshot_cookies()
+        self.log("切换到精简无界面浏览器...")
+        self._quit_browser()
+        self.driver = self._launch_browser()
+        if not self.driver:
+            self.log("精简浏览器启动失败，将在检测周期中重试")
+
+    def _snapshot_cookies(self):
+        """保存登录Cookie快照（登录后及每10个周期刷新）"""
+        count = browser_manager.save_cookie_snapshot(self.driver, self.cookie_path)
+        if count:
+            self.log(f"已保存登录Cookie快照（{count}个）")
+
+    def _reauthenticate(self):
+        """HTTP轮询模式：启动浏览器重新登录，导出新的登录Cookie后再关闭浏览器"""
+        self.log("【提示】登录状态失效，启动浏览器重新登录...")
+        driver = self._launch_browser()
+        if not driver:
+            self.log("重新登录失败，稍后重试")
+            return False
+        self.driver = driver
+        self._snapshot_cookies()
+        ok = self.detector.prepare(driver)
+        self._quit_browser()
+        return ok
+
+    def reattach_driver(self):
+        """更换浏览器后重新初始化检测器与接口缓存（重新注入监听脚本/开启网络监听）"""
+        self.detector.prepare(self.driver)
+        if self.payload_cache:
+            self.payload_cache.prepare(self.driver)
+        if self.shadow:
+            self.shadow.prepare(self.driver)
+
+    # ---------- 检测周期 ----------
+
+    def run_cycle(self, wait=True):
+        """执行一个检测周期；wait=False时不等待下一周期（便于无界面测试与基准测试）"""
+        self.stats["total_cycles"] += 1
+        current_cycle = self.stats["total_cycles"]
+        cycle_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        self.log(f"\n[检测周期 {current_cycle}] 开始时间: {cycle_time}")
+        self.interval_time = self.scheduler.next_interval()
+        self.emit("cycle_start", cycle=current_cycle, time=cycle_time,
+                  interval=self.interval_time, rapid=bool(self.scheduler.rapid_mode_start))
+        self.log(f"当前状态: 间隔={self.interval_time}s | 快速模式={'已启用' if self.scheduler.rapid_mode_start else '未启用'}")
+        self.log(f"性能统计: 新页面={self.stats['new_pages_detected']} | 错误数={self.stats['errors_occurred']} | 连续错误={self.consec_errors} | 已避免刷新={self.stats['reloads_avoided']}")
+        self.emit("stats", stats=self.stats.copy())
+
+        # 定期保存课程数据（每10个周期）
+        if current_cycle % 10 == 0:
+            self.save()
+            self.log("课程数据已保存")
+            self._snapshot_cookies()
+            if self.standby:
+                self.standby.check()
+            if self.driver:
+                # 每门课程的浏览器资源占用（用于估算一台机器可运行的监控数量）
+                sample = resource_manager.sample_browser(self.driver)
+                self.log(f"浏览器资源占用（课次{browser_manager.extract_course_id(self.course_url) or '未知'}）: {resource_manager.ResourceReport.describe(sample)}")
+
+        # HTTP轮询模式：登录失效或长时间未成功检测时重新登录
+        if self.browser_free:
+            if self.detector.auth_expired or time.time() - self.last_succ_detect > self.reconnect_after:
+                if not self._reauthenticate():
+                    self._pause(wait)
+                    return
+                self.last_succ_detect = time.time()
+                self.consec_errors = 0
+
+        # 3分钟未成功检测，强制重连浏览器
+        elif time.time() - self.last_succ_detect > self.reconnect_after:
+            self.log("【警告】已超过3分钟未成功检测，尝试重连浏览器...")
+            self._reconnect()
+            self.consec_errors = 0
+
+        # 浏览器未连接，尝试重连
+        if not self.driver and not self.browser_free:
+            self._reconnect()
+            if not self.driver:
+                self.log(f"无法重新连接浏览器，{self.interval_time}秒后重试...")
+                self._pause(wait)
+                return
+
+        try:
+            self._detect(current_cycle, cycle_time, wait)
+
+        except InvalidSessionIdException:
+            self.log("【错误】浏览器会话已失效（可能已关闭）")
+            self.error("浏览器会话已失效")
+            self.consec_errors += 1
+            self.stats["errors_occurred"] += 1
+            self._reconnect()
+            self._pause(wait)
+
+        except Exception as e:
+            self.log(f"【错误】检测周期中发生异常: {str(e)}")
+            self.error(str(e))
+            self.consec_errors += 1
+            self.stats["errors_occurred"] += 1
+            if self.consec_errors >= self.max_consec_errors:
+                self.log(f"连续错误次数达到{self.max_consec_errors}次，触发重新连接...")
+                self._reconnect()
+                self.consec_errors = 0
+            self._pause(wait)
+
+    def _reconnect(self):
+        """重连浏览器：优先切换到热备浏览器，否则重新启动（HTTP轮询模式下浏览器只用于重新登录，由登录失效触发）"""
+        if self.browser_free:
+            self.log("HTTP轮询模式不重启浏览器（仅在登录失效时重新登录）")
+            return
+        if self.shared_browser:
+            # 多课程共用浏览器：只重新打开本课程的标签页（浏览器已失效时由SharedBrowser重新启动）
+            if self.driver.reopen():
+                wait_manager.navigate(self.driver, self.course_url, require_app=False, label="重新打开课程页")
+                self.reattach_driver()
+            else:
+                self.log("重新打开课程标签页失败，稍后重试")
+            return
+        if self.standby:
+            driver, profile_dir = self.standby.take(self.driver, self.profile_dir)
+            if driver:
+                # 旧浏览器由热备线程在后台关闭，并在其用户数据目录中重建新的热备浏览器
+                self.driver, self.profile_dir = driver, profile_dir
+                self.log(f"已切换到热备浏览器（第{self.standby.swaps}次），后台重建热备")
+                self.reattach_driver()
+                return
+            self.log("热备浏览器未就绪，重新启动浏览器")
+        if self.driver:
+            self._quit_browser()
+        self.driver = self._launch_browser()
+        if self.driver:
+            self.reattach_driver()
+
+    def _pause(self, wait, use_detector=False, snapshot=None):
+        """等待下一周期：事件驱动检测器可提前返回；启用画面变化检测时等待期间约每秒采样一次，画面变化即提前返回"""
+        if not wait:
+            return
+        if snapshot and self._visual_fallback(snapshot):
+            deadline = time.time() + self.interval_time
+            while True:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return
+                step = min(self.visual_detector.sample_interval, remaining)
+                if use_detector:
+                    if self.detector.wait(self.driver, step):
+                        return
+                else:
+                    time.sleep(step)
+                if self.visual_detector.sample(self.driver, snapshot):
+                    return
+        if use_detector:
+            self.detector.wait(self.driver, self.interval_time)
+        else:
+            time.sleep(self.interval_time)
+
+    def _detect(self, current_cycle, cycle_time, wait):
+        user_config = self.user_config
+        driver = self.driver
+
+        # 按配置刷新页面（事件驱动检测方式无需刷新）
+        if user_config['refresh'] and not self.detector.reload_free:
+            if self.refresh_policy.should_reload(driver):
+                self.log("执行页面刷新操作...")
+                browser_manager.handle_all_alerts(driver)  # 处理刷新前弹窗
+                wait_manager.navigate(driver, self.course_url, label="页面刷新")  # 等待页面就绪
+                browser_manager.handle_all_alerts(driver)  # 处理刷新后弹窗
+                self.log("页面刷新完成")
+            else:
+                self.stats["reloads_avoided"] += 1
+                self.log(f"页面状态正常，跳过刷新（累计避免刷新{self.stats['reloads_avoided']}次）")
+
+        # 读取本周期页面快照（一次脚本往返：URL、页面类型、图片、弹窗状态）
+        if self.browser_free:
+            snapshot = self.detector.read_snapshot()  # 直接请求课程接口
+        else:
+            snapshot = detection_manager.read_cycle_snapshot(driver, user_config['xpaths'])
+        current_page_url = snapshot["url"] if snapshot else None
+        if not current_page_url:
+            self.log("无法获取当前页面URL")
+            self.consec_errors += 1
+            self.stats["errors_occurred"] += 1
+
+            # 连续错误达到阈值，重连浏览器
+            if self.consec_errors >= self.max_consec_errors:
+                self.log(f"连续错误次数达到{self.max_consec_errors}次，触发浏览器重连...")
+                self._reconnect()
+                self.consec_errors = 0
+            self._pause(wait)
+            return
+
+        self.log(f"当前页面URL: {current_page_url}")
+        if self.shadow and driver:
+            self.shadow.poll(driver, current_page_url)
+
+        # 识别页面类型（PPT/选择题/填空题/主观题）和页面编号
+        page_type, page_number = snapshot["page_type"], snapshot["page_number"]
+
+        # 未识别到监控页面类型（如课程目录页）
+        if not (page_type and page_number):
+            self.log("未识别到已知页面类型（可能在课程目录页）")
+            self.consec_errors = 0
+            self.last_succ_detect = time.time()
+            self._pause(wait, use_detector=True)
+            return
+
+        self.log(f"识别到页面类型: {page_type}，编号: {page_number}")
+        self._log_if(self.scheduler.set_lesson_start(
+            snapshot.get("lesson_start") or (self.payload_cache.lesson_start if self.payload_cache else None)))
+        self._log_if(self.scheduler.observe(driver, page_type, page_number))
+
+        # 更新题目状态（已截止的题目提前结束快速模式）
+        for msg in self.problem_tracker.update(page_type, page_number, snapshot):
+            self.log(msg)
+        self._log_if(self.scheduler.on_problem_state(self.problem_tracker))
+        self.interval_time = self.scheduler.next_interval()
+
+        # 判断是否为新页面+是否需要监控（下载/通知）
+        is_new_page = page_number not in self.history[page_type]
+        content_change = self.fingerprints.classify(
+            current_page_url, page_type, page_number, snapshot.get("fingerprint")) if self.fingerprints else None
+        images = tuple(src.split("?")[0] for src in snapshot.get("images") or [])
+        previous_images = self.page_images.get((page_type, page_number))
+        self.page_images[(page_type, page_number)] = images
+        if content_change == "updated" and not is_new_page and page_type != "ppt" and images == previous_images:
+            # 题目页的作答状态变化（已提交、公布答案等）不重复通知，只有题目图片变化才视为重新发布
+            self.log(f"{page_type}页面{page_number}内容有变化但题目图片未变，不重复处理")
+        elif content_change == "updated" and not is_new_page:
+            self.log(f"{page_type}页面{page_number}内容已更新（页码未变），按新页面处理")
+            is_new_page = True
+        elif content_change == "revisited":
+            self.log(f"{page_type}页面{page_number}为已出现过的内容")
+
+        # 画面变化检测（兜底：未定位到幻灯片区域或未启用内容指纹时生效）
+        visual_change = self.visual_detector.check(driver, snapshot) if self._visual_fallback(snapshot) else False
+        if visual_change and not is_new_page:
+            self.log(f"{page_type}页面{page_number}画面已变化（页码未变），按新页面处理")
+            is_new_page = True
+            content_change = "visual"
+        is_monitored_page = (user_config['page_settings'][page_type]['notify'] or
+                             user_config['page_settings'][page_type]['download'])
+        self.emit("page_detected", url=current_page_url, page_type=page_type, page_number=page_number,
+                  is_new=is_new_page, monitored=is_monitored_page, change=content_change)
+
+        if is_monitored_page and is_new_page:
+            self._handle_new_page(page_type, page_number, cycle_time, snapshot)
+
+        elif is_monitored_page and not is_new_page:
+            # 快速模式超时判断（恢复常规间隔）
+            self._log_if(self.scheduler.on_known_page())
+            self.interval_time = self.scheduler.next_interval()
+
+        else:
+            self.log(f"当前页面类型({page_type})未配置监控，保持间隔{self.interval_time}秒")
+
+        # 重置错误计数与检测时间
+        self.consec_errors = 0
+        self.last_succ_detect = time.time()
+        browser_manager.handle_all_alerts(self.driver)
+
+        # 等待下一个检测周期
+        self.log(f"检测周期{current_cycle}完成，{self.interval_time}秒后进行下一次检测...")
+        self._pause(wait, use_detector=True, snapshot=snapshot)
+
+    def _visual_fallback(self, snapshot):
+        """是否使用画面变化检测（已启用，且未定位到幻灯片区域或未启用内容指纹）"""
+        return bool(self.visual_detector and self.driver and not (self.fingerprints and snapshot.get("fingerprint")))
+
+    def _log_if(self, message):
+        if message:
+            self.log(message)
+
+    def _handle_new_page(self, page_type, page_number, cycle_time, snapshot):
+        """新页面处理：进入快速模式、记录历史、获取图片、发送通知、AI解答"""
+        settings = self.user_config['page_settings'][page_type]
+
+        # 1. 进入快速模式
+        self.log(self.scheduler.on_new_page(page_type, page_number))
+        self.interval_time = self.scheduler.next_interval()
+
+        # 2. 更新历史记录与统计
+        self.history[page_type].add(page_number)
+        self.stats["new_pages_detected"] += 1
+
+        # 3. 获取页面图片（优先接口数据，其次XPath定位）并按配置下载
+        image_path = None
+        try:
+            img_src = capture_manager.get_page_image_src(
+                self.driver, page_type, page_number, self.user_config['xpaths'], self.payload_cache, snapshot)
+            if img_src:
+                self.log(f"获取到{page_type}页面图片资源: {img_src[:100]}...")
+                if settings['download']:
+                    image_path = utils.download_image(img_src, self.course_dir, page_type, page_number)
+                self.emit("image_captured", page_type=page_type, page_number=page_number,
+                          src=img_src, image_path=image_path)
+        except Exception as e:
+            self.log(f"{page_type}页面元素处理异常: {str(e)}")
+            self.stats["errors_occurred"] += 1
+
+        # 4. 发送通知（系统通知+微信通知）
+        if settings['notify']:
+            notification_manager.send_system_notification(
+                title=f"新{page_type}页面",
+                message=f"编号: {page_number}\n时间: {cycle_time}\n课程URL: {self.course_url}"
+            )
+            self.emit("notification_sent", channel="system", page_type=page_type, page_number=page_number)
+
+            # 发送企业微信通知（按配置）
+            if self.wechat_hook:
+                notification_manager.send_wechat_notification(
+                    webhook_url=self.wechat_hook,
+                    title=f"新{PAGE_NAME_MAP[page_type]}页面提醒",
+                    content=f"页面编号：{page_number}\n课程URL：{self.course_url}",
+                    image_path=image_path
+                )
+                self.emit("notification_sent", channel="wechat", page_type=page_type, page_number=page_number)
+
+        # 5. 用 ai 解答（需已下载题目图片）
+        if self.user_config['ai']['enable'] and image_path:
+            ai_thread = threading.Thread(target=self._ai_process_and_notify, args=(page_type, page_number, image_path))
+            ai_thread.daemon = True  # 设为守护线程，主程序退出时自动关闭
+            ai_thread.start()  # 启动线程（异步执行，不阻塞主循环）
+
+    def _ai_process_and_notify(self, page_type, page_number, image_path):
+        ai_answer = ai_manager.get_ai_answer(
+            ocr_config=self.user_config['ocr'],
+            ai_config=self.user_config['ai'],
+            image_path=image_path
+        )
+        if self.wechat_hook and ai_answer:
+            notification_manager.send_ai_notification(
+                webhook_url=self.wechat_hook,
+                title=f"新{PAGE_NAME_MAP[page_type]}页面分析",
+                content=ai_answer
+            )
+            self.emit("notification_sent", channel="ai", page_type=page_type, page_number=page_number)
+        self.log(f"AI分析完成: {ai_answer[:100]}..." if ai_answer else "AI分析未获取到结果")
@@ -0,0 +1,327 @@
+import json
+import time
+import asyncio
+import threading
+import itertools
+import concurrent.futures
+from collections import deque
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import (
+    WebDriverException, TimeoutException, InvalidSessionIdException,
+    NoAlertPresentException, NoSuchWindowException
+)
+import utils  # 导入通用工具模块
+
+# 可选依赖：playwright（未安装时只能使用Selenium后端）
+try:
+    from playwright.async_api import async_playwright, Error as PlaywrightError
+    PLAYWRIGHT_AVAILABLE = True
+except ImportError:
+    async_playwright = None
+    PlaywrightError = Exception
+    PLAYWRIGHT_AVAILABLE = False
+
+# 通过CDP会话原生订阅、并按性能日志格式提供给CdpEventPump的事件
+CDP_LOG_EVENTS = ["Network.webSocketFrameReceived", "Network.responseReceived", "Network.loadingFinished"]
+
+# 所有Playwright浏览器共用一个后台事件循环，一个进程可同时驱动多个课程
+_loop = None
+_loop_lock = threading.Lock()
+_playwright = None
+
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, daemon=True).start()
+        return _loop
+
+
+def run(coro, timeout=None):
+    """在后台事件循环中执行协程并等待结果（供同步的监控代码调用）"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result(timeout)
+
+
+async def _start_playwright():
+    global _playwright
+    if _playwright is None:
+        _playwright = await async_playwright().start()
+    return _playwright
+
+
+class PlaywrightElement:
+    """页面元素（提供capture_manager使用的find_elements/get_attribute）"""
+
+    def __init__(self, driver, handle):
+        self.driver = driver
+        self.handle = handle
+
+    def find_elements(self, by, value):
+        selector = {By.XPATH: f"xpath={value}", By.TAG_NAME: value, By.CSS_SELECTOR: value}.get(by, value)
+        handles = self.driver._run(self.handle.query_selector_all(selector))
+        return [PlaywrightElement(self.driver, handle) for handle in handles]
+
+    def get_attribute(self, name):
+        # 与Selenium一致：优先返回元素属性（如src为完整URL），其次返回HTML特性
+        return self.driver._run(self.handle.evaluate(
+            "(el, name) => (el[name] !== undefined && el[name] !== null && el[name] !== '') ? String(el[name]) : el.getAttribute(name)",
+            name))
+
+
+class _SwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        page = self.driver._pages.get(handle)
+        if not page or page.is_closed():
+            raise NoSuchWindowException(f"标签页不存在: {handle}")
+        self.driver.page = page
+
+    def new_window(self, type_hint="tab"):
+        """新建标签页并切换到该标签页"""
+        driver = self.driver
+        page = driver._run(driver.context.new_page())
+        driver._run(driver._attach(page))
+        driver.page = page
+
+    @property
+    def alert(self):
+        # 对话框在出现时已由事件回调确认，不会残留
+        raise NoAlertPresentException("Playwright后端在对话框出现时已自动确认")
+
+
+class PlaywrightDriver:
+    """Playwright（异步）浏览器的同步封装，提供监控代码使用的WebDriver接口子集
+
+    CDP事件通过CDP会话原生订阅（不再轮询性能日志），对话框在出现时由事件回调立即确认，
+    读取URL不需要与浏览器往返；其余调用在共用的后台事件循环中执行
+    """
+    native_dialogs = True  # 对话框由后端自动确认，handle_all_alerts无需等待
+
+    def __init__(self, context, browser=None):
+        self.context = context
+        self.browser = browser
+        self.service = None  # 无msedgedriver进程（资源统计只读取页面JS堆）
+        self.session_id = f"playwright-{id(self):x}"
+        self.script_timeout = 30
+        self.closed = False
+        self.log_entries = deque(maxlen=2000)  # 按性能日志格式缓存的CDP事件
+        self.context_options = {}  # 新建隔离上下文时使用的选项（视口）
+        self._contexts = {}   # 上下文ID -> 隔离的浏览器上下文（open_isolated_tab创建）
+        self._pages = {}      # 句柄 -> 页面
+        self._handles = {}    # 页面 -> 句柄
+        self._sessions = {}   # 页面 -> CDP会话
+        self._counter = itertools.count(1)
+        self.switch_to = _SwitchTo(self)
+        self.page = None
+
+    async def _attach(self, page):
+        """记录标签页并订阅对话框与CDP事件"""
+        if page in self._handles:
+            return
+        handle = f"page-{next(self._counter)}"
+        self._pages[handle] = page
+        self._handles[page] = handle
+        page.on("dialog", self._on_dialog)
+        session = await page.context.new_cdp_session(page)
+        for method in CDP_LOG_EVENTS:
+            session.on(method, lambda params, method=method, handle=handle: self._record(method, params, handle))
+        self._sessions[page] = session
+
+    async def _setup(self):
+        self.context.on("page", lambda page: asyncio.ensure_future(self._attach(page)))
+        self.context.on("close", lambda *args: setattr(self, "closed", True))
+        page = self.context.pages[0] if self.context.pages else await self.context.new_page()
+        for existing in self.context.pages:
+            await self._attach(existing)
+        self.page = page
+
+    def _record(self, method, params, handle=None):
+        # webview与Selenium性能日志一致，标识事件所属的标签页
+        self.log_entries.append({
+            "message": json.dumps({"message": {"method": method, "params": params}, "webview": handle}),
+            "timestamp": time.time() * 1000
+        })
+
+    async def _on_dialog(self, dialog):
+        self._record("Page.javascriptDialogOpening", {"message": dialog.message, "type": dialog.type},
+                     self._handles.get(getattr(dialog, "page", None)))
+        try:
+            await dialog.accept()
+        except PlaywrightError:
+            pass
+
+    def _run(self, coro, timeout=None):
+        if self.closed:
+            coro.close()
+            raise InvalidSessionIdException("浏览器已关闭")
+        try:
+            return run(coro, timeout)
+        except concurrent.futures.TimeoutError:
+            raise TimeoutException(f"浏览器调用超过{timeout}秒未返回")
+        except PlaywrightError as e:
+            message = str(e)
+            if "closed" in message.lower():
+                self.closed = True
+                raise InvalidSessionIdException(message)
+            raise WebDriverException(message)
+
+    # ---------- WebDriver接口子集 ----------
+
+    @property
+    def current_url(self):
+        if self.closed or not self.page or self.page.is_closed():
+            raise InvalidSessionIdException("浏览器已关闭")
+        return self.page.url
+
+    @property
+    def title(self):
+        return self._run(self.page.title())
+
+    @property
+    def window_handles(self):
+        return [handle for handle, page in self._pages.items() if not page.is_closed()]
+
+    @property
+    def current_window_handle(self):
+        return self._handles.get(self.page)
+
+    def get(self, url):
+        self._run(self.page.goto(url, wait_until="load", timeout=30000))
+
+    def execute_script(self, script, *args):
+        expression = "(args) => (function () {\n%s\n}).apply(null, args)" % script
+        return self._run(self.page.evaluate(expression, list(args)), self.script_timeout)
+
+    def execute_async_script(self, script, *args):
+        expression = ("(args) => new Promise((resolve) => { (function () {\n%s\n}).apply(null, args.concat([resolve])); })"
+                      % script)
+        return self._run(self.page.evaluate(expression, list(args)), self.script_timeout)
+
+    def set_script_timeout(self, seconds):
+        self.script_timeout = seconds
+
+    def execute_cdp_cmd(self, method, params):
+        if self.page not in self._sessions:
+            self._run(self._attach(self.page))  # 新标签页的事件回调尚未执行
+        return self._run(self._sessions[self.page].send(method, params or {})) or {}
+
+    def get_log(self, log_type):
+        """返回并清空自上次读取以来的CDP事件（格式与Selenium性能日志相同）"""
+        if log_type != "performance":
+            return []
+        entries = []
+        while self.log_entries:
+            entries.append(self.log_entries.popleft())
+        return entries
+
+    def get_cookies(self):
+        cookies = []
+        for cookie in self._run(self.page.context.cookies()):
+            item = {k: cookie[k] for k in ("name", "value", "domain", "path", "httpOnly", "secure", "sameSite") if k in cookie}
+            if cookie.get("expires", -1) > 0:
+                item["expiry"] = int(cookie["expires"])
+            cookies.append(item)
+        return cookies
+
+    def add_cookie(self, cookie):
+        item = {k: cookie[k] for k in ("name", "value", "domain", "path", "httpOnly", "secure") if k in cookie}
+        if cookie.get("sameSite") in ("Strict", "Lax", "None"):
+            item["sameSite"] = cookie["sameSite"]
+        if cookie.get("expiry"):
+            item["expires"] = cookie["expiry"]
+        if "domain" not in item:
+            item["url"] = self.page.url
+        item.setdefault("path", "/")
+        self._run(self.page.context.add_cookies([item]))
+
+    def wait_for_xpath(self, xpath, timeout):
+        """等待XPath对应的元素出现（浏览器内等待DOM变化，无需轮询），超时返回None"""
+        try:
+            handle = self._run(self.page.wait_for_selector(f"xpath={xpath}", state="attached", timeout=timeout * 1000))
+        except WebDriverException:
+            return None
+        return PlaywrightElement(self, handle) if handle else None
+
+    def open_isolated_tab(self, context_id=None):
+        """在隔离的浏览器上下文（Cookie/存储与其他上下文互不共享）中新建标签页并切换到该标签页
+
+        context_id为空时新建上下文；返回(窗口句柄, 上下文ID)。只有不使用用户数据目录启动的浏览器支持
+        """
+        context = self._contexts.get(context_id)
+        if context is None:
+            if not self.browser:
+                raise WebDriverException("使用用户数据目录启动的浏览器不支持隔离上下文")
+            context = self._run(self.browser.new_context(**self.context_options))
+            context_id = f"context-{next(self._counter)}"
+            self._contexts[context_id] = context
+            context.on("page", lambda page: asyncio.ensure_future(self._attach(page)))
+        page = self._run(context.new_page())
+        self._run(self._attach(page))
+        self.page = page
+        return self._handles[page], context_id
+
+    def close_isolated_context(self, context_id):
+        """关闭隔离的浏览器上下文及其全部标签页"""
+        context = self._contexts.pop(context_id, None)
+        if not context:
+            return
+        for page in list(context.pages):
+            handle = self._handles.pop(page, None)
+            self._pages.pop(handle, None)
+            self._sessions.pop(page, None)
+        self._run(context.close())
+
+    def close(self):
+        """关闭当前标签页"""
+        page = self.page
+        self._run(page.close())
+        handle = self._handles.pop(page, None)
+        self._pages.pop(handle, None)
+        self._sessions.pop(page, None)
+
+    def quit(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            run(self.context.close(), 15)
+            if self.browser:
+                run(self.browser.close(), 15)
+        except Exception as e:
+            utils.log(f"[Playwright] 关闭浏览器时发生错误: {str(e)}")
+
+
+async def _launch(profile_dir, headless, args, viewport, channel, executable_path):
+    playwright = await _start_playwright()
+    options = {"headless": headless, "args": args, "ignore_default_args": ["--enable-automation"]}
+    if executable_path:
+        options["executable_path"] = executable_path  # 系统安装的Chromium/Chrome
+    elif channel:
+        options["channel"] = channel
+    if viewport:
+        options["viewport"] = viewport
+    else:
+        options["no_viewport"] = True  # 有窗口时使用窗口实际大小
+    if profile_dir:
+        context = await playwright.chromium.launch_persistent_context(profile_dir, **options)
+        driver = PlaywrightDriver(context)
+    else:
+        viewport_options = {k: options.pop(k) for k in ("viewport", "no_viewport") if k in options}
+        browser = await playwright.chromium.launch(**options)
+        context = await browser.new_context(**viewport_options)
+        driver = PlaywrightDriver(context, browser)
+        driver.context_options = viewport_options
+    await driver._setup()
+    return driver
+
+
+def launch_browser(profile_dir=None, headless=False, args=None, viewport=None, channel="msedge", executable_path=None):
+    """启动浏览器（默认Edge；指定executable_path时使用该Chromium/Chrome，均未指定时使用Playwright自带的Chromium），
+    返回PlaywrightDriver；失败时抛出异常"""
+    if not PLAYWRIGHT_AVAILABLE:
+        raise RuntimeError("未安装playwright（pip install playwright）")
+    return run(_launch(profile_dir, headless, args or [], viewport, channel, executable_path), 60)
@@ -0,0 +1,174 @@
+import time
+import threading
+from collections import deque
+import browser_manager
+import tab_manager
+import utils  # 导入通用工具模块
+
+
+class AccountTab(tab_manager.LessonTab):
+    """账号的一个课程标签页（在该账号的浏览器上下文中打开）"""
+
+    def __init__(self, browser, account, name, course_url, profile_dir, cookie_path):
+        super().__init__(browser, name, course_url)
+        self.account = account
+        self.profile_dir = profile_dir    # 账号使用独立浏览器时的用户数据目录
+        self.cookie_path = cookie_path    # 账号的登录Cookie快照（隔离上下文据此恢复登录状态）
+
+
+class PooledBrowser(tab_manager.SharedBrowser):
+    """浏览器池中的一个浏览器进程
+
+    支持隔离上下文时（Playwright后端，不使用用户数据目录启动）多个账号各占一个隔离的浏览器上下文，
+    共用同一进程；否则（Selenium后端）浏览器只属于一个账号，使用该账号的用户数据目录
+    """
+
+    def __init__(self, driver, profile_dir=None, cookie_path=None, course_url=None, lean=False):
+        super().__init__(driver, course_url, profile_dir, cookie_path, lean)
+        self.isolated = hasattr(driver, "open_isolated_tab") and not profile_dir
+        self.contexts = {}  # key: 账号, value: 隔离上下文ID
+        if self.isolated:
+            self.unused_handle = None  # 初始窗口属于默认上下文，不分配给账号
+
+    def accounts(self):
+        return {tab.account for tab in self.tabs}
+
+    def _new_tab(self, tab):
+        if not self.isolated:
+            return super()._new_tab(tab)
+        fresh = tab.account not in self.contexts
+        handle, self.contexts[tab.account] = self.driver.open_isolated_tab(self.contexts.get(tab.account))
+        if fresh:
+            # 新的隔离上下文没有登录状态：从账号的Cookie快照恢复
+            browser_manager.restore_cookie_snapshot(self.driver, tab.cookie_path, tab.course_url)
+        return handle
+
+    def _launch(self):
+        self.contexts = {}
+        if self.isolated:
+            # 各账号的上下文在重新打开标签页时重建，并从各自的Cookie快照恢复登录
+            return browser_manager.init_browser(None, self.lean)
+        return super()._launch()
+
+    def close_context(self, account):
+        """关闭账号的隔离上下文（账号的课程标签页已全部关闭）"""
+        context_id = self.contexts.pop(account, None)
+        if not context_id:
+            return
+        try:
+            self.driver.close_isolated_context(context_id)
+        except Exception as e:
+            utils.log(f"[浏览器池] 关闭账号 {account} 的浏览器上下文时发生错误: {str(e)}")
+
+
+class BrowserPool:
+    """多账号浏览器池：每个账号使用隔离的浏览器上下文，尽量让多个账号共用浏览器进程
+
+    同时运行的浏览器不超过max_browsers个，每个浏览器最多容纳contexts_per_browser个账号
+    （Selenium后端无法在同一进程中隔离登录状态，每个浏览器只容纳1个账号）。容量已满时acquire按申请顺序排队，
+    直到其他账号释放；账号在释放全部课程前始终绑定同一浏览器与上下文，浏览器重新启动后仍在其中恢复
+    """
+
+    def __init__(self, max_browsers=2, contexts_per_browser=4, lean=False):
+        self.max_browsers = max_browsers
+        self.contexts_per_browser = contexts_per_browser
+        self.lean = lean
+        self.browsers = []
+        self.bindings = {}      # key: 账号, value: PooledBrowser
+        self.waiting = deque()  # 排队中的申请（按申请顺序）
+        self.condition = threading.Condition()
+
+    def acquire(self, account, name, course_url, profile_dir, cookie_path, timeout=None):
+        """为账号的课程打开标签页，返回作为该课程driver使用的AccountTab
+
+        账号已绑定浏览器时直接在其上下文中打开；容量已满时排队等待，timeout秒内未轮到或启动失败返回None
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        ticket = object()
+        with self.condition:
+            self.waiting.append(ticket)
+            try:
+                while True:
+                    browser = self.bindings.get(account)
+                    if not browser and self.waiting[0] is ticket:
+                        browser = self._place(account, profile_dir, cookie_path, course_url)
+                    if browser:
+                        break
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        utils.log(f"[浏览器池] 容量已满（{self.max_browsers}个浏览器），{name} 排队超时")
+                        return None
+                    self.condition.wait(remaining)
+            except Exception as e:
+                utils.log(f"[浏览器池] 为账号 {account} 启动浏览器失败: {str(e)}")
+                return None
+            finally:
+                self.waiting.remove(ticket)
+                self.condition.notify_all()
+
+            self.bindings[account] = browser
+            tab = AccountTab(browser, account, name, course_url, profile_dir, cookie_path)
+            browser.tabs.append(tab)
+            try:
+                browser.open_tab(tab)
+            except Exception as e:
+                utils.log(f"[浏览器池] 为 {name} 打开标签页失败: {str(e)}")
+                self._detach(tab)
+                return None
+            utils.log(f"[浏览器池] {name} 已分配到浏览器{self.browsers.index(browser) + 1}（账号: {account}）")
+            return tab
+
+    def _place(self, account, profile_dir, cookie_path, course_url):
+        """为尚未绑定的账号选择有空位的浏览器，必要时启动新浏览器；容量已满返回None"""
+        for browser in self.browsers:
+            bound = sum(1 for other in self.bindings.values() if other is browser)
+            if browser.isolated and bound < self.contexts_per_browser:
+                return browser
+        if len(self.browsers) >= self.max_browsers:
+            return None
+        isolated = browser_manager.get_browser_backend() == "playwright"
+        driver = browser_manager.init_browser(None if isolated else profile_dir, self.lean)
+        if not driver:
+            raise RuntimeError("浏览器初始化失败")
+        if isolated:
+            browser = PooledBrowser(driver, lean=self.lean)
+        else:
+            browser = PooledBrowser(driver, profile_dir, cookie_path, course_url, self.lean)
+        self.browsers.append(browser)
+        utils.log(f"[浏览器池] 已启动浏览器{len(self.browsers)}（{'多账号隔离上下文' if browser.isolated else '账号 ' + account + ' 专用'}）")
+        return browser
+
+    def _detach(self, tab):
+        browser = tab.browser
+        if tab in browser.tabs:
+            browser.tabs.remove(tab)
+        if tab.account not in browser.accounts():
+            if self.bindings.get(tab.account) is browser:
+                del self.bindings[tab.account]
+            browser.close_context(tab.account)
+        if not browser.tabs:
+            browser.quit()
+            if browser in self.browsers:
+                self.browsers.remove(browser)
+        self.condition.notify_all()
+
+    def release(self, tab):
+        """关闭课程标签页；账号的课程全部释放后解除绑定，空闲的浏览器随即关闭，排队的申请得以继续"""
+        with self.condition:
+            tab.browser.close_tab(tab)
+            self._detach(tab)
+
+    def describe(self):
+        """各浏览器绑定的账号与标签页数（用于日志输出）"""
+        with self.condition:
+            return [f"浏览器{i}: 账号 {', '.join(sorted(browser.accounts()))}（{len(browser.tabs)}个标签页）"
+                    for i, browser in enumerate(self.browsers, 1)]
+
+    def quit(self):
+        """关闭池中全部浏览器"""
+        with self.condition:
+            for browser in self.browsers:
+                browser.quit()
+            self.browsers = []
+            self.bindings = {}
+            self.condition.notify_all()
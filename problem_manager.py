@@ -0,0 +1,91 @@
+import time
+
+# 题目生命周期状态（按先后顺序，状态只前进不后退）
+PROBLEM_STATES = {
+    "published": "已发布",
+    "answering": "作答中",
+    "countdown": "倒计时",
+    "closed": "已截止",
+    "revealed": "已公布答案"
+}
+STATE_ORDER = list(PROBLEM_STATES)
+OPEN_STATES = {"published", "answering", "countdown"}  # 仍可作答的状态
+
+DEADLINE_GRACE = 3  # 倒计时结束后多等待的秒数（页面时钟与本地时钟存在误差）
+
+
+class ProblemTracker:
+    """逐题跟踪题目生命周期：已发布 -> 作答中 -> 倒计时 -> 已截止 -> 已公布答案
+
+    状态来源：周期探测中的题目页状态（倒计时、提交按钮、已提交/已截止/答案提示）与页面路由；
+    老师翻到其他页后，倒计时已结束的题目按已截止处理；没有倒计时的题目在离开超过untimed_timeout秒后按已截止处理
+    """
+
+    def __init__(self, untimed_timeout=60):
+        self.untimed_timeout = untimed_timeout  # 无倒计时题目离开后视为截止的秒数（与快速模式阈值一致）
+        self.problems = {}  # key: (页面类型, 页面编号), value: {"state", "since", "deadline", "left"}
+
+    def update(self, page_type, page_number, snapshot):
+        """根据本周期快照更新题目状态，返回状态变化的日志信息列表"""
+        messages = []
+        now = time.time()
+        key = (page_type, str(page_number))
+        if page_type and page_type != "ppt":
+            problem = (snapshot or {}).get("problem") or {}
+            item = self.problems.get(key)
+            if item is None:
+                item = self.problems[key] = {"state": "published", "since": now, "deadline": None, "left": None}
+                messages.append(f"[题目状态] {page_type} {page_number}: {PROBLEM_STATES['published']}")
+            item["left"] = None
+
+            if problem.get("countdown") is not None:
+                item["deadline"] = now + problem["countdown"]
+            messages += self._advance(key, self._state_from_page(problem), now)
+
+        # 路由已离开的题目：倒计时结束即视为截止；没有倒计时的题目离开超过untimed_timeout秒视为截止
+        for other, item in self.problems.items():
+            if other == key or item["state"] not in OPEN_STATES:
+                continue
+            if item["left"] is None:
+                item["left"] = now
+            if item["deadline"]:
+                if now > item["deadline"] + DEADLINE_GRACE:
+                    messages += self._advance(other, "closed", now, reason="倒计时已结束")
+            elif now - item["left"] > self.untimed_timeout:
+                messages += self._advance(other, "closed", now, reason=f"无倒计时，已离开{int(now - item['left'])}秒")
+        return messages
+
+    def _state_from_page(self, problem):
+        if problem.get("revealed"):
+            return "revealed"
+        if problem.get("closed") or problem.get("submitted"):
+            return "closed"
+        if problem.get("countdown") is not None:
+            return "countdown" if problem["countdown"] > 0 else "closed"
+        if problem.get("can_submit"):
+            return "answering"
+        return None
+
+    def _advance(self, key, state, now, reason=""):
+        item = self.problems[key]
+        if not state or STATE_ORDER.index(state) <= STATE_ORDER.index(item["state"]):
+            return []
+        previous = item["state"]
+        item["state"], item["since"] = state, now
+        detail = f"（{reason}）" if reason else ""
+        if state == "countdown" and item["deadline"]:
+            detail = f"（剩余{int(item['deadline'] - now)}秒）"
+        return [f"[题目状态] {key[0]} {key[1]}: {PROBLEM_STATES[previous]} -> {PROBLEM_STATES[state]}{detail}"]
+
+    def state_of(self, page_type, page_number):
+        """题目当前状态，未跟踪时返回None"""
+        item = self.problems.get((page_type, str(page_number)))
+        return item["state"] if item else None
+
+    def any_open(self):
+        """是否仍有可作答的题目"""
+        return any(item["state"] in OPEN_STATES for item in self.problems.values())
+
+    def open_problems(self):
+        return [f"{key[0]} {key[1]}" for key, item in self.problems.items() if item["state"] in OPEN_STATES]
+
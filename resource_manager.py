@@ -0,0 +1,134 @@
+import os
+import sys
+import time
+import signal
+import subprocess
+import utils  # 导入通用工具模块
+
+# 可选依赖：psutil（未安装时只统计页面JS堆内存，不统计进程内存与CPU）
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    psutil = None
+    PSUTIL_AVAILABLE = False
+
+
+def browser_processes(driver):
+    """浏览器进程树（驱动进程的全部子进程）"""
+    process = getattr(getattr(driver, "service", None), "process", None)
+    if not PSUTIL_AVAILABLE or not process:
+        return []
+    try:
+        return psutil.Process(process.pid).children(recursive=True)
+    except psutil.Error:
+        return []
+
+
+def process_tree_memory(pid):
+    """进程及其全部子进程（如监控子进程启动的驱动与浏览器）的内存占用（MB），无法统计时返回None"""
+    if not PSUTIL_AVAILABLE:
+        return None
+    try:
+        parent = psutil.Process(pid)
+        processes = [parent] + parent.children(recursive=True)
+    except psutil.Error:
+        return None
+    rss = 0
+    for process in processes:
+        try:
+            rss += process.memory_info().rss
+        except psutil.Error:
+            continue  # 进程已退出
+    return round(rss / 1048576, 1)
+
+
+def kill_process_tree(pid):
+    """强制结束进程及其全部子进程（避免残留驱动与浏览器进程）"""
+    if PSUTIL_AVAILABLE:
+        try:
+            parent = psutil.Process(pid)
+            processes = parent.children(recursive=True) + [parent]
+        except psutil.Error:
+            return
+        for process in processes:
+            try:
+                process.kill()
+            except psutil.Error:
+                continue
+        psutil.wait_procs(processes, timeout=5)
+    elif sys.platform == "win32":
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(pid)], capture_output=True)
+    else:
+        try:
+            os.kill(pid, signal.SIGKILL)  # 未安装psutil时无法找到子进程，浏览器进程可能残留
+        except OSError:
+            pass
+
+
+def sample_browser(driver):
+    """采样浏览器资源占用：{"time", "processes", "rss_mb", "cpu_seconds", "js_heap_mb"}，无法统计的项为None"""
+    sample = {"time": time.time(), "session": getattr(driver, "session_id", None),
+              "processes": None, "rss_mb": None, "cpu_seconds": None, "js_heap_mb": None}
+    if not driver:
+        return sample
+    processes = browser_processes(driver)
+    if processes:
+        rss, cpu = 0, 0.0
+        for process in processes:
+            try:
+                rss += process.memory_info().rss
+                times = process.cpu_times()
+                cpu += times.user + times.system
+            except psutil.Error:
+                continue  # 进程已退出
+        sample.update({"processes": len(processes), "rss_mb": round(rss / 1048576, 1), "cpu_seconds": round(cpu, 2)})
+    try:
+        driver.execute_cdp_cmd("Performance.enable", {})
+        metrics = driver.execute_cdp_cmd("Performance.getMetrics", {}).get("metrics", [])
+        heap = next((m["value"] for m in metrics if m.get("name") == "JSHeapUsedSize"), None)
+        if heap is not None:
+            sample["js_heap_mb"] = round(heap / 1048576, 1)
+    except Exception as e:
+        utils.log(f"[资源统计] 读取页面内存失败: {str(e)}")
+    return sample
+
+
+class ResourceReport:
+    """记录浏览器在不同阶段的资源占用（如切换精简配置前后），输出内存与平均CPU对比"""
+
+    def __init__(self):
+        self.samples = []  # (标签, 采样结果)
+        if not PSUTIL_AVAILABLE:
+            utils.log("[资源统计] 未安装psutil，只统计页面JS堆内存（pip install psutil）")
+
+    def record(self, label, driver):
+        """采样并返回用于日志输出的行"""
+        sample = sample_browser(driver)
+        self.samples.append((label, sample))
+        return f"{label}: {self.describe(sample)}"
+
+    @staticmethod
+    def describe(sample):
+        parts = []
+        if sample["rss_mb"] is not None:
+            parts.append(f"进程{sample['processes']}个, 内存{sample['rss_mb']}MB")
+        if sample["js_heap_mb"] is not None:
+            parts.append(f"页面JS堆{sample['js_heap_mb']}MB")
+        return ", ".join(parts) or "无法统计"
+
+    def lines(self):
+        """同一标签、同一浏览器会话的相邻两次采样之间计算平均CPU占用（单核百分比）"""
+        result = []
+        previous = {}
+        for label, sample in self.samples:
+            line = f"{label}: {self.describe(sample)}"
+            start = previous.get(label)
+            if start and start["session"] == sample["session"] and start["cpu_seconds"] is not None and sample["cpu_seconds"] is not None:
+                elapsed = sample["time"] - start["time"]
+                if elapsed > 0:
+                    cpu = max(0.0, sample["cpu_seconds"] - start["cpu_seconds"]) / elapsed * 100
+                    line += f", 运行{elapsed / 60:.0f}分钟平均CPU {cpu:.1f}%"
+            previous[label] = sample
+            result.append(line)
+        return result
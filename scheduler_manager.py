@@ -0,0 +1,272 @@
+import time
+from datetime import datetime
+import capture_manager
+import wait_manager
+import utils  # 导入通用工具模块
+
+# 可选的轮询调度方式（配置项 [Timing] scheduler）
+SCHEDULER_MODES = {
+    "fixed": "固定间隔（常规/快速两档）",
+    "adaptive": "自适应（按历史出题时间预测）",
+    "slides": "按课件结构（临近题目页时加速）"
+}
+
+MAX_DETECTIONS = 500  # course_info.json 中最多保留的出题记录数
+
+
+class FixedScheduler:
+    """原有调度方式：检测到新页面后进入快速模式，超过阈值后恢复常规间隔"""
+    name = "fixed"
+
+    def __init__(self, timing, detections=None, lesson_id=None):
+        self.timing = timing
+        self.interval = timing['normal_interval']  # 当前检测间隔
+        self.rapid_mode_start = 0  # 快速模式启动时间（0表示未启用）
+        self.rapid_trigger = None  # 触发快速模式的页面 (页面类型, 页面编号)
+        self.problems_open = False  # 是否仍有可作答的题目（由题目状态跟踪提供）
+        self.session_start = time.time()  # 本次监控开始时间
+        self.detections = list(detections or [])  # 出题记录（用于自适应调度）
+        # 出题记录按课次（课程URL中的lesson_id）分组；URL中没有课次号时以本次监控开始时间区分
+        self.current_session = str(lesson_id) if lesson_id else datetime.fromtimestamp(self.session_start).strftime("%Y-%m-%d %H:%M:%S")
+        self.lesson_start = None  # 本次课开始时间（时间戳），出题时间按距上课的秒数记录
+        self.lesson_start_confirmed = False  # 上课时间是否来自课程接口（否则为首次出题时间）
+        for item in self.detections:
+            if item.get("session") == self.current_session and item.get("lesson_start"):
+                self.lesson_start = float(item["lesson_start"])  # 同一课次中途重启监控：沿用已记录的上课时间
+
+    def on_new_page(self, page_type, page_number):
+        """检测到新的监控页面：记录出题时间并进入快速模式，返回日志信息"""
+        self.record_detection(page_type, page_number)
+        self.rapid_mode_start = time.time()
+        self.rapid_trigger = (page_type, str(page_number))
+        self.interval = self.timing['rapid_interval']
+        return f"检测到新{page_type}页面，进入快速模式（间隔{self.interval}秒）"
+
+    def on_known_page(self):
+        """仍停留在已检测过的监控页面：判断快速模式是否超时，返回日志信息"""
+        if not self.rapid_mode_start:
+            return None
+        elapsed = time.time() - self.rapid_mode_start
+        if elapsed > self.timing['threshold'] and self.problems_open:
+            return f"快速模式已持续{elapsed:.1f}秒，仍有题目在作答中，保持间隔{self.interval}秒"
+        if elapsed > self.timing['threshold']:
+            self.rapid_mode_start = 0
+            self.interval = self.idle_interval()
+            return f"快速模式已持续{elapsed:.1f}秒（超过阈值{self.timing['threshold']}秒），恢复常规间隔{self.interval}秒"
+        return f"快速模式持续中（{elapsed:.1f}秒），保持间隔{self.interval}秒"
+
+    def prepare(self, driver, course_url, presentation=None):
+        """监控开始前的准备（固定间隔调度无需准备）"""
+        return True
+
+    def observe(self, driver, page_type, page_number):
+        """记录本周期老师所在页面，调度状态变化时返回日志信息"""
+        return None
+
+    def on_problem_state(self, tracker):
+        """题目状态更新：触发快速模式的题目已截止且没有其他可作答题目时，提前恢复常规间隔"""
+        self.problems_open = tracker.any_open()
+        if not (self.rapid_mode_start and self.rapid_trigger) or self.problems_open:
+            return None
+        state = tracker.state_of(*self.rapid_trigger)
+        if state not in ("closed", "revealed"):
+            return None  # 普通PPT页触发的快速模式仍按阈值结束
+        elapsed = time.time() - self.rapid_mode_start
+        self.rapid_mode_start = 0
+        self.interval = self.idle_interval()
+        return f"题目{self.rapid_trigger[0]} {self.rapid_trigger[1]}已截止（快速模式持续{elapsed:.1f}秒），提前恢复间隔{self.interval}秒"
+
+    def next_interval(self):
+        """返回下一个周期的等待秒数"""
+        if not self.rapid_mode_start:
+            self.interval = self.idle_interval()
+        return self.interval
+
+    def idle_interval(self):
+        """非快速模式下的检测间隔"""
+        return self.timing['normal_interval']
+
+    def set_lesson_start(self, start):
+        """设置上课时间（来自课程接口的startTime，毫秒或秒时间戳），已从接口确定时忽略
+
+        此前以首次出题时间为起点记录的本课次出题时间，改为按上课时间重新计算
+        """
+        if self.lesson_start_confirmed or not start:
+            return None
+        try:
+            start = float(start)
+        except (TypeError, ValueError):
+            return None
+        start = start / 1000 if start > 1e11 else start
+        for item in self.detections:
+            if item.get("session") == self.current_session and "offset" in item:
+                item["offset"] = round(float(item["offset"]) + float(item.get("lesson_start") or start) - start, 1)
+                item["lesson_start"] = round(start, 1)
+        self.lesson_start = start
+        self.lesson_start_confirmed = True
+        return f"上课时间: {datetime.fromtimestamp(start).strftime('%Y-%m-%d %H:%M:%S')}（出题时间按距上课的时长记录）"
+
+    def record_detection(self, page_type, page_number):
+        now = time.time()
+        if not self.lesson_start:
+            self.lesson_start = now  # 未获取到上课时间：以本课次首次出题时间为起点
+        self.detections.append({
+            "session": self.current_session,
+            "lesson_start": round(self.lesson_start, 1),
+            "at": datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S"),
+            "offset": round(now - self.lesson_start, 1),
+            "page_type": page_type,
+            "page_number": str(page_number)
+        })
+        del self.detections[:-MAX_DETECTIONS]
+
+
+class AdaptiveScheduler(FixedScheduler):
+    """自适应调度：用本课程历史出题时间估计近期出题概率，高概率时段密集轮询，其余时段放慢
+
+    两个信号取较大者：
+    1. 距上课的时间：历史各次课在相同时间窗口内出题的比例
+    2. 距上一题的时间：历史相邻两题间隔的条件概率（已等待e秒时，在接下来window秒内出题的概率）
+
+    历史按课次（lesson_id）分组，同一课次中途重启监控不会被当作新的一次课；上课时间未知时
+    （接口未提供且本课次尚未出题）无法对齐历史，使用常规间隔
+    """
+    name = "adaptive"
+    window = 120          # 预测窗口（秒）
+    high_probability = 0.5  # 达到该概率时按快速间隔轮询
+    low_probability = 0.05  # 低于该概率时放慢轮询
+    backoff_factor = 1.5    # 放慢时的间隔倍数（相对常规间隔）
+    min_sessions = 2        # 至少需要的历史课次
+
+    def __init__(self, timing, detections=None, lesson_id=None):
+        super().__init__(timing, detections, lesson_id)
+        self._build_model()
+
+    def _build_model(self):
+        sessions = {}
+        for item in self.detections:
+            if item.get("session") != self.current_session and "offset" in item:
+                sessions.setdefault(item["session"], []).append(float(item["offset"]))
+        self.history_offsets = list(sessions.values())
+        self.history_gaps = []
+        for offsets in self.history_offsets:
+            offsets.sort()
+            self.history_gaps.extend(b - a for a, b in zip(offsets, offsets[1:]) if b > a)
+        utils.log(f"[调度模块] 自适应调度已加载{len(self.history_offsets)}次课、{len(self.history_gaps)}个出题间隔")
+
+    def probability(self, now=None):
+        """估计接下来window秒内出题的概率"""
+        if len(self.history_offsets) < self.min_sessions or not self.lesson_start:
+            return None
+        now = now or time.time()
+        elapsed = now - self.lesson_start
+
+        # 1. 相同课堂时段内出题的课次比例
+        hits = sum(1 for offsets in self.history_offsets
+                   if any(elapsed <= offset < elapsed + self.window for offset in offsets))
+        p_offset = hits / len(self.history_offsets)
+
+        # 2. 距上一题时间的条件概率
+        p_gap = 0.0
+        session_offsets = [float(d["offset"]) for d in self.detections if d.get("session") == self.current_session]
+        if session_offsets and self.history_gaps:
+            waited = elapsed - max(session_offsets)
+            remaining = [gap for gap in self.history_gaps if gap >= waited]
+            if remaining:
+                p_gap = sum(1 for gap in remaining if gap < waited + self.window) / len(remaining)
+        return max(p_offset, p_gap)
+
+    def idle_interval(self):
+        normal = self.timing['normal_interval']
+        rapid = self.timing['rapid_interval']
+        p = self.probability()
+        if p is None:
+            return normal  # 历史数据不足，使用常规间隔
+        if p >= self.high_probability:
+            return rapid
+        if p < self.low_probability:
+            return max(normal, int(normal * self.backoff_factor))
+        # 概率介于两者之间：在快速与常规间隔之间线性插值
+        ratio = (p - self.low_probability) / (self.high_probability - self.low_probability)
+        return max(rapid, int(round(normal - (normal - rapid) * ratio)))
+
+
+class SlideAwareScheduler(FixedScheduler):
+    """按课件结构调度：读取课件中哪些页是题目页，跟踪老师当前所在页
+
+    老师距下一道题目页不超过lookahead页时按快速间隔轮询，连续的普通PPT页按常规间隔轮询；
+    课件结构或当前位置未知时退回常规间隔
+    """
+    name = "slides"
+    lookahead = 2  # 距题目页多少页以内进入快速轮询
+
+    def __init__(self, timing, detections=None, lesson_id=None):
+        super().__init__(timing, detections, lesson_id)
+        self.presentation = None   # 课件结构（capture_manager.LessonPayloadCache）
+        self.position = None       # 老师当前所在页的页码
+        self.near_problem = False  # 是否临近题目页
+
+    def prepare(self, driver, course_url, presentation=None):
+        """读取课件结构；课程页已加载完毕时接口响应已错过，重新加载一次课程页以捕获课件数据"""
+        self.presentation = presentation or capture_manager.LessonPayloadCache()
+        if not self.presentation.prepare(driver):
+            utils.log("[调度模块] 无法开启网络监听，按常规间隔调度")
+            return False
+        self.presentation.ingest(driver)
+        if not self.problem_slides():
+            wait_manager.navigate(driver, course_url, label="课件结构加载")
+            self.presentation.ingest(driver)
+        problems = self.problem_slides()
+        utils.log(f"[调度模块] 课件共{len(self.presentation.slides_by_index)}页，其中题目页: {problems or '未识别'}")
+        return bool(problems)
+
+    def problem_slides(self):
+        """课件中题目页的页码（升序）"""
+        if not self.presentation:
+            return []
+        return sorted(int(index) for index, info in self.presentation.slides_by_index.items()
+                      if info["page_type"] != "ppt" and index.isdigit())
+
+    def observe(self, driver, page_type, page_number):
+        if not self.presentation:
+            return None
+        if driver:
+            self.presentation.ingest(driver)  # 课件更新时同步最新结构
+        page_number = str(page_number)
+        info = self.presentation.slides_by_index.get(page_number) or self.presentation.slides_by_id.get(page_number)
+        if info and info["index"].isdigit():
+            self.position = int(info["index"])
+        elif page_type == "ppt" and page_number.isdigit():
+            self.position = int(page_number)  # PPT页URL中的编号即页码
+
+        distance = self.distance_to_problem()
+        near = distance is not None and distance <= self.lookahead
+        if near == self.near_problem:
+            return None
+        self.near_problem = near
+        if near:
+            return f"老师当前在第{self.position}页，距题目页还有{distance}页，进入快速轮询（间隔{self.timing['rapid_interval']}秒）"
+        return f"老师当前在第{self.position}页，附近没有题目页，恢复常规间隔{self.timing['normal_interval']}秒"
+
+    def distance_to_problem(self):
+        """当前页到下一道题目页的页数（当前即题目页时为0），未知或后面没有题目页时返回None"""
+        if self.position is None:
+            return None
+        ahead = [index - self.position for index in self.problem_slides() if index >= self.position]
+        return min(ahead) if ahead else None
+
+    def idle_interval(self):
+        if self.near_problem:
+            return self.timing['rapid_interval']
+        return self.timing['normal_interval']
+
+
+def create_scheduler(mode, timing, detections=None, lesson_id=None):
+    """根据配置创建调度器（未知方式回退为固定间隔），lesson_id为课程URL中的课次号"""
+    if mode == "adaptive":
+        return AdaptiveScheduler(timing, detections, lesson_id)
+    if mode == "slides":
+        return SlideAwareScheduler(timing, detections, lesson_id)
+    if mode != "fixed":
+        utils.log(f"[调度模块] 未知的调度方式: {mode}，使用固定间隔")
+    return FixedScheduler(timing, detections, lesson_id)
@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import statistics
+from datetime import datetime
+import browser_manager
+import detection_manager
+import utils  # 导入通用工具模块
+
+REPORT_FILE = "shadow_report.json"  # 对比报告（保存在课程目录下）
+
+
+class ShadowHarness:
+    """影子模式：在同一浏览器会话中并行运行候选检测方式，仅记录不触发通知
+
+    主检测方式（刷新轮询/URL正则）首次识别到页面的时间与候选检测器事件时间逐一配对，
+    按课程、课次统计延迟差（正数表示候选方式更快）、漏检与误报
+    """
+    match_window = 120  # 主/候选检测时间差超过该秒数不再配对
+
+    def __init__(self, primary_mode, shadow_mode):
+        self.primary_mode = primary_mode
+        self.shadow_mode = shadow_mode
+        self.detector = detection_manager.create_detector(shadow_mode)
+        self.primary = {}   # key: (课次, 页面类型, 页面编号), value: 主检测时间
+        self.events = []    # 候选检测器事件：{"lesson", "page", "ids", "ts", "reason", "matched"}
+
+    def prepare(self, driver):
+        ok = self.detector.prepare(driver)
+        utils.log(f"[影子模式] 候选检测方式 {self.shadow_mode} 已{'启动' if ok else '启动失败'}，主检测方式为 {self.primary_mode}")
+        return ok
+
+    def poll(self, driver, url):
+        """读取候选检测器自上次读取以来的事件（使用事件自带的时间戳，与读取时机无关）"""
+        lesson = browser_manager.extract_course_id(url or "") or ""
+        for event in self.detector.poll(driver):
+            ts = event.get("ts") or time.time()
+            if ts > 1e11:
+                ts = ts / 1000.0  # 页面内监听脚本的时间戳为毫秒
+            page = detection_manager.parse_page_url(event.get("url"))
+            ids = {str(event[k]) for k in ("problem_id", "slide_id", "slide_index") if event.get(k) is not None}
+            self.events.append({"lesson": lesson, "page": page, "ids": ids, "ts": ts,
+                                "reason": event.get("reason", ""), "matched": False})
+
+    def on_page_detected(self, url, page_type, page_number, **kwargs):
+        """主检测方式识别到页面（每课次每个页面只记录首次出现的时间）"""
+        key = (browser_manager.extract_course_id(url or "") or "", page_type, str(page_number))
+        self.primary.setdefault(key, time.time())
+
+    def _matches(self, event, key):
+        lesson, page_type, page_number = key
+        if event["lesson"] and lesson and event["lesson"] != lesson:
+            return False
+        return event["page"] == (page_type, page_number) or page_number in event["ids"]
+
+    def report(self):
+        """生成对比报告：{课次: {detections, matched, misses, false_positives, latency_delta}}"""
+        for event in self.events:
+            event["matched"] = False
+        lessons = {}
+        for key, primary_ts in sorted(self.primary.items(), key=lambda item: item[1]):
+            item = lessons.setdefault(key[0], {"detections": 0, "matched": 0, "misses": [], "false_positives": [], "deltas": []})
+            item["detections"] += 1
+            candidates = [e for e in self.events if not e["matched"] and self._matches(e, key)
+                          and abs(primary_ts - e["ts"]) <= self.match_window]
+            if not candidates:
+                item["misses"].append(f"{key[1]}:{key[2]}")
+                continue
+            event = min(candidates, key=lambda e: e["ts"])
+            event["matched"] = True
+            item["matched"] += 1
+            item["deltas"].append(round(primary_ts - event["ts"], 3))
+
+        now = time.time()
+        for event in self.events:
+            if event["matched"] or now - event["ts"] < self.match_window:
+                continue
+            # 对应页面曾被主检测方式识别（如翻回旧页）的事件不算误报
+            if any(self._matches(event, key) for key in self.primary):
+                continue
+            item = lessons.setdefault(event["lesson"], {"detections": 0, "matched": 0, "misses": [], "false_positives": [], "deltas": []})
+            item["false_positives"].append(event["reason"])
+
+        for item in lessons.values():
+            deltas = item.pop("deltas")
+            item["latency_delta"] = {
+                "mean": round(statistics.mean(deltas), 3) if deltas else None,
+                "median": round(statistics.median(deltas), 3) if deltas else None,
+                "max": max(deltas) if deltas else None
+            }
+        return lessons
+
+    def save_report(self, course_dir):
+        """将本次对比结果写入课程目录（同一课次覆盖），返回用于日志输出的行"""
+        lessons = self.report()
+        report_path = os.path.join(course_dir, REPORT_FILE)
+        data = {}
+        if os.path.exists(report_path):
+            try:
+                with open(report_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception as e:
+                utils.log(f"[影子模式] 读取历史报告失败: {str(e)}")
+        data.setdefault("course", os.path.basename(course_dir))
+        runs = data.setdefault("lessons", {})
+        for lesson, item in lessons.items():
+            item.update({"primary": self.primary_mode, "shadow": self.shadow_mode,
+                         "updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
+            runs[f"{lesson or 'unknown'}:{self.shadow_mode}"] = item
+        try:
+            with open(report_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=4)
+        except Exception as e:
+            utils.log(f"[影子模式] 保存报告失败: {str(e)}")
+
+        lines = []
+        for lesson, item in lessons.items():
+            delta = item["latency_delta"]
+            lines.append(
+                f"课次 {lesson or '未知'}: 主检测{item['detections']}次, 配对{item['matched']}次, "
+                f"漏检{len(item['misses'])}次, 误报{len(item['false_positives'])}次, "
+                f"延迟差(主-候选) 平均{delta['mean']}秒/中位{delta['median']}秒/最大{delta['max']}秒")
+        return lines
+
+
+def create_shadow(primary_mode, shadow_mode):
+    """根据配置创建影子检测（未配置或与主检测方式相同时返回None）"""
+    if not shadow_mode:
+        return None
+    if shadow_mode == primary_mode:
+        utils.log(f"[影子模式] 候选检测方式与主检测方式相同（{shadow_mode}），不启用影子模式")
+        return None
+    if shadow_mode not in detection_manager.DETECTION_MODES:
+        utils.log(f"[影子模式] 未知的候选检测方式: {shadow_mode}，不启用影子模式")
+        return None
+    return ShadowHarness(primary_mode, shadow_mode)
@@ -0,0 +1,140 @@
+import time
+import threading
+import browser_manager
+import wait_manager
+import utils  # 导入通用工具模块
+
+
+class WarmStandby:
+    """热备浏览器：预先启动第二个浏览器并恢复登录状态，停在课程页
+
+    主浏览器失效时直接切换到热备浏览器（无需重新启动和登录），
+    旧浏览器在后台关闭后，使用其用户数据目录重建新的热备浏览器
+    """
+    retry_delays = (10, 30, 60, 120)  # 热备浏览器连续启动失败后的等待秒数
+
+    def __init__(self, course_url, profile_dir, cookie_path, lean=False):
+        self.course_url = course_url
+        self.profile_dir = profile_dir    # 热备浏览器使用的用户数据目录（与主浏览器互不占用）
+        self.cookie_path = cookie_path    # 登录Cookie快照（热备浏览器据此恢复登录状态）
+        self.lean = lean                  # 使用精简无界面配置
+        self.driver = None
+        self.building = False
+        self.stopped = False
+        self.failures = 0   # 连续启动失败次数
+        self.swaps = 0      # 已切换次数
+        self.lock = threading.Lock()
+
+    def start(self, delay=0, retire=None):
+        """在后台线程中启动热备浏览器（retire为需先关闭的旧浏览器）"""
+        with self.lock:
+            busy = self.building or self.stopped or self.driver
+            if not busy:
+                self.building = True
+        if busy:
+            if retire:
+                threading.Thread(target=_quit, args=(retire,), daemon=True).start()
+            return
+        threading.Thread(target=self._build, args=(delay, retire), daemon=True).start()
+
+    def _build(self, delay, retire):
+        if retire:
+            _quit(retire)  # 先关闭失效的旧浏览器，释放其用户数据目录
+        if delay:
+            time.sleep(delay)
+        driver = None
+        try:
+            if not self.stopped:
+                utils.log("[热备浏览器] 正在后台启动热备浏览器...")
+                driver = browser_manager.init_browser(self.profile_dir, self.lean)
+            if driver and not self._park(driver):
+                _quit(driver)
+                driver = None
+        except Exception as e:
+            utils.log(f"[热备浏览器] 启动过程中出错: {str(e)}")
+            _quit(driver)
+            driver = None
+
+        with self.lock:
+            self.building = False
+            if driver and self.stopped:
+                _quit(driver)
+                return
+            self.driver = driver
+        if driver:
+            self.failures = 0
+            utils.log("[热备浏览器] 已就绪（停在课程页，主浏览器失效时立即切换）")
+        elif not self.stopped:
+            retry = self.retry_delays[min(self.failures, len(self.retry_delays) - 1)]
+            self.failures += 1
+            utils.log(f"[热备浏览器] 启动失败，{retry}秒后重试")
+            self.start(delay=retry)
+
+    def _park(self, driver):
+        """打开课程页，未登录时从Cookie快照恢复；不会等待扫码"""
+        wait_manager.navigate(driver, self.course_url, require_app=False, label="热备浏览器导航")
+        if browser_manager.is_lesson_url(driver.current_url):
+            return True
+        if browser_manager.restore_cookie_snapshot(driver, self.cookie_path, self.course_url):
+            wait_manager.navigate(driver, self.course_url, require_app=False, label="热备浏览器恢复登录")
+            if browser_manager.is_lesson_url(driver.current_url):
+                return True
+        utils.log("[热备浏览器] 未能恢复登录状态（需重新扫码），放弃本次热备")
+        return False
+
+    def _alive(self, driver):
+        try:
+            return browser_manager.is_lesson_url(driver.current_url)
+        except Exception:
+            return False
+
+    def check(self):
+        """检查热备浏览器是否仍停在课程页，已失效则在后台重建"""
+        with self.lock:
+            driver = self.driver
+        if driver and not self._alive(driver):
+            utils.log("[热备浏览器] 热备浏览器已失效，后台重建")
+            with self.lock:
+                if self.driver is driver:
+                    self.driver = None
+            self.start(retire=driver)
+        elif not driver:
+            self.start()
+
+    def take(self, failed_driver=None, failed_profile=None):
+        """取出热备浏览器替换失效的主浏览器，返回(driver, 用户数据目录)；未就绪时返回(None, None)
+
+        旧浏览器在后台关闭，其用户数据目录用于重建下一个热备浏览器
+        """
+        with self.lock:
+            driver, self.driver = self.driver, None
+        if driver and not self._alive(driver):
+            utils.log("[热备浏览器] 热备浏览器已失效，无法切换")
+            self.start(retire=driver)
+            return None, None
+        if not driver:
+            return None, None
+        profile_dir = self.profile_dir
+        if failed_profile:
+            self.profile_dir = failed_profile
+        self.swaps += 1
+        self.start(retire=failed_driver)
+        return driver, profile_dir
+
+    def close(self):
+        """停止重建并关闭热备浏览器"""
+        self.stopped = True
+        with self.lock:
+            driver, self.driver = self.driver, None
+        if driver:
+            _quit(driver)
+            utils.log("[热备浏览器] 已关闭")
+
+
+def _quit(driver):
+    if not driver:
+        return
+    try:
+        driver.quit()
+    except Exception:
+        pass
@@ -0,0 +1,249 @@
+import os
+import sys
+import json
+import time
+import queue
+import multiprocessing
+from datetime import datetime
+import course_manager
+import browser_manager
+import monitor_engine
+import resource_manager
+import utils  # 导入通用工具模块
+
+BROWSER_UNAVAILABLE = 3  # 子进程退出码：浏览器无法启动或登录已失效（需在命令行版/界面版中重新扫码）
+
+
+def run_course_process(name, course_safe_dir, user_config, messages, stop_event):
+    """子进程入口：运行一门课程的监控，每个检测周期开始时向监护进程发送心跳与统计
+
+    启动浏览器（启动时与重连时）期间发送recovering消息，监护进程在此期间使用较长的恢复超时
+    """
+    course_dir, course_url, server_name, history, stats = course_manager.load_course_data(course_safe_dir)
+    if not course_dir or not course_url:
+        messages.put(("status", name, "课程数据加载失败"))
+        sys.exit(1)
+    utils.init_directories(course_dir)
+    browser_manager.set_browser_backend(user_config['browser']['backend'])
+
+    # 子进程不能等待扫码：只使用课程保存的登录状态（用户数据目录/Cookie快照）
+    lean = user_config['browser']['profile'] == "lean"
+    driver = browser_manager.reconnect_browser(
+        course_url, course_manager.get_profile_dir(course_dir), course_manager.get_cookie_snapshot_path(course_dir),
+        interactive=False, lean=lean)
+    if not driver:
+        messages.put(("status", name, "浏览器启动失败或需要重新扫码登录"))
+        sys.exit(BROWSER_UNAVAILABLE)
+
+    engine = monitor_engine.MonitorEngine(course_dir, course_url, user_config, driver, history, stats, server_name,
+                                          interactive=False)
+    engine.subscribe("log", lambda message: utils.log(f"[{name}] {message}", course_dir))
+    # 心跳附带驱动进程PID：子进程崩溃后，监护进程据此结束残留的驱动与浏览器进程
+    engine.subscribe("stats", lambda stats: messages.put(("heartbeat", name, time.time(), stats, _driver_pid(engine.driver))))
+    engine.subscribe("status", lambda status: messages.put(("status", name, status)))
+    # 重新启动浏览器期间没有检测周期心跳，通知监护进程改用恢复超时
+    engine.subscribe("relaunching", lambda: messages.put(("recovering", name, time.time())))
+    try:
+        engine.start(stop_hint="由监护进程管理")
+        messages.put(("status", name, "监控中"))
+        while not stop_event.is_set():
+            engine.run_cycle()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.close()
+
+
+def _driver_pid(driver):
+    process = getattr(getattr(driver, "service", None), "process", None)
+    return process.pid if process else None
+
+
+class CourseProcess:
+    """监护进程中一门课程的子进程记录"""
+
+    def __init__(self, name, course_safe_dir):
+        self.name = name
+        self.course_safe_dir = course_safe_dir
+        self.process = None
+        self.started_at = 0
+        self.last_heartbeat = 0
+        self.restart_at = 0     # 计划重启时间（0表示无需重启）
+        self.restarts = 0
+        self.failures = 0       # 连续快速退出次数（用于退避）
+        self.status = "未启动"
+        self.stats = {}
+        self.memory_mb = None
+        self.driver_pid = None  # 子进程启动的驱动进程（浏览器为其子进程）
+        self.recovering = False # 正在启动/重新启动浏览器（使用恢复超时）
+
+
+class Supervisor:
+    """监护进程：每门课程在独立的子进程中运行（一门课程卡死或崩溃不影响其他课程）
+
+    子进程每个检测周期发送心跳；超过心跳超时未收到心跳、内存（含浏览器进程）超过上限或进程退出时，
+    结束整个进程树并自动重启。各课程的统计在监护进程中汇总，定期输出并写入logs/supervisor_status.json
+    """
+    restart_delays = (2, 10, 30, 60)    # 连续快速退出后的重启等待秒数
+    unavailable_delay = 300              # 浏览器无法启动或需要扫码时的重启等待秒数
+    healthy_after = 600                  # 子进程运行超过该秒数视为稳定，清零退避
+    recovery_grace = 420                 # 启动/重连浏览器期间在心跳超时之外额外允许的秒数（3次尝试、退避与导航超时）
+    check_interval = 5                   # 巡检间隔（秒）
+    report_interval = 300                # 汇总统计输出间隔（秒）
+
+    def __init__(self, courses, user_config):
+        self.user_config = user_config
+        self.children = [CourseProcess(name, safe_dir) for name, safe_dir in courses]
+        supervisor_config = user_config['supervisor']
+        # 检测间隔较长时心跳间隔也较长，超时至少为两个常规检测间隔
+        self.heartbeat_timeout = max(supervisor_config['heartbeat_timeout'], 2 * user_config['timing']['normal_interval'])
+        self.memory_limit_mb = supervisor_config['memory_limit_mb']
+        self.messages = multiprocessing.Queue()
+        self.stop_event = multiprocessing.Event()
+        self.started_at = time.time()
+        self.last_report = time.time()
+        if self.memory_limit_mb and not resource_manager.PSUTIL_AVAILABLE:
+            utils.log("[监护进程] 未安装psutil，无法统计子进程内存，内存上限不生效（pip install psutil）")
+
+    def _spawn(self, child):
+        child.process = multiprocessing.Process(
+            target=run_course_process,
+            args=(child.name, child.course_safe_dir, self.user_config, self.messages, self.stop_event),
+            name=f"monitor-{child.course_safe_dir}", daemon=False)
+        child.process.start()
+        child.started_at = child.last_heartbeat = time.time()  # 启动浏览器期间按启动时间计算恢复超时
+        child.recovering = True
+        child.restart_at = 0
+        child.status = "启动中"
+        utils.log(f"[监护进程] 已启动 {child.name} 的监控子进程（PID {child.process.pid}）")
+
+    def _restart(self, child, reason, delay=None):
+        """结束子进程树并安排重启"""
+        utils.log(f"[监护进程] {child.name}: {reason}，结束子进程并重启")
+        if child.process and child.process.is_alive():
+            resource_manager.kill_process_tree(child.process.pid)
+            child.process.join(5)
+        if child.driver_pid:
+            resource_manager.kill_process_tree(child.driver_pid)  # 子进程已退出时残留的驱动与浏览器
+            child.driver_pid = None
+        exit_code = child.process.exitcode if child.process else None
+        child.process = None
+        if time.time() - child.started_at > self.healthy_after:
+            child.failures = 0
+        if delay is None:
+            delay = self.restart_delays[min(child.failures, len(self.restart_delays) - 1)]
+        child.failures += 1
+        child.restarts += 1
+        child.restart_at = time.time() + delay
+        child.status = f"{reason}（{delay}秒后重启）"
+        if exit_code not in (None, 0):
+            utils.log(f"[监护进程] {child.name} 子进程退出码: {exit_code}")
+
+    def _drain(self, timeout=None):
+        """处理子进程发来的心跳/状态消息（无消息时最多等待timeout秒）"""
+        by_name = {child.name: child for child in self.children}
+        while True:
+            try:
+                message = self.messages.get(timeout=self.check_interval if timeout is None else timeout)
+            except queue.Empty:
+                return
+            kind, name = message[0], message[1]
+            child = by_name.get(name)
+            if not child:
+                continue
+            if kind == "heartbeat":
+                child.last_heartbeat, child.stats, child.driver_pid = message[2], message[3], message[4]
+                child.recovering = False
+            elif kind == "recovering":
+                child.last_heartbeat, child.recovering = message[2], True
+            elif kind == "status":
+                child.status = message[2]
+            if self.messages.empty():
+                return
+
+    def _check(self, child):
+        now = time.time()
+        if child.process is None:
+            if child.restart_at and now >= child.restart_at:
+                self._spawn(child)
+            return
+        if not child.process.is_alive():
+            code = child.process.exitcode
+            delay = self.unavailable_delay if code == BROWSER_UNAVAILABLE else None
+            self._restart(child, "子进程已退出" if code != BROWSER_UNAVAILABLE else "浏览器不可用或登录已失效", delay)
+            return
+        timeout = self.heartbeat_timeout + (self.recovery_grace if child.recovering else 0)
+        if now - child.last_heartbeat > timeout:
+            self._restart(child, f"超过{timeout}秒未收到心跳（{'启动浏览器' if child.recovering else '检测'}疑似卡死）")
+            return
+        child.memory_mb = resource_manager.process_tree_memory(child.process.pid)
+        if self.memory_limit_mb and child.memory_mb and child.memory_mb > self.memory_limit_mb:
+            self._restart(child, f"内存占用{child.memory_mb}MB超过上限{self.memory_limit_mb}MB")
+
+    def summary(self):
+        """汇总各课程的运行状态与统计"""
+        courses = []
+        for child in self.children:
+            courses.append({
+                "name": child.name,
+                "pid": child.process.pid if child.process else None,
+                "status": child.status,
+                "restarts": child.restarts,
+                "heartbeat_age": round(time.time() - child.last_heartbeat) if child.process else None,
+                "memory_mb": child.memory_mb,
+                "stats": child.stats
+            })
+        totals = {}
+        for course in courses:
+            for key, value in course["stats"].items():
+                if isinstance(value, (int, float)):
+                    totals[key] = totals.get(key, 0) + value
+        return {
+            "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "uptime_minutes": round((time.time() - self.started_at) / 60),
+            "totals": totals,
+            "restarts": sum(course["restarts"] for course in courses),
+            "courses": courses
+        }
+
+    def report(self):
+        summary = self.summary()
+        utils.log(f"[监护进程] 运行{summary['uptime_minutes']}分钟 | 新页面={summary['totals'].get('new_pages_detected', 0)} | "
+                  f"错误数={summary['totals'].get('errors_occurred', 0)} | 重启次数={summary['restarts']}")
+        for course in summary["courses"]:
+            memory = f"{course['memory_mb']}MB" if course["memory_mb"] is not None else "未知"
+            utils.log(f"[监护进程]   {course['name']}: {course['status']} | 检测周期={course['stats'].get('total_cycles', 0)} | "
+                      f"新页面={course['stats'].get('new_pages_detected', 0)} | 内存={memory} | 重启={course['restarts']}")
+        try:
+            with open(os.path.join("logs", "supervisor_status.json"), "w", encoding="utf-8") as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            utils.log(f"[监护进程] 写入状态文件失败: {str(e)}")
+
+    def run(self):
+        """启动全部子进程并持续巡检，直到Ctrl+C"""
+        utils.log(f"[监护进程] 心跳超时={self.heartbeat_timeout}秒 | 内存上限={self.memory_limit_mb or '不限'}MB")
+        for child in self.children:
+            self._spawn(child)
+        while True:
+            self._drain()
+            for child in self.children:
+                self._check(child)
+            if time.time() - self.last_report >= self.report_interval:
+                self.last_report = time.time()
+                self.report()
+
+    def stop(self):
+        """通知子进程在当前周期结束后保存数据并退出，超时未退出的子进程强制结束"""
+        self.stop_event.set()
+        deadline = time.time() + 30
+        # 等待期间持续读取消息队列：子进程退出前需写完队列中的消息，队列写满时子进程会阻塞而无法退出
+        while time.time() < deadline and any(child.process and child.process.is_alive() for child in self.children):
+            self._drain(timeout=0.5)
+        self._drain(timeout=0)
+        for child in self.children:
+            if child.process:
+                if child.process.is_alive():
+                    utils.log(f"[监护进程] {child.name} 未及时退出，强制结束")
+                    resource_manager.kill_process_tree(child.process.pid)
+        self.report()
@@ -0,0 +1,235 @@
+import json
+import time
+from collections import deque
+import browser_manager
+import wait_manager
+import utils  # 导入通用工具模块
+
+
+class LessonTab:
+    """共享浏览器中的一个课程标签页：作为该课程的driver使用，转发调用前先切换到本标签页
+
+    标签页只暴露自身的窗口句柄与CDP事件，查找/固定课程标签页时不会误用其他课程的标签页
+    """
+
+    def __init__(self, browser, name, course_url):
+        self.browser = browser
+        self.name = name
+        self.course_url = course_url
+        self.handle = None  # 窗口句柄（打开标签页后设置）
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.browser.activate(self), name)
+
+    @property
+    def window_handles(self):
+        self.browser.activate(self)
+        return [self.handle]
+
+    def get_log(self, log_type):
+        return self.browser.read_log(self, log_type)
+
+    def reopen(self):
+        """重新打开本课程的标签页（共享浏览器已失效时先重新启动浏览器），成功返回True"""
+        return self.browser.reopen_tab(self)
+
+    def quit(self):
+        """关闭本课程的标签页（共享浏览器由SharedBrowser关闭）"""
+        self.browser.close_tab(self)
+
+
+class SharedBrowser:
+    """多门课程共用的浏览器：每门课程一个标签页，按需切换"""
+
+    def __init__(self, driver, course_url, profile_dir, cookie_path, lean=False):
+        self.driver = driver
+        self.course_url = course_url    # 重新启动浏览器时用于恢复登录
+        self.profile_dir = profile_dir
+        self.cookie_path = cookie_path
+        self.lean = lean
+        self.tabs = []
+        self.current = None             # 当前切换到的窗口句柄
+        self.unused_handle = None       # 启动时的初始窗口，复用为第一个课程标签页
+        self.logs = {}                  # key: 窗口句柄, value: 该标签页的CDP事件（性能日志条目）
+        self.relaunched = False         # 浏览器已重新启动（其他课程需重新初始化检测器）
+        try:
+            self.unused_handle = driver.current_window_handle
+        except Exception:
+            pass
+
+    def add_tab(self, name, course_url):
+        tab = LessonTab(self, name, course_url)
+        self.tabs.append(tab)
+        self.open_tab(tab)
+        return tab
+
+    def open_tab(self, tab):
+        """打开课程标签页（不导航，由监控引擎打开课程页），固定为该课程的标签页"""
+        handle = self._new_tab(tab)
+        tab.handle = handle
+        self.current = handle
+        self.logs[handle] = deque(maxlen=2000)
+        browser_manager.pin_lesson_tab(tab, handle)
+        if self.lean:
+            browser_manager.apply_lean_tab(self.driver)
+        else:
+            browser_manager.keep_tab_active(self.driver)  # 后台标签页也不被节流
+        utils.log(f"[多课程] 已为 {tab.name} 打开标签页: {handle}")
+
+    def _new_tab(self, tab):
+        """新建（或复用初始窗口作为）标签页并切换到该标签页，返回窗口句柄"""
+        if self.unused_handle:
+            handle, self.unused_handle = self.unused_handle, None
+            self.driver.switch_to.window(handle)
+            return handle
+        self.driver.switch_to.new_window("tab")
+        return self.driver.current_window_handle
+
+    def _launch(self):
+        """重新启动浏览器并恢复登录状态，返回driver或None"""
+        return browser_manager.reconnect_browser(
+            self.course_url, self.profile_dir, self.cookie_path, interactive=False, lean=self.lean)
+
+    def activate(self, tab):
+        """切换到课程标签页（已是当前标签页时不与浏览器往返），返回共享的driver"""
+        if tab.handle is None:
+            self.open_tab(tab)
+        if self.current != tab.handle:
+            self.driver.switch_to.window(tab.handle)
+            self.current = tab.handle
+        return self.driver
+
+    def read_log(self, tab, log_type):
+        """读取浏览器的CDP事件并按所属标签页分发，返回该课程标签页的事件"""
+        if log_type != "performance":
+            return self.driver.get_log(log_type)
+        for entry in self.driver.get_log("performance"):
+            try:
+                webview = json.loads(entry["message"]).get("webview") or ""
+            except (KeyError, ValueError, TypeError):
+                continue
+            handle = next((h for h in self.logs if webview and (h == webview or h.endswith(webview))), None)
+            if handle:
+                self.logs[handle].append(entry)
+        queue = self.logs.get(tab.handle)
+        if not queue:
+            return []
+        entries = list(queue)
+        queue.clear()
+        return entries
+
+    def alive(self):
+        try:
+            self.driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    def reopen_tab(self, tab):
+        if not self.alive():
+            return self.relaunch()
+        try:
+            if tab.handle in self.driver.window_handles:
+                return True  # 标签页仍在，由监控引擎重新打开课程页
+        except Exception:
+            pass
+        self.logs.pop(tab.handle, None)
+        tab.handle = None
+        self.current = None
+        try:
+            self.open_tab(tab)
+            return True
+        except Exception as e:
+            utils.log(f"[多课程] 重新打开 {tab.name} 的标签页失败: {str(e)}")
+            return False
+
+    def relaunch(self):
+        """共享浏览器已失效：重新启动浏览器并为所有课程重新打开标签页"""
+        utils.log("[多课程] 共享浏览器已失效，重新启动浏览器...")
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        driver = self._launch()
+        if not driver:
+            return False
+        self.driver = driver
+        self.unused_handle = driver.current_window_handle
+        self.current = None
+        self.logs = {}
+        for tab in self.tabs:
+            tab.handle = None
+            self.open_tab(tab)
+            wait_manager.navigate(driver, tab.course_url, require_app=False, label="重新打开课程页")
+        self.relaunched = True
+        return True
+
+    def close_tab(self, tab):
+        if tab.handle is None:
+            return
+        try:
+            self.activate(tab)
+            self.driver.close()
+        except Exception as e:
+            utils.log(f"[多课程] 关闭 {tab.name} 的标签页时发生错误: {str(e)}")
+        self.logs.pop(tab.handle, None)
+        tab.handle = None
+        self.current = None
+
+    def quit(self):
+        try:
+            self.driver.quit()
+            utils.log("[多课程] 共享浏览器已关闭")
+        except Exception as e:
+            utils.log(f"[多课程] 关闭浏览器时发生错误: {str(e)}")
+
+
+class RoundRobinMonitor:
+    """多课程轮询：依次访问各课程标签页，每门课程按自己的检测间隔执行检测周期
+
+    各课程的监控引擎独立保存history/stats/课程目录，检测周期不等待（wait=False），
+    由轮询器按各课程下一次到期时间挑选要访问的标签页，到期时间相同时按顺序轮流
+    """
+    idle_step = 0.5  # 没有到期课程时的休眠步长（秒）
+
+    def __init__(self, browser):
+        self.browser = browser  # 共享浏览器或浏览器池（关闭时调用其quit）
+        self.engines = []   # (课程名称, 监控引擎)
+        self.due = {}       # key: 监控引擎, value: 下一次检测时间
+        self.running = False
+
+    def add(self, name, engine):
+        self.engines.append((name, engine))
+        self.due[engine] = 0
+
+    def run(self):
+        self.running = True
+        while self.running and self.engines:
+            name, engine = min(self.engines, key=lambda item: self.due[item[1]])
+            delay = self.due[engine] - time.time()
+            if delay > 0:
+                time.sleep(min(delay, self.idle_step))
+                continue
+            try:
+                engine.run_cycle(wait=False)
+            except Exception as e:
+                utils.log(f"[多课程] {name} 检测周期异常: {str(e)}")
+            self.due[engine] = time.time() + engine.interval_time
+            browser = getattr(engine.driver, "browser", None)
+            if browser and browser.relaunched:
+                # 浏览器已重新启动：同一浏览器中其他课程的检测器需在新标签页中重新初始化
+                browser.relaunched = False
+                for other_name, other in self.engines:
+                    if other is not engine and other.driver in browser.tabs:
+                        other.reattach_driver()
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        """保存各课程数据并关闭共享浏览器"""
+        for name, engine in self.engines:
+            engine.close(quit_browser=False)
+        self.browser.quit()
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+# 项目模块位于仓库根目录
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def log_dir(tmp_path, monkeypatch):
+    """日志写入临时目录下的logs/monitor.log，不改动仓库中的日志文件"""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("logs")
+    return tmp_path / "logs"
@@ -0,0 +1,23 @@
+import browser_manager
+
+
+def fake_browser(monkeypatch, platform, browser_path, version):
+    monkeypatch.setattr(browser_manager.sys, "platform", platform)
+    monkeypatch.setattr(browser_manager, "find_browser", lambda: {
+        "kind": "chrome", "browser_path": browser_path, "driver_path": "/usr/bin/chromedriver"})
+    monkeypatch.setattr(browser_manager, "get_browser_version", lambda browser: version)
+
+
+def test_missing_browser_blocks_startup(monkeypatch):
+    fake_browser(monkeypatch, "linux", None, None)
+    assert browser_manager.check_edge_compatibility() is False
+
+
+def test_unreadable_version_skips_check(monkeypatch):
+    fake_browser(monkeypatch, "linux", "/usr/bin/chromium", None)
+    assert browser_manager.check_edge_compatibility() is True
+
+
+def test_unsupported_platform_skips_check(monkeypatch):
+    fake_browser(monkeypatch, "darwin", None, None)
+    assert browser_manager.check_edge_compatibility() is True
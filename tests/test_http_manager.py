@@ -0,0 +1,160 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+import requests
+
+import http_manager
+
+LESSON_ID = "123"
+TOKEN = "lesson-token-1"
+
+PRESENTATION = {"code": 0, "data": {"slides": [
+    {"index": 1, "id": "s1", "cover": "https://img.example/1.png"},
+    {"index": 2, "id": "s2", "cover": "https://img.example/2.png", "problem": {"problemId": "p2", "problemType": 4}}
+]}}
+
+
+class StubLessonServer(ThreadingHTTPServer):
+    """本地模拟雨课堂课程接口：签到、课程状态、课件结构"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.state = {"code": 0, "data": {"startTime": 1700000000000, "presentation": "P1", "slideIndex": 1, "problem": None}}
+        self.state_status = 200
+        self.requests = []  # (方法, 路径, 请求头, 请求体)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or "{}")
+        self.server.requests.append(("POST", self.path, dict(self.headers), body))
+        if self.path == http_manager.LESSON_CHECKIN_API and body.get("lessonId") == LESSON_ID:
+            self._reply(200, {"code": 0, "data": {"lessonToken": TOKEN, "identityId": 42}})
+        else:
+            self._reply(404, {"code": 404})
+
+    def do_GET(self):
+        self.server.requests.append(("GET", self.path, dict(self.headers), None))
+        if self.headers.get("Authorization") != f"Bearer {TOKEN}":
+            self._reply(401, {"code": 401})
+            return
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/api/v3/lesson/basic-info" and query.get("lesson_id") == [LESSON_ID]:
+            self._reply(self.server.state_status, self.server.state)
+        elif url.path == "/api/v3/lesson/presentation/fetch" and query.get("presentation_id") == ["P1"]:
+            self._reply(200, PRESENTATION)
+        else:
+            self._reply(404, {"code": 404})
+
+
+@pytest.fixture
+def server():
+    server = StubLessonServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(server):
+    session = requests.Session()
+    session.headers.update(http_manager.API_HEADERS)
+    return http_manager.LessonHttpClient(session, f"{server.base_url}/lesson/fullscreen/v3/{LESSON_ID}/ppt/1")
+
+
+def test_snapshot_for_ppt_slide(server):
+    client = make_client(server)
+    snapshot = client.read_snapshot()
+    assert snapshot == {
+        "url": f"{server.base_url}/lesson/fullscreen/v3/{LESSON_ID}/ppt/1",
+        "title": "",
+        "ready_state": "complete",
+        "page_type": "ppt",
+        "page_number": "1",
+        "container_found": True,
+        "images": ["https://img.example/1.png"],
+        "region": None,
+        "fingerprint": None,
+        "dialog": {"open": False, "text": ""},
+        "problem": None,
+        "lesson_start": 1700000000000
+    }
+    # 先签到，之后的请求携带课堂令牌
+    method, path, headers, body = server.requests[0]
+    assert (method, path, body) == ("POST", http_manager.LESSON_CHECKIN_API, {"source": 5, "lessonId": LESSON_ID})
+    assert client.identity_id == 42
+    assert all(request[2].get("Authorization") == f"Bearer {TOKEN}" for request in server.requests[1:])
+
+    # 课件结构只在课件变化时读取一次
+    client.read_snapshot()
+    paths = [urlparse(request[1]).path for request in server.requests]
+    assert paths.count("/api/v3/lesson/presentation/fetch") == 1
+    assert paths.count(http_manager.LESSON_CHECKIN_API) == 1
+
+
+def test_snapshot_for_open_problem(server):
+    server.state["data"].update({"slideIndex": 2, "problem": {
+        "problemId": "p2", "problemType": 4, "cover": "https://img.example/p2.png",
+        "dt": 4102444800000, "answered": False, "isEnd": False, "answer": None}})
+    snapshot = make_client(server).read_snapshot()
+    assert (snapshot["page_type"], snapshot["page_number"], snapshot["images"]) == ("blank", "2", ["https://img.example/p2.png"])
+    assert snapshot["problem"]["countdown"] > 0
+    assert {key: value for key, value in snapshot["problem"].items() if key != "countdown"} == {
+        "can_submit": True, "submitted": False, "closed": False, "revealed": False}
+
+
+def test_parse_closed_problem():
+    payload = {"code": 0, "data": {"startTime": 1700000000000, "presentation": "P1", "slideIndex": 5, "problem": {
+        "problemId": "p5", "problemType": 2, "cover": "", "dt": 1700000060000, "answered": True, "isEnd": True, "answer": ["A", "C"]}}}
+    assert http_manager.parse_lesson_state(payload, now=1700000090) == {
+        "lesson_start": 1700000000000,
+        "presentation_id": "P1",
+        "slide_index": "5",
+        "problem_id": "p5",
+        "page_type": "exercise",
+        "image_url": "",
+        "problem": {"countdown": 0, "can_submit": False, "submitted": True, "closed": True, "revealed": True}
+    }
+
+
+def test_error_code_yields_no_state():
+    assert http_manager.parse_lesson_state({"code": 50000, "msg": "lesson not found"}) is None
+    assert http_manager.parse_lesson_state({"code": 0, "data": None}) is None
+
+
+def test_rejected_request_marks_auth_expired(server):
+    server.state_status = 401
+    detector = http_manager.HttpDetector(f"{server.base_url}/lesson/fullscreen/v3/{LESSON_ID}/ppt/1")
+    detector.client = make_client(server)
+    assert detector.read_snapshot() is None
+    assert detector.auth_expired
+
+
+def test_missing_slide_index_is_reported_once(server, capsys):
+    server.state["data"] = {"startTime": 1700000000000, "presentation": "P1", "currentSlide": 4}
+    client = make_client(server)
+    assert client.read_snapshot() is None
+    assert client.read_snapshot() is None
+    output = capsys.readouterr().out
+    assert output.count("没有slideIndex字段") == 1
+    assert "currentSlide, presentation, startTime" in output
@@ -0,0 +1,71 @@
+import pytest
+
+import problem_manager
+import scheduler_manager
+
+TIMING = {"normal_interval": 20, "rapid_interval": 2, "threshold": 60}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1700000000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(problem_manager.time, "time", clock)
+    return clock
+
+
+def run_cycle(tracker, scheduler, page_type, page_number, problem=None, new=False):
+    """按监控引擎的顺序处理一个检测周期：更新题目状态 -> 调度器 -> 新页面/已知页面"""
+    tracker.update(page_type, page_number, {"problem": problem})
+    scheduler.on_problem_state(tracker)
+    if new:
+        scheduler.on_new_page(page_type, page_number)
+    else:
+        scheduler.on_known_page()
+    return scheduler.next_interval()
+
+
+def test_untimed_problem_left_behind_ends_rapid_mode(clock):
+    tracker = problem_manager.ProblemTracker(TIMING["threshold"])
+    scheduler = scheduler_manager.FixedScheduler(TIMING)
+
+    # 不限时题目：没有倒计时，未提交，未公布答案
+    assert run_cycle(tracker, scheduler, "exercise", "3", {"can_submit": True}, new=True) == 2
+    clock.now += 5
+    assert run_cycle(tracker, scheduler, "ppt", "4", new=True) == 2
+    assert tracker.any_open()
+
+    clock.now += 30
+    assert run_cycle(tracker, scheduler, "ppt", "4") == 2  # 仍在阈值内
+
+    clock.now += 40
+    assert run_cycle(tracker, scheduler, "ppt", "4") == TIMING["normal_interval"]
+    assert tracker.state_of("exercise", "3") == "closed"
+    assert not tracker.any_open()
+    assert scheduler.rapid_mode_start == 0
+
+
+def test_untimed_problem_stays_open_while_shown(clock):
+    tracker = problem_manager.ProblemTracker(TIMING["threshold"])
+    tracker.update("exercise", "3", {"problem": {"can_submit": True}})
+    clock.now += 300
+    tracker.update("exercise", "3", {"problem": {"can_submit": True}})
+    assert tracker.state_of("exercise", "3") == "answering"
+
+
+def test_timed_problem_closes_after_deadline(clock):
+    tracker = problem_manager.ProblemTracker(TIMING["threshold"])
+    tracker.update("exercise", "3", {"problem": {"countdown": 20, "can_submit": True}})
+    clock.now += 10
+    tracker.update("ppt", "4", {"problem": None})
+    assert tracker.state_of("exercise", "3") == "countdown"
+    clock.now += 20
+    tracker.update("ppt", "4", {"problem": None})
+    assert tracker.state_of("exercise", "3") == "closed"
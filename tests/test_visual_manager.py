@@ -0,0 +1,66 @@
+import io
+import time
+import base64
+
+import pytest
+
+pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+import detection_manager
+import monitor_engine
+import visual_manager
+
+SNAPSHOT = {"page_type": "ppt", "page_number": "3", "region": None, "fingerprint": None}
+
+
+def jpeg(split):
+    """左侧黑、右侧白的图片，split为分界位置（0~1）"""
+    image = Image.new("L", (96, 54), 255)
+    image.paste(0, (0, 0, int(96 * split), 54))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+class FakeDriver:
+    def __init__(self):
+        self.frame = jpeg(0.25)
+        self.captures = 0
+
+    def execute_cdp_cmd(self, command, params):
+        assert command == "Page.captureScreenshot"
+        self.captures += 1
+        return {"data": self.frame}
+
+
+def test_change_confirmed_on_next_sample_and_reported_once():
+    driver = FakeDriver()
+    detector = visual_manager.VisualChangeDetector()
+    assert not detector.sample(driver, SNAPSHOT)  # 建立基准
+    assert not detector.sample(driver, SNAPSHOT)
+    driver.frame = jpeg(0.75)
+    assert not detector.sample(driver, SNAPSHOT)
+    assert detector.sample(driver, SNAPSHOT)
+    # 等待期间确认的变化由下一个检测周期取走，且只报告一次
+    captures = driver.captures
+    assert detector.check(driver, SNAPSHOT)
+    assert driver.captures == captures
+    assert not detector.check(driver, SNAPSHOT)
+
+
+def test_pause_ends_early_when_slide_changes():
+    engine = monitor_engine.MonitorEngine.__new__(monitor_engine.MonitorEngine)
+    engine.driver = FakeDriver()
+    engine.fingerprints = None
+    engine.detector = detection_manager.UrlDetector()
+    engine.visual_detector = visual_manager.VisualChangeDetector()
+    engine.visual_detector.sample_interval = 0.05
+    engine.interval_time = 20
+    engine.visual_detector.sample(engine.driver, SNAPSHOT)
+    engine.driver.frame = jpeg(0.75)
+
+    start = time.time()
+    engine._pause(True, use_detector=True, snapshot=SNAPSHOT)
+    assert time.time() - start < 1
+    assert engine.visual_detector.check(engine.driver, SNAPSHOT)
@@ -0,0 +1,121 @@
+import json
+import queue
+import asyncio
+import threading
+
+import pytest
+
+import detection_manager
+import ws_manager
+
+websockets_server = pytest.importorskip("websockets.asyncio.server")
+
+LESSON_ID = "123"
+
+
+class StubPushServer:
+    """本地模拟课程推送：记录客户端发来的帧；第一次连接推送一次翻页后断开，重连后再推送一道题"""
+
+    def __init__(self, reject_status=None):
+        self.reject_status = reject_status  # 握手时直接返回的HTTP状态码（模拟登录失效）
+        self.received = queue.Queue()       # (连接序号, 帧)
+        self.connections = 0
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._thread_main, daemon=True)
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}{ws_manager.LESSON_WS_PATH}"
+
+    def _thread_main(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._serve())
+
+    async def _serve(self):
+        self.stop_future = self.loop.create_future()
+        async with websockets_server.serve(self._handler, "127.0.0.1", 0, process_request=self._process_request) as server:
+            self.port = server.sockets[0].getsockname()[1]
+            self.ready.set()
+            await self.stop_future
+
+    def _process_request(self, connection, request):
+        if self.reject_status:
+            return connection.respond(self.reject_status, "rejected\n")
+        return None
+
+    async def _handler(self, websocket):
+        self.connections += 1
+        number = self.connections
+        hello = json.loads(await websocket.recv())
+        self.received.put((number, hello))
+        if number == 1:
+            await websocket.send(json.dumps({"op": "slidenav", "slide": {"si": 3, "sid": "s3"}}))
+            await websocket.close()
+            return
+        resume = json.loads(await websocket.recv())
+        self.received.put((number, resume))
+        await websocket.send(json.dumps({"op": "unlockproblem", "problem": {"prob": "p5", "sid": "s5"}}))
+        await websocket.wait_closed()
+
+    def start(self):
+        self.thread.start()
+        assert self.ready.wait(5)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.stop_future.set_result, None)
+        self.thread.join(5)
+
+
+@pytest.fixture
+def server():
+    server = StubPushServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+def make_client(url, frames):
+    client = ws_manager.LessonSocketClient(url, {"Cookie": "sessionid=abc"}, LESSON_ID, frames.put,
+                                           auth="lesson-token-1", user_id=42)
+    client.reconnect_delays = (0.1,)
+    return client
+
+
+def test_hello_push_and_reconnect(server):
+    frames = queue.Queue()
+    client = make_client(server.url, frames)
+    client.start()
+    try:
+        # 握手帧携带课堂令牌与用户ID
+        assert server.received.get(timeout=5) == (1, {
+            "op": "hello", "userid": 42, "role": "student", "auth": "lesson-token-1", "lessonid": LESSON_ID})
+        event = detection_manager.parse_ws_frame(frames.get(timeout=5))
+        assert (event["reason"], event["kind"], event["slide_index"]) == ("ws:slidenav", "slide", 3)
+
+        # 服务器断开后自动重连，重新握手并请求补发断线期间的推送
+        number, hello = server.received.get(timeout=5)
+        assert (number, hello["op"], hello["auth"]) == (2, "hello", "lesson-token-1")
+        number, resume = server.received.get(timeout=5)
+        assert number == 2
+        assert resume["op"] == "fetchtimeline" and resume["lessonid"] == LESSON_ID and resume["since"] > 0
+        event = detection_manager.parse_ws_frame(frames.get(timeout=5))
+        assert (event["reason"], event["problem_id"]) == ("ws:unlockproblem", "p5")
+        assert client.reconnects == 1
+    finally:
+        client.stop()
+        client.thread.join(5)
+    assert not client.thread.is_alive()
+
+
+def test_rejected_handshake_flags_auth_failure():
+    server = StubPushServer(reject_status=401)
+    server.start()
+    try:
+        client = make_client(server.url, queue.Queue())
+        client.start()
+        client.thread.join(5)
+        assert client.auth_failed
+        assert server.connections == 0
+    finally:
+        server.stop()
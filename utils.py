@@ -85,8 +85,9 @@ def download_image(src, course_dir, page_type, page_number):
                 if i == retry_count:
                     log(f"图片下载重试失败（{retry_count+1}次）: {str(e)}")
                     return None
-                log(f"图片下载失败，正在重试（{i+1}/{retry_count+1}）: {str(e)}")
-                time.sleep(2)
+                retry_delay = 0.5 * (2 ** i)  # 短退避（0.5s→1s），不再固定等待2秒
+                log(f"图片下载失败，{retry_delay}秒后重试（{i+1}/{retry_count+1}）: {str(e)}")
+                time.sleep(retry_delay)
         
         # 确定图片格式
         content_type = response.headers.get("Content-Type", "image/jpeg")
@@ -0,0 +1,108 @@
+import io
+import base64
+import utils  # 导入通用工具模块
+
+# 可选依赖：numpy + Pillow（未安装时画面变化检测不可用）
+try:
+    import numpy as np
+    from PIL import Image
+    VISUAL_AVAILABLE = True
+except ImportError:
+    np = None
+    Image = None
+    VISUAL_AVAILABLE = False
+
+THUMB_SIZE = 32  # 比对用缩略图边长（灰度）
+
+
+class VisualChangeDetector:
+    """画面变化检测：截取幻灯片区域的极小截图，缩成32×32灰度图后与滚动基准比较
+
+    不依赖URL与DOM结构，作为页面结构变化时的兜底信号；检测周期之间的等待中约每sample_interval秒采样一次，
+    需连续confirm_frames帧超过阈值才判定为变化（约2秒内确认），未变化的帧按比例融入基准，吸收光标、动画等缓慢变化
+    """
+    threshold = 0.08      # 感知距离阈值（0~1）
+    confirm_frames = 2    # 连续超过阈值的帧数
+    blend = 0.2           # 未变化帧融入基准的比例
+    capture_width = 96    # 截图目标宽度（像素），由浏览器在截图时直接缩放
+    sample_interval = 1.0  # 等待期间的采样间隔（秒）
+
+    def __init__(self):
+        self.baseline = None   # 滚动基准（32×32 float数组）
+        self.pending = 0       # 连续超过阈值的帧数
+        self.changed = False   # 等待期间已确认、尚未被检测周期处理的变化
+        self.last_distance = 0.0
+        self.page_key = None   # 基准对应的页面（页面切换后重置基准）
+        self.available = VISUAL_AVAILABLE
+        if not self.available:
+            utils.log("[画面检测] 未安装numpy/Pillow，画面变化检测不可用（pip install numpy pillow）")
+
+    def capture(self, driver, region=None):
+        """截取幻灯片区域（未定位到时截取整个可视区域），返回32×32灰度数组；失败返回None"""
+        params = {"format": "jpeg", "quality": 40}
+        if region and region.get("width") and region.get("height"):
+            params["clip"] = {
+                "x": region["x"], "y": region["y"],
+                "width": region["width"], "height": region["height"],
+                "scale": min(1.0, self.capture_width / region["width"])
+            }
+        try:
+            data = driver.execute_cdp_cmd("Page.captureScreenshot", params).get("data")
+            image = Image.open(io.BytesIO(base64.b64decode(data))).convert("L")
+            image = image.resize((THUMB_SIZE, THUMB_SIZE), Image.BILINEAR)
+            return np.asarray(image, dtype=np.float32)
+        except Exception as e:
+            utils.log(f"[画面检测] 截图失败: {str(e)}")
+            return None
+
+    def distance(self, frame):
+        """感知距离：去除整体亮度差异后的平均绝对差（0~1）"""
+        a = frame - frame.mean()
+        b = self.baseline - self.baseline.mean()
+        return float(np.abs(a - b).mean() / 255.0)
+
+    def check(self, driver, snapshot=None):
+        """检测周期中调用：等待期间已确认的变化或本次采样确认的变化返回True（每次变化只返回一次）"""
+        if not self.changed or self._page_key(snapshot) != self.page_key:
+            self.sample(driver, snapshot)
+        changed, self.changed = self.changed, False
+        return changed
+
+    def _page_key(self, snapshot):
+        return ((snapshot or {}).get("page_type"), (snapshot or {}).get("page_number"))
+
+    def sample(self, driver, snapshot=None):
+        """截图并与基准比较，确认画面变化时返回True"""
+        if not self.available or not driver:
+            return False
+        page_key = self._page_key(snapshot)
+        if page_key != self.page_key:
+            self.reset()
+            self.page_key = page_key
+        frame = self.capture(driver, (snapshot or {}).get("region"))
+        if frame is None:
+            return False
+        if self.baseline is None or self.baseline.shape != frame.shape:
+            self.baseline = frame
+            return False
+
+        self.last_distance = self.distance(frame)
+        if self.last_distance < self.threshold:
+            self.pending = 0
+            self.baseline = self.baseline * (1 - self.blend) + frame * self.blend
+            return False
+        self.pending += 1
+        if self.pending < self.confirm_frames:
+            return False
+        # 画面稳定在新内容上：以新画面作为基准
+        self.pending = 0
+        self.baseline = frame
+        self.changed = True
+        utils.log(f"[画面检测] 幻灯片区域画面发生变化（距离{self.last_distance:.3f}）")
+        return True
+
+    def reset(self):
+        """页面切换后重置基准"""
+        self.baseline = None
+        self.pending = 0
+        self.changed = False
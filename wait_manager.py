@@ -0,0 +1,90 @@
+import time
+import threading
+import utils  # 导入通用工具模块
+
+# 一次脚本调用读取页面就绪状态：文档加载状态、课程应用根节点、已发起的资源请求数
+PAGE_READY_JS = r"""
+var app = document.getElementById('app');
+var resources = (window.performance && performance.getEntriesByType) ? performance.getEntriesByType('resource').length : 0;
+return {
+    ready_state: document.readyState,
+    app_ready: !!(app && app.children.length),
+    resources: resources
+};
+"""
+
+# 各类等待的实际耗时统计（key: 等待名称）
+_wait_stats = {}
+_stats_lock = threading.Lock()
+
+def record_wait(label, elapsed, timed_out=False):
+    """记录一次等待的实际耗时"""
+    with _stats_lock:
+        item = _wait_stats.setdefault(label, {"count": 0, "total": 0.0, "max": 0.0, "timeouts": 0})
+        item["count"] += 1
+        item["total"] += elapsed
+        item["max"] = max(item["max"], elapsed)
+        if timed_out:
+            item["timeouts"] += 1
+
+def get_wait_stats():
+    """返回等待耗时统计的副本"""
+    with _stats_lock:
+        return {label: dict(item) for label, item in _wait_stats.items()}
+
+def format_wait_stats():
+    """格式化等待耗时统计（用于结束时输出）"""
+    lines = []
+    for label, item in sorted(get_wait_stats().items()):
+        avg = item["total"] / item["count"] if item["count"] else 0
+        lines.append(f"{label}: {item['count']}次, 平均{avg:.2f}秒, 最长{item['max']:.2f}秒, 超时{item['timeouts']}次")
+    return lines
+
+def wait_until(predicate, timeout, interval=0.1):
+    """轮询predicate直到返回真值或超时，返回(结果, 实际耗时)"""
+    start = time.time()
+    deadline = start + timeout
+    result = None
+    while True:
+        try:
+            result = predicate()
+        except Exception:
+            result = None
+        if result or time.time() >= deadline:
+            return result, time.time() - start
+        time.sleep(interval)
+
+def wait_for_page_ready(driver, timeout=10, require_app=True, idle_time=0.5, label="页面加载"):
+    """等待页面就绪：文档加载完成、课程应用已挂载、资源请求在idle_time内不再增加
+
+    返回实际等待秒数；超时也返回耗时（页面可能仍可用），并记入超时统计
+    """
+    state = {"resources": -1, "stable_since": None}
+
+    def ready():
+        info = driver.execute_script(PAGE_READY_JS) or {}
+        if info.get("ready_state") != "complete":
+            return False
+        if require_app and not info.get("app_ready"):
+            return False
+        now = time.time()
+        if info.get("resources") != state["resources"]:
+            # 仍有新的资源请求，重新计算网络空闲时间
+            state["resources"] = info.get("resources")
+            state["stable_since"] = now
+            return False
+        return now - state["stable_since"] >= idle_time
+
+    result, elapsed = wait_until(ready, timeout)
+    timed_out = not result
+    record_wait(label, elapsed, timed_out)
+    if timed_out:
+        utils.log(f"[等待] {label}未在{timeout}秒内就绪，继续执行")
+    else:
+        utils.log(f"[等待] {label}就绪，实际等待{elapsed:.2f}秒")
+    return elapsed
+
+def navigate(driver, url, timeout=10, require_app=True, label="页面导航"):
+    """打开URL并等待页面就绪，返回实际等待秒数"""
+    driver.get(url)
+    return wait_for_page_ready(driver, timeout=timeout, require_app=require_app, label=label)
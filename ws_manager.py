@@ -0,0 +1,179 @@
+import json
+import time
+import queue
+import asyncio
+import threading
+import http_manager
+import utils  # 导入通用工具模块
+
+# 可选依赖：websockets（未安装时回退为HTTP轮询）
+try:
+    import websockets
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:
+    websockets = None
+    WEBSOCKETS_AVAILABLE = False
+
+LESSON_WS_PATH = "/wsapp/"  # 课程推送WebSocket地址（相对服务器）
+
+
+class LessonSocketClient:
+    """asyncio WebSocket客户端：在后台线程中运行事件循环，断线后自动重连，并请求补发断线期间的推送"""
+    reconnect_delays = (1, 2, 5, 10, 30)  # 连续重连的等待秒数
+
+    def __init__(self, url, headers, lesson_id, on_frame, auth=None, user_id=None):
+        self.url = url
+        self.headers = headers
+        self.lesson_id = lesson_id
+        self.auth = auth           # 课堂令牌（签到接口返回的lessonToken）
+        self.user_id = user_id     # 用户ID（签到接口返回的identityId）
+        self.on_frame = on_frame   # 收到帧时的回调（在后台线程中调用）
+        self.connected = False
+        self.auth_failed = False   # 握手被拒绝（登录失效）
+        self.stopped = False
+        self.last_message = 0      # 最近一次收到推送的时间（毫秒），重连后从该时间补发
+        self.reconnects = 0
+        self.loop = None
+        self.ws = None
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._thread_main, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped = True
+        if self.loop and self.ws:
+            try:
+                asyncio.run_coroutine_threadsafe(self.ws.close(), self.loop)
+            except Exception:
+                pass
+
+    def _thread_main(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._run())
+        finally:
+            self.loop.close()
+
+    def _hello(self):
+        """握手帧：服务器据课堂令牌与用户ID确认身份后才推送该课次的消息"""
+        return {"op": "hello", "userid": self.user_id, "role": "student", "auth": self.auth, "lessonid": self.lesson_id}
+
+    def _resume(self):
+        return {"op": "fetchtimeline", "lessonid": self.lesson_id, "msgid": 0, "since": self.last_message}
+
+    async def _connect(self):
+        try:
+            return await websockets.connect(self.url, additional_headers=self.headers, ping_interval=20)
+        except TypeError:
+            # 旧版本websockets使用extra_headers参数
+            return await websockets.connect(self.url, extra_headers=self.headers, ping_interval=20)
+
+    async def _run(self):
+        attempt = 0
+        while not self.stopped:
+            try:
+                self.ws = await self._connect()
+                self.connected = True
+                attempt = 0
+                utils.log(f"[WebSocket] 已连接课程推送: {self.url}")
+                await self.ws.send(json.dumps(self._hello()))
+                if self.last_message:
+                    await self.ws.send(json.dumps(self._resume()))  # 补发断线期间的推送
+                async for message in self.ws:
+                    self.last_message = int(time.time() * 1000)
+                    self.on_frame(message if isinstance(message, str) else message.decode("utf-8", "ignore"))
+            except Exception as e:
+                status = getattr(e, "status_code", None) or getattr(getattr(e, "response", None), "status_code", None)
+                if status in (401, 403):
+                    utils.log(f"[WebSocket] 握手被拒绝（HTTP {status}），登录状态已失效")
+                    self.auth_failed = True
+                    break
+                if not self.stopped:
+                    utils.log(f"[WebSocket] 连接中断: {str(e)}")
+            finally:
+                self.connected = False
+                self.ws = None
+            if self.stopped:
+                break
+            delay = self.reconnect_delays[min(attempt, len(self.reconnect_delays) - 1)]
+            attempt += 1
+            self.reconnects += 1
+            utils.log(f"[WebSocket] {delay}秒后重连（第{self.reconnects}次）")
+            await asyncio.sleep(delay)
+
+
+class SocketDetector(http_manager.HttpDetector):
+    """WebSocket直连检测：登录后关闭浏览器，用登录Cookie签到获取课堂令牌后直接连接课程推送，老师发题/翻页即触发检测
+
+    当前页与题目状态仍通过课程状态接口读取（每次推送只请求一次）；未安装websockets时回退为HTTP轮询
+    """
+    name = "ws"
+
+    def __init__(self, course_url, parse_frame):
+        super().__init__(course_url)
+        self.parse_frame = parse_frame  # 推送帧解析函数（detection_manager.parse_ws_frame）
+        self.events = queue.Queue()
+        self.socket = None
+
+    def prepare(self, driver):
+        ok = super().prepare(driver)
+        if not ok or not driver:
+            return ok
+        if not WEBSOCKETS_AVAILABLE:
+            utils.log("[WebSocket] 未安装websockets（pip install websockets），回退为HTTP轮询")
+            return ok
+        if self.socket:
+            self.socket.stop()  # 重新登录后使用新的Cookie重连
+            self.socket = None
+        client = self.client
+        try:
+            client.checkin()  # 握手帧需要课堂令牌与用户ID
+        except http_manager.AuthExpiredError as e:
+            utils.log(f"[WebSocket] 课堂签到失败（{str(e)}），需要重新登录")
+            self.auth_expired = True
+            return ok
+        except Exception as e:
+            utils.log(f"[WebSocket] 课堂签到失败: {str(e)}，回退为HTTP轮询")
+            return ok
+        cookie_header = "; ".join(f"{cookie.name}={cookie.value}" for cookie in client.session.cookies)
+        headers = {"Cookie": cookie_header, "User-Agent": client.session.headers.get("User-Agent", ""),
+                   "Origin": client.base_url}
+        url = client.base_url.replace("https://", "wss://").replace("http://", "ws://") + LESSON_WS_PATH
+        self.socket = LessonSocketClient(url, headers, client.lesson_id, self._on_frame,
+                                         client.lesson_token, client.identity_id)
+        self.socket.start()
+        return ok
+
+    def _on_frame(self, payload):
+        event = self.parse_frame(payload)
+        if event:
+            self.events.put(event)
+
+    def close(self):
+        if self.socket:
+            self.socket.stop()
+
+    def poll(self, driver):
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def wait(self, driver, timeout):
+        if not self.socket:
+            return super().wait(driver, timeout)  # 未建立推送连接，按HTTP轮询等待
+        if self.socket.auth_failed:
+            self.auth_expired = True
+            return []
+        try:
+            first = self.events.get(timeout=timeout)
+        except queue.Empty:
+            return []
+        events = [first] + self.poll(driver)
+        utils.log(f"[检测模块] 收到课程推送: {', '.join(e['reason'] for e in events)}")
+        return events